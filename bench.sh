@@ -0,0 +1,3 @@
+for bench in bench/bench_*.py; do
+    PYTHONPATH=src python3 "$bench"
+done
@@ -0,0 +1,62 @@
+import re
+import timeit
+
+from block_node_util import BlockType, block_to_block_type
+
+
+def five_scan_block_to_block_type(markdown_block_text: str) -> BlockType:
+    # The classifier block_to_block_type replaced, kept here as the reference
+    total_lines = len(markdown_block_text.split("\n"))
+
+    if len(re.findall(r"^\#{1,6}\s.+", markdown_block_text, re.M)) == total_lines:
+        return BlockType.HEADING
+
+    if re.findall(r"^`{3}[\s\S]+`{3}$", markdown_block_text, re.M):
+        return BlockType.CODE
+
+    if len(re.findall(r"\> *.+", markdown_block_text)) == total_lines:
+        return BlockType.QUOTE
+
+    if len(re.findall(r"[*-] {1}.+", markdown_block_text)) == total_lines:
+        return BlockType.UNORDERED_LIST
+
+    if (
+        len(re.findall(r"[123456789]+[\d]*\. {1}.+", markdown_block_text))
+        == total_lines
+    ):
+        return BlockType.ORDERED_LIST
+
+    return BlockType.PARAGRAPH
+
+
+LINE = "In the annals of fantasy literature few sagas can rival Tolkien"
+BLOCKS = {
+    "heading": "## Reasons I like Tolkien",
+    "paragraph": "\n".join([LINE] * 8),
+    "long paragraph": "\n".join([LINE] * 200),
+    "code": "```\n" + "\n".join(["print('hello')"] * 20) + "\n```",
+    "quote": "\n".join(f"> {LINE}" for _ in range(8)),
+    "unordered list": "\n".join(f"* {LINE}" for _ in range(20)),
+    "ordered list": "\n".join(f"{i}. {LINE}" for i in range(1, 21)),
+}
+
+
+def best_of(func, block: str, number: int = 2000) -> float:
+    return min(timeit.repeat(lambda: func(block), number=number, repeat=5)) / number
+
+
+def main():
+    print("block classification, best of 5 (us per block)")
+    for name, block in BLOCKS.items():
+        assert five_scan_block_to_block_type(block) == block_to_block_type(block)
+        five_scans = best_of(five_scan_block_to_block_type, block)
+        single_pass = best_of(block_to_block_type, block)
+        print(
+            f"  {name:<15} five scans {five_scans * 1e6:8.2f}"
+            f"  single pass {single_pass * 1e6:8.2f}"
+            f"  speedup {five_scans / single_pass:5.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+import timeit
+from typing import List
+
+from inline_node_util import (
+    split_nodes_delimiter,
+    split_nodes_image,
+    split_nodes_link,
+    text_to_text_nodes,
+)
+from textnode import TextNode, TextType
+
+SENTENCE = (
+    "This is **bold text** with an *italic word*, a `code span`, an "
+    "![image](/images/rivendell.png) and a [link](https://example.com). "
+)
+
+
+def five_pass_text_to_text_nodes(text) -> List["TextNode"]:
+    # The pipeline text_to_text_nodes replaced, kept here as the reference
+    nodes = [TextNode(text, TextType.NORMAL)]
+    nodes = split_nodes_delimiter(nodes, "`", TextType.CODE)
+    nodes = split_nodes_delimiter(nodes, "*", TextType.ITALIC)
+    nodes = split_nodes_delimiter(nodes, "**", TextType.BOLD)
+    nodes = split_nodes_image(nodes)
+    nodes = split_nodes_link(nodes)
+    return nodes
+
+
+def best_of(func, text: str, number: int) -> float:
+    return min(timeit.repeat(lambda: func(text), number=number, repeat=5)) / number
+
+
+def main():
+    print("inline parsing, best of 5 (ms per paragraph)")
+    for sentences in [1, 10, 100, 300]:
+        text = SENTENCE * sentences
+        number = max(1, 300 // sentences)
+        five_pass = best_of(five_pass_text_to_text_nodes, text, number)
+        single_pass = best_of(text_to_text_nodes, text, number)
+        print(
+            f"  {len(text):>7} chars: five passes {five_pass * 1000:8.3f}"
+            f"  single pass {single_pass * 1000:8.3f}"
+            f"  speedup {five_pass / single_pass:5.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from htmlnode import block_cache, inline_cache, markdown_to_html_node
+from inline_node_util import text_to_text_nodes
+from markdown_util import generate_page
+from template import Template
+
+TARGET_SIZE = 10 * 1024 * 1024
+
+
+def synthetic_markdown(size: int, seed: int = 0) -> str:
+    rng = random.Random(seed)
+    words = ["lorem", "ipsum", "dolor", "sit", "amet", "tolkien", "elrond", "moria"]
+    inline = ["**bold**", "*italic*", "`code`", "[link](/x)", "![img](/i.png)"]
+
+    def sentence() -> str:
+        parts = [rng.choice(words) for _ in range(rng.randint(4, 12))]
+        parts[rng.randrange(len(parts))] = rng.choice(inline)
+        return " ".join(parts)
+
+    blocks = ["# Synthetic document"]
+    total = 0
+    while total < size:
+        kind = rng.randrange(4)
+        if kind == 0:
+            block = "## " + sentence()
+        elif kind == 1:
+            block = "\n".join(f"* {sentence()}" for _ in range(rng.randint(2, 8)))
+        elif kind == 2:
+            block = "> " + sentence()
+        else:
+            block = " ".join(sentence() for _ in range(rng.randint(3, 10)))
+        blocks.append(block)
+        total += len(block) + 2
+    return "\n\n".join(blocks)
+
+
+def measure(label: str, func, *args):
+    # The arguments are passed in rather than closed over, so the caller can drop
+    # its own references before measuring. The memo caches start empty, what
+    # they keep is part of "retained".
+    block_cache.clear()
+    inline_cache.clear()
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = func(*args)
+    elapsed = time.perf_counter() - start
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(
+        f"  {label:<28} retained {current / 2**20:8.1f} MiB"
+        f"  peak {peak / 2**20:8.1f} MiB  {elapsed:6.2f}s"
+    )
+    return result
+
+
+def main():
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else TARGET_SIZE
+    markdown = synthetic_markdown(size)
+    print(f"memory for a {len(markdown) / 2**20:.1f} MiB markdown document")
+    measure("text_to_text_nodes", text_to_text_nodes, markdown)
+    measure("markdown_to_html_node", markdown_to_html_node, markdown)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        src_path = os.path.join(tmp, "index.md")
+        with open(src_path, "w") as markdown_file:
+            markdown_file.write(markdown)
+        del markdown
+        template = Template.compile("<title>{{ Title }}</title>{{ Content }}")
+        dest_path = os.path.join(tmp, "index.html")
+        measure(
+            "generate_page (streamed)", generate_page, src_path, template, dest_path
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,225 @@
+import argparse
+import json
+import os
+import platform
+import re
+import shutil
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+from io import StringIO
+from typing import Callable, Dict, List
+
+from block_node_util import BlockType, block_to_block_type, iter_markdown_blocks
+from corpus import generate_corpus
+from htmlnode import block_cache, inline_cache, markdown_to_html_node
+from inline_node_util import text_to_text_nodes
+from markdown_util import collect_pages, generate_pages_recursive
+from site_index import SiteIndex
+from static_util import copy_files
+
+RESULTS_VERSION = 1
+BASELINE_PATH = os.path.join(".cache", "bench-baseline.json")
+LIST_MARKER_PATTERN = re.compile(r"^[\d*-]*\.*\s")
+
+
+class Corpus:
+    # Reads the generated pages once and prepares the input of every stage, so
+    # each stage is timed on its own
+
+    def __init__(self, root: str):
+        self.root = root
+        self.content = os.path.join(root, "content")
+        self.static = os.path.join(root, "static")
+        self.template = os.path.join(root, "template.html")
+        self.pages = []
+        for page in collect_pages(self.content, os.path.join(root, "public")):
+            with open(page.src_path) as page_file:
+                self.pages.append(page_file.read())
+        self.blocks = [
+            block
+            for page in self.pages
+            for block in iter_markdown_blocks(page.split("\n"))
+        ]
+        self.inline_texts = []
+        for block in self.blocks:
+            block_type = block_to_block_type(block)
+            if block_type == BlockType.PARAGRAPH:
+                self.inline_texts.append(block)
+            elif block_type in (BlockType.UNORDERED_LIST, BlockType.ORDERED_LIST):
+                self.inline_texts += [
+                    LIST_MARKER_PATTERN.sub("", line).strip()
+                    for line in block.splitlines()
+                ]
+        self.trees = [markdown_to_html_node(page) for page in self.pages]
+
+    def split_blocks(self):
+        for page in self.pages:
+            for _ in iter_markdown_blocks(page.split("\n")):
+                pass
+
+    def classify_blocks(self):
+        for block in self.blocks:
+            block_to_block_type(block)
+
+    def parse_inline(self):
+        for text in self.inline_texts:
+            text_to_text_nodes(text)
+
+    def build_trees(self):
+        # Cold memo caches, the build numbers below include them
+        block_cache.clear()
+        inline_cache.clear()
+        for page in self.pages:
+            markdown_to_html_node(page)
+
+    def to_html(self):
+        for tree in self.trees:
+            tree.to_html()
+
+    def build(self, jobs: int = 1):
+        block_cache.clear()
+        inline_cache.clear()
+        public = os.path.join(self.root, "public")
+        shutil.rmtree(public, ignore_errors=True)
+        os.mkdir(public)
+        with redirect_stdout(StringIO()):
+            index = SiteIndex.scan(self.content, self.static, public)
+            copy_files(self.static, public, index=index)
+            results = generate_pages_recursive(
+                self.content, self.template, public, jobs=jobs, index=index
+            )
+        failed = [result for result in results if result.error is not None]
+        if failed:
+            raise RuntimeError(f"{len(failed)} pages failed: {failed[0].error}")
+
+
+def time_loops(function: Callable[[], None], number: int) -> float:
+    start = time.perf_counter()
+    for _ in range(number):
+        function()
+    return time.perf_counter() - start
+
+
+def best_of(function: Callable[[], None], repeat: int, min_seconds=0.2) -> float:
+    # Short stages run several times per measurement so timer resolution and
+    # scheduling jitter stay small next to what is measured
+    number = 1
+    while (elapsed := time_loops(function, number)) < min_seconds:
+        number *= 2
+    timings = [elapsed] + [time_loops(function, number) for _ in range(repeat - 1)]
+    return min(timings) / number
+
+
+def run(corpus: Corpus, repeat: int, jobs: int) -> Dict[str, float]:
+    stages = {
+        "split_blocks": corpus.split_blocks,
+        "classify_blocks": corpus.classify_blocks,
+        "parse_inline": corpus.parse_inline,
+        "build_trees": corpus.build_trees,
+        "to_html": corpus.to_html,
+        "build": corpus.build,
+    }
+    if jobs > 1:
+        stages[f"build_j{jobs}"] = lambda: corpus.build(jobs)
+
+    timings = {}
+    for name, stage in stages.items():
+        timings[name] = best_of(stage, repeat)
+        print(f"  {name:<16} {timings[name] * 1000:10.1f} ms")
+    return timings
+
+
+def compare(baseline: Dict, results: Dict, threshold: float) -> List[str]:
+    regressions = []
+    print(f"compared with the baseline, regressions are slower by over {threshold:.0%}")
+    for name, seconds in results["timings"].items():
+        base = baseline["timings"].get(name)
+        if base is None:
+            print(f"  {name:<16} no baseline")
+            continue
+        change = seconds / base - 1
+        flag = ""
+        if change > threshold:
+            flag = "  REGRESSION"
+            regressions.append(name)
+        print(
+            f"  {name:<16} {base * 1000:10.1f} ms -> {seconds * 1000:10.1f} ms"
+            f"  {change:+7.1%}{flag}"
+        )
+    return regressions
+
+
+def main(argv: List["str"] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Time every pipeline stage and the full build on a generated site"
+    )
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=5, help="keep the best of N")
+    parser.add_argument("-j", "--jobs", type=int, default=1)
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument(
+        "--save-baseline",
+        action="store_true",
+        help="store these timings as the baseline instead of comparing",
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.1,
+        help="slowdown that counts as a regression (default 0.1 for 10%%)",
+    )
+    parser.add_argument("--json", help="also write these timings to a file")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as root:
+        generate_corpus(root, args.pages, args.seed)
+        corpus = Corpus(root)
+        size = sum(map(len, corpus.pages))
+        print(
+            f"pipeline on {len(corpus.pages)} pages ({size / 2**20:.1f} MiB, "
+            f"{len(corpus.blocks)} blocks), best of {args.repeat}"
+        )
+        results = {
+            "version": RESULTS_VERSION,
+            "pages": args.pages,
+            "seed": args.seed,
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "timings": run(corpus, args.repeat, args.jobs),
+        }
+
+    if args.json:
+        with open(args.json, "w") as results_file:
+            json.dump(results, results_file, indent=2)
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(args.baseline) or ".", exist_ok=True)
+        with open(args.baseline, "w") as baseline_file:
+            json.dump(results, baseline_file, indent=2)
+        print("Saved baseline to", args.baseline)
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}, save one with --save-baseline")
+        return 0
+    with open(args.baseline) as baseline_file:
+        baseline = json.load(baseline_file)
+    corpus_keys = ["version", "pages", "seed"]
+    if any(baseline.get(key) != results[key] for key in corpus_keys):
+        print("The baseline was measured on a different corpus, not comparing")
+        return 0
+    if baseline.get("python") != results["python"]:
+        print(f"Note: the baseline was measured on Python {baseline.get('python')}")
+
+    regressions = compare(baseline, results, args.threshold)
+    if regressions:
+        print("Regressed:", ", ".join(regressions))
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,136 @@
+import os
+import random
+from typing import Callable, Dict, List
+
+WORDS = [
+    "lorem", "ipsum", "dolor", "sit", "amet", "tolkien", "elrond", "moria",
+    "gandalf", "shire", "rivendell", "mithril", "palantir", "ent", "anduin",
+]  # fmt: skip
+INLINE = ["**bold**", "*italic*", "`code`", "[link](/x)", "![img](/i.png)"]
+FOOTER = "\n\n".join(
+    [
+        "> This page is provided **as is** without *any* warranty.",
+        "- [Home](/)\n- [About](/about)\n- [Blog](/blog)\n- [Contact](/contact)",
+        "Copyright 2024, see the `LICENSE` file and the [terms](/terms).",
+    ]
+)
+
+
+class MarkdownWriter:
+    # Every document comes from one seeded Random, so a seed always produces
+    # the same corpus and timings stay comparable between runs
+
+    def __init__(self, rng: random.Random):
+        self.rng = rng
+
+    def sentence(self, inline: int = 1) -> str:
+        words = [self.rng.choice(WORDS) for _ in range(self.rng.randint(4, 12))]
+        for _ in range(inline):
+            words[self.rng.randrange(len(words))] = self.rng.choice(INLINE)
+        return " ".join(words)
+
+    def heading(self) -> str:
+        return "#" * self.rng.randint(2, 6) + " " + self.sentence(0)
+
+    def paragraph(self, inline: int = 1) -> str:
+        return " ".join(self.sentence(inline) for _ in range(self.rng.randint(3, 10)))
+
+    def unordered_list(self, items: int) -> str:
+        return "\n".join(
+            f"{self.rng.choice('*-')} {self.sentence()}" for _ in range(items)
+        )
+
+    def ordered_list(self, items: int) -> str:
+        return "\n".join(f"{i}. {self.sentence()}" for i in range(1, items + 1))
+
+    def quote(self) -> str:
+        lines = self.rng.randint(1, 4)
+        return "\n".join(f"> {self.sentence()}" for _ in range(lines))
+
+    def code(self, lines: int) -> str:
+        body = [
+            f"    value_{i} = compute({i}, '{self.rng.choice(WORDS)}')"
+            for i in range(lines)
+        ]
+        return "```\n" + "\n".join(body) + "\n```"
+
+    def article(self) -> List[str]:
+        blocks = []
+        for _ in range(self.rng.randint(10, 40)):
+            kind = self.rng.randrange(6)
+            if kind == 0:
+                blocks.append(self.heading())
+            elif kind == 1:
+                blocks.append(self.unordered_list(self.rng.randint(2, 8)))
+            elif kind == 2:
+                blocks.append(self.ordered_list(self.rng.randint(2, 8)))
+            elif kind == 3:
+                blocks.append(self.quote())
+            elif kind == 4:
+                blocks.append(self.code(self.rng.randint(3, 15)))
+            else:
+                blocks.append(self.paragraph())
+        return blocks
+
+    def huge_list(self) -> List[str]:
+        return [self.unordered_list(2000), self.ordered_list(1000)]
+
+    def inline_heavy(self) -> List[str]:
+        return [self.paragraph(inline=4) for _ in range(60)]
+
+    def big_code(self) -> List[str]:
+        return [self.paragraph(), self.code(3000), self.paragraph()]
+
+
+# Share of pages of each kind, the rest are ordinary articles
+PAGE_KINDS: Dict[str, float] = {
+    "huge_list": 0.02,
+    "inline_heavy": 0.1,
+    "big_code": 0.02,
+}
+
+
+def page_kind(rng: random.Random) -> str:
+    roll = rng.random()
+    for kind, share in PAGE_KINDS.items():
+        if roll < share:
+            return kind
+        roll -= share
+    return "article"
+
+
+def generate_corpus(root: str, pages: int = 200, seed: int = 0, depth: int = 6):
+    # Writes content/, static/ and template.html under root. Pages are spread
+    # over nested sections up to depth levels deep and all share a footer.
+    rng = random.Random(seed)
+    writer = MarkdownWriter(rng)
+    kinds: Dict[str, Callable[[], List[str]]] = {
+        "article": writer.article,
+        "huge_list": writer.huge_list,
+        "inline_heavy": writer.inline_heavy,
+        "big_code": writer.big_code,
+    }
+
+    for i in range(pages):
+        sections = [f"section-{rng.randrange(4)}" for _ in range(rng.randint(0, depth))]
+        directory = os.path.join(root, "content", *sections)
+        os.makedirs(directory, exist_ok=True)
+        kind = page_kind(rng)
+        blocks = [f"# Page {i} {writer.sentence(0)}", *kinds[kind](), FOOTER]
+        with open(os.path.join(directory, f"page-{i}.md"), "w") as page:
+            page.write("\n\n".join(blocks))
+
+    static = os.path.join(root, "static", "images")
+    os.makedirs(static, exist_ok=True)
+    with open(os.path.join(root, "static", "index.css"), "w") as css:
+        css.write("body { margin: 0 auto; max-width: 40em; }\n" * 50)
+    for i in range(20):
+        with open(os.path.join(static, f"image-{i}.png"), "wb") as image:
+            image.write(rng.randbytes(64 * 1024))
+
+    with open(os.path.join(root, "template.html"), "w") as template:
+        template.write(
+            "<!DOCTYPE html>\n<html>\n<head>\n<title>{{ Title }}</title>\n"
+            '<link href="/index.css" rel="stylesheet">\n</head>\n'
+            "<body>\n<article>\n{{ Content }}\n</article>\n</body>\n</html>\n"
+        )
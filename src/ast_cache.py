@@ -0,0 +1,163 @@
+import gc
+import hashlib
+import marshal
+import os
+from contextlib import suppress
+from typing import List, Tuple
+
+from htmlnode import HTMLNode, LeafNode, ParentNode
+from profiler import timed
+
+# Bump whenever the parser produces a different tree for the same markdown, so
+# trees cached by an older version are never reused
+PARSER_VERSION = 1
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+# Bigger pages are streamed instead, holding and marshalling their whole tree
+# costs far more memory than the parse it saves
+DEFAULT_MAX_SOURCE_BYTES = 1024 * 1024
+# Every writer evicts once it has added this share of max_bytes, so the cache
+# stays bounded during a build and not only after it
+EVICT_FRACTION = 4
+CACHE_SUFFIX = ".ast"
+
+# A node is stored as (tag, value, props) for a leaf and (tag, child count,
+# props) for a parent, in preorder. Nothing else is needed to rebuild the tree
+# and neither direction recurses, so deep documents can't hit the recursion limit.
+Record = Tuple[str | None, str | int, dict | None]
+
+
+def flatten(root: HTMLNode) -> List[Record]:
+    records: List[Record] = []
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, ParentNode):
+            children = list(node.children)
+            records.append((node.tag, len(children), node.props))
+            stack.extend(reversed(children))
+        else:
+            records.append((node.tag, node.value, node.props))
+    return records
+
+
+def unflatten(records: List[Record]) -> HTMLNode:
+    # Every record allocates a node and none of them form cycles, pause the
+    # cyclic collector so it doesn't keep rescanning the growing tree
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        return build_tree(records)
+    finally:
+        if gc_enabled:
+            gc.enable()
+
+
+def build_tree(records: List[Record]) -> HTMLNode:
+    nodes: List[HTMLNode] = []
+    # Each frame is the children list being filled and how many it still needs
+    stack = [[nodes, 1]]
+    for tag, value, props in records:
+        if not stack:
+            raise ValueError("Trailing records after the root")
+        frame = stack[-1]
+        if isinstance(value, int):
+            node = ParentNode(tag, [], props)
+        else:
+            node = LeafNode(tag, value, props)
+        frame[0].append(node)
+        frame[1] -= 1
+        if frame[1] == 0:
+            stack.pop()
+        if isinstance(value, int) and value > 0:
+            stack.append([node.children, value])
+    if stack:
+        raise ValueError("Truncated tree")
+    return nodes[0]
+
+
+# Parsed pages on disk, keyed by the hash of the markdown source and the parser
+# version, so a build where only the template or the assets changed renders
+# every page without parsing any markdown. Entries are touched when read and
+# the least recently used ones are evicted once the cache grows past max_bytes.
+class AstCache:
+
+    def __init__(
+        self,
+        directory: str,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        max_source_bytes: int = DEFAULT_MAX_SOURCE_BYTES,
+    ):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_source_bytes = max_source_bytes
+        self.hits = 0
+        self.misses = 0
+        # Bytes this process has put since it last evicted
+        self.written = 0
+
+    def key(self, source: bytes) -> str:
+        digest = hashlib.sha256(f"{PARSER_VERSION}\0".encode())
+        digest.update(source)
+        return digest.hexdigest()
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.directory, key + CACHE_SUFFIX)
+
+    @timed("ast_cache_get")
+    def get(self, key: str) -> Tuple[str, HTMLNode] | None:
+        path = self.path(key)
+        try:
+            with open(path, "rb") as cache_file:
+                # marshal.load() reads a file object a few bytes at a time
+                version, title, records = marshal.loads(cache_file.read())
+            if version != PARSER_VERSION:
+                raise ValueError(f"Parser version {version}")
+            page = title, unflatten(records)
+            os.utime(path)
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        except (EOFError, ValueError, TypeError):
+            # A corrupt or outdated entry is a miss, put() replaces it
+            self.misses += 1
+            return None
+        self.hits += 1
+        return page
+
+    @timed("ast_cache_put")
+    def put(self, key: str, title: str, root: HTMLNode) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        path = self.path(key)
+        # Pool workers may write the same entry at once, each writes its own
+        # file and the last rename wins
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        data = marshal.dumps((PARSER_VERSION, title, flatten(root)))
+        with open(tmp_path, "wb") as cache_file:
+            cache_file.write(data)
+        os.replace(tmp_path, path)
+        self.written += len(data)
+        if self.written * EVICT_FRACTION > self.max_bytes:
+            self.evict()
+
+    def evict(self) -> List[str]:
+        # Pool workers evict while they build, an entry may vanish under another
+        self.written = 0
+        if not os.path.isdir(self.directory):
+            return []
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.is_file() and entry.name.endswith(CACHE_SUFFIX):
+                with suppress(FileNotFoundError):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime_ns, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in entries)
+
+        removed = []
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            with suppress(FileNotFoundError):
+                os.remove(path)
+                removed.append(path)
+            total -= size
+        return removed
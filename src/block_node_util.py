@@ -1,6 +1,8 @@
 import re
 from enum import Enum
-from typing import List
+from typing import Iterable, Iterator, List
+
+from profiler import timed
 
 
 class BlockType(Enum):
@@ -13,32 +15,89 @@ class BlockType(Enum):
 
 
 def markdown_to_block(markdown: str) -> List["str"]:
-    stripped = markdown.strip().strip("\n")
-    blocks = []
-    for block in re.split(r"\n*\s+\n", stripped):
-        blocks.append("\n".join(map(lambda s: s.strip(), block.strip().split("\n"))))
-    return blocks
+    return list(iter_markdown_blocks(markdown.split("\n")))
+
+
+@timed()
+def iter_markdown_blocks(lines: Iterable[str]) -> Iterator[str]:
+    # Consumes lines (e.g. a file object) one at a time and yields each block as
+    # soon as it closes, so only the current block is ever held in memory.
+    # A block closes on a blank line, or after a line with trailing whitespace,
+    # which is where the old re.split(r"\n*\s+\n") over the whole text split.
+    block_lines: List["str"] = []
+    for line in lines:
+        if line.endswith("\n"):
+            line = line[:-1]
+        stripped = line.strip()
+        if stripped:
+            block_lines.append(stripped)
+        if block_lines and (not stripped or line[-1].isspace()):
+            yield "\n".join(block_lines)
+            block_lines = []
+    if block_lines:
+        yield "\n".join(block_lines)
 
 
+HEADING_LINE_PATTERN = re.compile(r"\#{1,6}\s.")
+UNORDERED_LIST_LINE_PATTERN = re.compile(r"[*-] .")
+ORDERED_LIST_LINE_PATTERN = re.compile(r"[123456789]+[\d]*\. .")
+
+
+@timed()
 def block_to_block_type(markdown_block_text: str) -> BlockType:
-    total_lines = len(markdown_block_text.split("\n"))
+    # Every line must qualify for a block type, so each type is dropped on the
+    # first line that rules it out, and the scan stops once nothing is left.
+    # Lines are checked the same way the whole-block patterns used to match
+    # them: headings from the line start, quote and list markers anywhere.
+    if "\n" not in markdown_block_text:
+        # Most blocks are a single line heading, they skip the line loop
+        if HEADING_LINE_PATTERN.match(markdown_block_text):
+            return BlockType.HEADING
+    heading = quote = unordered_list = ordered_list = True
+    may_be_code = "```" in markdown_block_text
+    code_opened = False
 
-    if len(re.findall(r"^\#{1,6}\s.+", markdown_block_text, re.M)) == total_lines:
-        return BlockType.HEADING
+    offset = 0
+    for line in markdown_block_text.split("\n"):
+        offset += len(line) + 1
+        if may_be_code:
+            # A code block needs a line starting with ``` and a later (or the
+            # same, long enough) line ending with ```
+            starts_with_fence = line.startswith("```")
+            if line.endswith("```") and (
+                code_opened or (starts_with_fence and len(line) >= 7)
+            ):
+                return BlockType.CODE
+            code_opened = code_opened or starts_with_fence
 
-    if re.findall(r"^`{3}[\s\S]+`{3}$", markdown_block_text, re.M):
-        return BlockType.CODE
+        if heading:
+            heading = line[:1] == "#" and bool(HEADING_LINE_PATTERN.match(line))
+        if quote:
+            quote = (line[:1] == ">" and len(line) > 1) or ">" in line[:-1]
+        if unordered_list:
+            unordered_list = bool(UNORDERED_LIST_LINE_PATTERN.search(line))
+        if ordered_list:
+            ordered_list = ". " in line and bool(ORDERED_LIST_LINE_PATTERN.search(line))
 
-    if len(re.findall(r"\> *.+", markdown_block_text)) == total_lines:
-        return BlockType.QUOTE
+        if heading or quote or unordered_list or ordered_list:
+            continue
+        if not may_be_code:
+            return BlockType.PARAGRAPH
+        if code_opened:
+            # Only the closing fence is left to find, search for it directly
+            closing_fence_idx = markdown_block_text.find("```\n", offset)
+            if closing_fence_idx == -1 and markdown_block_text.endswith("```"):
+                closing_fence_idx = len(markdown_block_text) - 3
+            if closing_fence_idx >= offset:
+                return BlockType.CODE
+            return BlockType.PARAGRAPH
 
-    if len(re.findall(r"[*-] {1}.+", markdown_block_text)) == total_lines:
+    if heading:
+        return BlockType.HEADING
+    if quote:
+        return BlockType.QUOTE
+    if unordered_list:
         return BlockType.UNORDERED_LIST
-
-    if (
-        len(re.findall(r"[123456789]+[\d]*\. {1}.+", markdown_block_text))
-        == total_lines
-    ):
+    if ordered_list:
         return BlockType.ORDERED_LIST
-
     return BlockType.PARAGRAPH
@@ -0,0 +1,144 @@
+import hashlib
+import json
+import os
+from typing import Dict, Iterable, List, Set
+
+MANIFEST_VERSION = 1
+
+
+def hash_file(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+# Maps every source to the output it produced and the hash of its inputs, so the
+# next build can skip unchanged sources and prune outputs whose source is gone.
+class BuildManifest:
+    def __init__(self, path: str, entries: Dict[str, Dict] | None = None):
+        self.path = path
+        self.previous = entries if entries is not None else {}
+        self.current: Dict[str, Dict] = {}
+        self.__hashes: Dict[str, str] = {}
+
+    @classmethod
+    def load(cls, path: str) -> "BuildManifest":
+        if not os.path.exists(path):
+            return cls(path)
+        with open(path) as manifest_file:
+            data = json.load(manifest_file)
+        if data.get("version") != MANIFEST_VERSION:
+            return cls(path)
+        return cls(path, data["entries"])
+
+    def save(self) -> None:
+        dirname = os.path.dirname(self.path)
+        if dirname and not os.path.exists(dirname):
+            os.makedirs(dirname)
+        with open(self.path, "w") as manifest_file:
+            json.dump(
+                {"version": MANIFEST_VERSION, "entries": self.current},
+                manifest_file,
+                indent=2,
+                sort_keys=True,
+            )
+
+    def hash(self, path: str) -> str:
+        # Dependencies such as the template are shared by every page, hash them once
+        if path not in self.__hashes:
+            self.__hashes[path] = hash_file(path)
+        return self.__hashes[path]
+
+    def is_stale(
+        self,
+        src_path: str,
+        dest_path: str,
+        dependencies: Iterable[str] = (),
+        size: int | None = None,
+        mtime_ns: int | None = None,
+        settings: str = "",
+    ) -> bool:
+        # settings names build options that change the output, such as
+        # minification, toggling one makes the page stale
+        previous = self.previous.get(src_path)
+        source_hash = self.source_hash(src_path, size, mtime_ns)
+        digest = hashlib.sha256(source_hash.encode())
+        for dependency in dependencies:
+            digest.update(self.hash(dependency).encode())
+        if settings:
+            digest.update(settings.encode())
+        entry = self.record(
+            src_path, dest_path, digest.hexdigest(), source_hash, size, mtime_ns
+        )
+
+        return (
+            previous is None
+            or previous["dest"] != entry["dest"]
+            or previous["hash"] != entry["hash"]
+            or not os.path.exists(dest_path)
+        )
+
+    def source_hash(
+        self, src_path: str, size: int | None = None, mtime_ns: int | None = None
+    ) -> str:
+        # With the size and mtime from the site index, a source that kept both
+        # since the last build reuses its recorded hash instead of being read
+        previous = self.previous.get(src_path)
+        if (
+            previous is not None
+            and size is not None
+            and previous.get("size") == size
+            and previous.get("mtime_ns") == mtime_ns
+            and "source" in previous
+        ):
+            return previous["source"]
+        return hash_file(src_path)
+
+    def record(
+        self,
+        src_path: str,
+        dest_path: str,
+        digest: str = "",
+        source_hash: str | None = None,
+        size: int | None = None,
+        mtime_ns: int | None = None,
+    ) -> Dict:
+        # Outputs that decide staleness some other way (static assets compare
+        # size and mtime) still need an entry so they can be pruned
+        entry = {"dest": dest_path, "hash": digest}
+        if source_hash is not None and size is not None:
+            entry.update(source=source_hash, size=size, mtime_ns=mtime_ns)
+        self.current[src_path] = entry
+        return entry
+
+    def forget(self, src_path: str) -> None:
+        # A source whose output could not be produced keeps its entry with no
+        # hash, so it is retried next build and its last good output isn't pruned
+        entry = self.current.get(src_path)
+        if entry is not None:
+            self.current[src_path] = {"dest": entry["dest"], "hash": ""}
+
+    def outputs(self) -> Set[str]:
+        return {entry["dest"] for entry in self.current.values()}
+
+    def prune(self, output_root: str) -> List[str]:
+        removed = []
+        current_dests = self.outputs()
+        for entry in sorted(self.previous.values(), key=lambda e: e["dest"]):
+            dest_path = entry["dest"]
+            if dest_path in current_dests or not os.path.isfile(dest_path):
+                continue
+            os.remove(dest_path)
+            removed.append(dest_path)
+            remove_empty_dirs(os.path.dirname(dest_path), output_root)
+        return removed
+
+
+def remove_empty_dirs(path: str, root: str) -> None:
+    root = os.path.abspath(root)
+    path = os.path.abspath(path)
+    while path != root and path.startswith(root) and not os.listdir(path):
+        os.rmdir(path)
+        path = os.path.dirname(path)
@@ -0,0 +1,221 @@
+import gzip
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from typing import Dict, List, NamedTuple, Set, Tuple
+
+from profiler import timed
+from site_index import scan_tree
+from static_util import format_bytes
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESS_MANIFEST_VERSION = 1
+COMPRESSIBLE_SUFFIXES = (".html", ".css", ".js", ".json", ".svg", ".txt", ".xml")
+ENCODING_SUFFIXES = (".gz", ".br")
+# Small files fit in a packet either way, and a compressed copy that saves less
+# than a tenth only costs the server a lookup and the client a decode
+MIN_SIZE = 256
+MAX_RATIO = 0.9
+
+
+class CompressStats(NamedTuple):
+    files_compressed: int
+    files_unchanged: int
+    files_incompressible: int
+    bytes_in: int
+    bytes_out: int
+    seconds: float
+
+    def summary(self) -> str:
+        saved = self.bytes_in - self.bytes_out
+        return (
+            f"Compressed {self.files_compressed} files"
+            f" ({format_bytes(self.bytes_in)} to {format_bytes(self.bytes_out)},"
+            f" saved {format_bytes(saved)}), {self.files_unchanged} unchanged,"
+            f" {self.files_incompressible} not worth compressing"
+            f" in {self.seconds:.2f}s"
+        )
+
+
+def encodings() -> List["str"]:
+    return [".gz", ".br"] if brotli is not None else [".gz"]
+
+
+def compress_file(
+    path: str, previous_hash: str | None, suffixes: List["str"]
+) -> Tuple[str, List["str"], int, int] | None:
+    # Runs inside pool workers. Returns the content hash, the suffixes written
+    # and the bytes in and out, or None when the content hash is unchanged.
+    with open(path, "rb") as file:
+        data = file.read()
+    digest = hashlib.sha256(data).hexdigest()
+    if digest == previous_hash:
+        return None
+
+    written = []
+    bytes_out = 0
+    for suffix in ENCODING_SUFFIXES:
+        compressed = b""
+        if suffix in suffixes and len(data) >= MIN_SIZE:
+            if suffix == ".gz":
+                # mtime=0 keeps the output identical for identical input
+                compressed = gzip.compress(data, compresslevel=9, mtime=0)
+            else:
+                compressed = brotli.compress(data)
+        if not compressed or len(compressed) > len(data) * MAX_RATIO:
+            # Not worth it or not available, don't leave a copy of older
+            # content behind
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+            continue
+        tmp_path = f"{path}{suffix}.tmp"
+        with open(tmp_path, "wb") as compressed_file:
+            compressed_file.write(compressed)
+        os.replace(tmp_path, path + suffix)
+        written.append(suffix)
+        bytes_out += len(compressed)
+    return digest, written, len(data), bytes_out
+
+
+def compressed_copies(
+    entries: Dict[str, Dict], outputs: Set[str] | None = None
+) -> List[str]:
+    # The copies written for the entries of a CompressManifest, only for the
+    # outputs in outputs when given. Recorded in the build manifest, so a page
+    # rebuilt or removed without --compress doesn't leave a stale copy behind.
+    return [
+        path + suffix
+        for path, entry in entries.items()
+        if outputs is None or path in outputs
+        for suffix in entry["written"]
+    ]
+
+
+# Remembers the hash, size and mtime of every output last compressed and the
+# suffixes written for it, so later builds only compress what changed
+class CompressManifest:
+
+    def __init__(self, path: str, entries: Dict[str, Dict] | None = None):
+        self.path = path
+        self.previous = entries if entries is not None else {}
+        self.current: Dict[str, Dict] = {}
+
+    @classmethod
+    def load(cls, path: str) -> "CompressManifest":
+        if not os.path.exists(path):
+            return cls(path)
+        with open(path) as manifest_file:
+            data = json.load(manifest_file)
+        if data.get("version") != COMPRESS_MANIFEST_VERSION:
+            return cls(path)
+        return cls(path, data["entries"])
+
+    def save(self) -> None:
+        dirname = os.path.dirname(self.path)
+        if dirname and not os.path.exists(dirname):
+            os.makedirs(dirname)
+        with open(self.path, "w") as manifest_file:
+            json.dump(
+                {"version": COMPRESS_MANIFEST_VERSION, "entries": self.current},
+                manifest_file,
+                indent=2,
+                sort_keys=True,
+            )
+
+
+@timed()
+def precompress(
+    public_dir: str, manifest: CompressManifest, jobs: int = 1
+) -> CompressStats:
+    # Writes .gz and, with the brotli module, .br next to every text output in
+    # public_dir. One walk finds the outputs and the copies already there.
+    start = time.perf_counter()
+    suffixes = encodings()
+    _, files = scan_tree(public_dir, public_dir)
+    existing = {file.src_path for file in files}
+
+    pending = []
+    files_unchanged = 0
+    for file in files:
+        if not file.src_path.endswith(COMPRESSIBLE_SUFFIXES):
+            continue
+        previous = manifest.previous.get(file.src_path)
+        if previous is not None and (
+            previous["suffixes"] != suffixes
+            or any(
+                file.src_path + suffix not in existing for suffix in previous["written"]
+            )
+        ):
+            previous = None
+        if previous is None:
+            pending.append((file, None))
+        elif (previous["size"], previous["mtime_ns"]) != (file.size, file.mtime_ns):
+            # Pages are written again on every full build, only a changed
+            # content hash is compressed again
+            pending.append((file, previous["hash"]))
+        else:
+            manifest.current[file.src_path] = previous
+            files_unchanged += 1
+
+    paths = [file.src_path for file, _ in pending]
+    previous_hashes = [previous_hash for _, previous_hash in pending]
+    if jobs > 1 and len(pending) > 1:
+        chunksize = max(1, len(pending) // (jobs * 4))
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            results = list(
+                executor.map(
+                    compress_file,
+                    paths,
+                    previous_hashes,
+                    repeat(suffixes),
+                    chunksize=chunksize,
+                )
+            )
+    else:
+        results = list(map(compress_file, paths, previous_hashes, repeat(suffixes)))
+
+    files_compressed = files_incompressible = bytes_in = bytes_out = 0
+    for (file, _), result in zip(pending, results):
+        previous = manifest.previous.get(file.src_path)
+        if result is None:
+            # Rewritten with the same content, only the mtime moved
+            entry = dict(previous, size=file.size, mtime_ns=file.mtime_ns)
+            manifest.current[file.src_path] = entry
+            files_unchanged += 1
+            continue
+        digest, written, size_in, size_out = result
+        manifest.current[file.src_path] = {
+            "hash": digest,
+            "size": file.size,
+            "mtime_ns": file.mtime_ns,
+            "suffixes": suffixes,
+            "written": written,
+        }
+        if written:
+            files_compressed += 1
+            bytes_in += size_in
+            bytes_out += size_out
+        else:
+            files_incompressible += 1
+
+    # Outputs that are gone take their compressed copies with them
+    for path in manifest.previous.keys() - manifest.current.keys():
+        for suffix in ENCODING_SUFFIXES:
+            if path + suffix in existing:
+                os.remove(path + suffix)
+
+    return CompressStats(
+        files_compressed,
+        files_unchanged,
+        files_incompressible,
+        bytes_in,
+        bytes_out,
+        time.perf_counter() - start,
+    )
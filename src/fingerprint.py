@@ -0,0 +1,77 @@
+import json
+import os
+import re
+from typing import Dict
+
+from site_index import SiteFile
+
+ASSET_MANIFEST_NAME = "asset-manifest.json"
+FINGERPRINT_LENGTH = 12
+URL_ATTRIBUTES = ("href", "src")
+URL_ATTRIBUTE_PATTERN = re.compile(r"""\b(href|src)(\s*=\s*)(["'])([^"']*)\3""")
+
+
+def fingerprinted_path(path: str, digest: str) -> str:
+    # static/index.css becomes static/index.<hash>.css
+    root, ext = os.path.splitext(path)
+    return f"{root}.{digest[:FINGERPRINT_LENGTH]}{ext}"
+
+
+def rewrite_url(url: str, asset_urls: Dict[str, str]) -> str:
+    # Only site absolute paths are looked up, a query or fragment is kept
+    if not url.startswith("/"):
+        return url
+    end = len(url)
+    for separator in "?#":
+        position = url.find(separator)
+        if position != -1:
+            end = min(end, position)
+    path = url[:end]
+    return asset_urls.get(path, path) + url[end:]
+
+
+def rewrite_html_urls(html: str, asset_urls: Dict[str, str]) -> str:
+    # Rewrites href and src attributes, for the template's literal markup
+    return URL_ATTRIBUTE_PATTERN.sub(
+        lambda match: "".join(
+            [
+                match.group(1),
+                match.group(2),
+                match.group(3),
+                rewrite_url(match.group(4), asset_urls),
+                match.group(3),
+            ]
+        ),
+        html,
+    )
+
+
+# Maps the URL of every static asset to the URL of its content hashed copy. The
+# hash changes whenever the content does, so the copies can be served with
+# immutable, year long cache headers. Written next to the assets for anything
+# else that needs to resolve them.
+class AssetManifest:
+
+    def __init__(self, path: str, public_dir: str):
+        self.path = path
+        self.public_dir = public_dir
+        self.urls: Dict[str, str] = {}
+
+    def url(self, dest_path: str) -> str:
+        relative = os.path.relpath(dest_path, self.public_dir)
+        return "/" + relative.replace(os.sep, "/")
+
+    def fingerprint(self, file: SiteFile, digest: str) -> SiteFile:
+        dest_path = fingerprinted_path(file.dest_path, digest)
+        self.urls[self.url(file.dest_path)] = self.url(dest_path)
+        return file._replace(dest_path=dest_path)
+
+    def save(self) -> None:
+        dirname = os.path.dirname(self.path)
+        if dirname and not os.path.exists(dirname):
+            os.makedirs(dirname)
+        with open(self.path, "w") as manifest_file:
+            json.dump(self.urls, manifest_file, indent=2, sort_keys=True)
+
+    def __repr__(self):
+        return f"AssetManifest({self.path}, {len(self.urls)} assets)"
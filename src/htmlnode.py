@@ -1,12 +1,34 @@
 import re
-from typing import Any, Dict, List
+from typing import Any, Dict, Iterable, Iterator, List, TextIO
 
-from block_node_util import BlockType, block_to_block_type, markdown_to_block
+from block_node_util import BlockType, block_to_block_type, iter_markdown_blocks
+from fingerprint import URL_ATTRIBUTES, rewrite_url
 from inline_node_util import text_to_text_nodes
+from lru_cache import LRUCache
+from minify import PRESERVE_TAGS, VOID_TAGS, can_omit_end_tag, collapse_whitespace
+from profiler import timed
 from textnode import TextNode, TextType
 
+# Pages repeat the same disclaimers, lists and footers, memoize the nodes built
+# from a block and from a run of inline text, keyed by the exact text. Texts
+# longer than MEMO_MAX_TEXT_LENGTH are rarely repeated and aren't kept. Each
+# cache holds at most MEMO_CACHE_TEXT_SIZE characters of text, the nodes grow
+# with the text they were built from, so every pool worker stays small.
+MEMO_MAX_TEXT_LENGTH = 4096
+MEMO_CACHE_TEXT_SIZE = 256 * 1024
+
+
+def memo_text_size(text: str, nodes: Any) -> int:
+    return len(text)
+
+
+block_cache = LRUCache(MEMO_CACHE_TEXT_SIZE, size_of=memo_text_size)
+inline_cache = LRUCache(MEMO_CACHE_TEXT_SIZE, size_of=memo_text_size)
+
 
 class HTMLNode:
+    # Pages create hundreds of thousands of nodes, skip the per-instance __dict__
+    __slots__ = ("tag", "value", "children", "props")
 
     def __init__(
         self,
@@ -20,19 +42,47 @@ class HTMLNode:
         self.children = children
         self.props = props
 
-    def to_html(self):
+    # minify collapses whitespace outside preformatted elements, leaves out end
+    # tags the HTML standard makes optional and the end tags of void elements
+
+    def to_html(self, asset_urls: Dict[str, str] | None = None, minify: bool = False):
         raise NotImplementedError()
 
-    def props_to_html(self):
+    def iter_html(
+        self, asset_urls: Dict[str, str] | None = None, minify: bool = False
+    ) -> Iterator[str]:
+        yield self.to_html(asset_urls, minify)
+
+    def write_html(
+        self,
+        stream: TextIO,
+        asset_urls: Dict[str, str] | None = None,
+        minify: bool = False,
+    ) -> None:
+        stream.writelines(self.iter_html(asset_urls, minify))
+
+    def props_to_html(self, asset_urls: Dict[str, str] | None = None):
         if self.props is None:
             return ""
-        return " ".join(map(lambda item: f'{item[0]}="{item[1]}"', self.props.items()))
+        props = self.props.items()
+        # asset_urls maps asset URLs to their fingerprinted copies. Links are
+        # rewritten while serializing because nodes are shared between pages.
+        if asset_urls:
+            props = [
+                (
+                    name,
+                    rewrite_url(value, asset_urls) if name in URL_ATTRIBUTES else value,
+                )
+                for name, value in props
+            ]
+        return " ".join(map(lambda item: f'{item[0]}="{item[1]}"', props))
 
     def __repr__(self):
         return f"HTMLNode({self.tag}, {self.value}, {self.children}, {self.props})"
 
 
 class ParentNode(HTMLNode):
+    __slots__ = ()
 
     def __init__(
         self,
@@ -42,42 +92,89 @@ class ParentNode(HTMLNode):
     ):
         super().__init__(tag, None, children, props)
 
-    def to_html(self):
+    def to_html(self, asset_urls: Dict[str, str] | None = None, minify: bool = False):
+        return "".join(self.iter_html(asset_urls, minify))
+
+    @timed("to_html")
+    def iter_html(
+        self, asset_urls: Dict[str, str] | None = None, minify: bool = False
+    ) -> Iterator[str]:
+        # Serialize with an explicit stack of child iterators instead of recursing,
+        # so long sibling lists stay linear and deep nesting can't hit the
+        # recursion limit
+        self.__validate()
+        yield self.__start_tag(asset_urls)
+        stack = [(self, iter(self.children))]
+        # Minifying, whether an end tag is optional depends on what follows it.
+        # It is held back here until the next sibling, or the parent's end, is seen.
+        pending_end = None
+        # Open PRESERVE_TAGS elements on the stack, whitespace is only collapsed
+        # outside all of them
+        preserving = 1 if self.tag in PRESERVE_TAGS else 0
+        collapse = minify and not preserving
+        while stack:
+            node, children = stack[-1]
+            child = next(children, None)
+            if pending_end is not None:
+                next_tag = None if child is None else child.tag
+                if not can_omit_end_tag(pending_end, next_tag, child is None, node.tag):
+                    yield f"</{pending_end}>"
+                pending_end = None
+            if child is None:
+                stack.pop()
+                if node.tag in PRESERVE_TAGS:
+                    preserving -= 1
+                if minify and stack:
+                    pending_end = node.tag
+                    collapse = not preserving
+                else:
+                    yield f"</{node.tag}>"
+            elif isinstance(child, ParentNode):
+                child.__validate()
+                yield child.__start_tag(asset_urls)
+                stack.append((child, iter(child.children)))
+                if child.tag in PRESERVE_TAGS:
+                    preserving += 1
+                    collapse = False
+            else:
+                yield child.to_html(asset_urls, collapse)
+
+    def __validate(self):
         if not self.tag:
             raise ValueError("tag is required")
-        if not self.children or len(self.children) == 0:
+        if not self.children:
             raise ValueError("children is required")
 
-        children_as_html = self.__children_to_html(self.children)
-        props = self.props_to_html()
+    def __start_tag(self, asset_urls: Dict[str, str] | None = None):
+        props = self.props_to_html(asset_urls)
         props = props if props == "" else f" {props}"
-        return f"<{self.tag}{props}>{children_as_html}</{self.tag}>"
-
-    def __children_to_html(self, children: List["HTMLNode"]):
-        if len(children) == 0:
-            return ""
-        result = self.__children_to_html(children[1:])
-        return children[0].to_html() + result
+        return f"<{self.tag}{props}>"
 
     def __repr__(self):
         return f"ParentNode({self.tag}, children: {self.children}, {self.props})"
 
 
 class LeafNode(HTMLNode):
+    __slots__ = ()
 
     def __init__(
         self, tag: str | None, value: str, props: Dict[str, Any] | None = None
     ):
         super().__init__(tag, value, None, props)
 
-    def to_html(self):
+    def to_html(self, asset_urls: Dict[str, str] | None = None, minify: bool = False):
         if self.value is None:
             raise ValueError()
+        value = self.value
+        if minify and self.tag not in PRESERVE_TAGS:
+            value = collapse_whitespace(value)
         if not self.tag:
-            return self.value
-        props = self.props_to_html()
+            return value
+        props = self.props_to_html(asset_urls)
         props = props if props == "" else f" {props}"
-        return f"<{self.tag}{props}>{self.value}</{self.tag}>"
+        if minify and self.tag in VOID_TAGS and not value:
+            return f"<{self.tag}{props}>"
+        return f"<{self.tag}{props}>{value}</{self.tag}>"
 
     def __repr__(self):
         return f"LeafNode({self.tag}, {self.value}, {self.props})"
@@ -99,35 +196,63 @@ def text_node_to_html_node(text_node: TextNode):
             return LeafNode("img", "", {"src": text_node.url, "alt": text_node.text})
 
 
-def markdown_to_html_node(markdown: str):
-    children: List["HTMLNode"] = []
-
-    blocks = markdown_to_block(markdown)
-    for block in blocks:
-        type = block_to_block_type(block)
-        match type:
-            case BlockType.HEADING:
-                children.append(markdown_heading_to_html(block))
-            case BlockType.CODE:
-                children.append(markdown_code_block_to_html(block))
-            case BlockType.UNORDERED_LIST:
-                children.append(markdown_unordered_list_to_html(block))
-            case BlockType.ORDERED_LIST:
-                children.append(markdown_ordered_list_to_html(block))
-            case BlockType.QUOTE:
-                children.append(markdown_quote_block_to_html(block))
-            case BlockType.PARAGRAPH:
-                children.append(markdown_paragraph_block_to_html(block))
-            case _:
-                raise ValueError("Invalid block")
-
-    return ParentNode("div", children)
+def text_to_html_nodes(text: str) -> List[HTMLNode]:
+    if len(text) > MEMO_MAX_TEXT_LENGTH:
+        return list(map(text_node_to_html_node, text_to_text_nodes(text)))
+    html_nodes = inline_cache.get(text)
+    if html_nodes is None:
+        html_nodes = tuple(map(text_node_to_html_node, text_to_text_nodes(text)))
+        inline_cache.put(text, html_nodes)
+    return list(html_nodes)
+
+
+def markdown_to_html_node(markdown: str | Iterable[str]):
+    return ParentNode("div", list(iter_block_html_nodes(markdown)))
+
+
+def iter_block_html_nodes(markdown: str | Iterable[str]) -> Iterator[HTMLNode]:
+    # Accepts the whole document or any iterable of lines such as an open file
+    lines = markdown.split("\n") if isinstance(markdown, str) else markdown
+    for block in iter_markdown_blocks(lines):
+        yield cached_block_to_html_node(block)
+
+
+def cached_block_to_html_node(block: str) -> HTMLNode:
+    # The node is shared by every page that contains the block, nodes are never
+    # modified after they are built
+    if len(block) > MEMO_MAX_TEXT_LENGTH:
+        return block_to_html_node(block)
+    html_node = block_cache.get(block)
+    if html_node is None:
+        html_node = block_to_html_node(block)
+        block_cache.put(block, html_node)
+    return html_node
+
+
+@timed()
+def block_to_html_node(block: str) -> HTMLNode:
+    type = block_to_block_type(block)
+    match type:
+        case BlockType.HEADING:
+            return markdown_heading_to_html(block)
+        case BlockType.CODE:
+            return markdown_code_block_to_html(block)
+        case BlockType.UNORDERED_LIST:
+            return markdown_unordered_list_to_html(block)
+        case BlockType.ORDERED_LIST:
+            return markdown_ordered_list_to_html(block)
+        case BlockType.QUOTE:
+            return markdown_quote_block_to_html(block)
+        case BlockType.PARAGRAPH:
+            return markdown_paragraph_block_to_html(block)
+        case _:
+            raise ValueError("Invalid block")
 
 
 def markdown_heading_to_html(heading: str) -> ParentNode:
     tag = f"h{heading.count("#")}"
     text = heading.replace("#", "").strip()
-    children = list(map(text_node_to_html_node, text_to_text_nodes(text)))
+    children = text_to_html_nodes(text)
     return ParentNode(tag, children)
 
 
@@ -149,7 +274,7 @@ def markdown_ordered_list_to_html(ul_block: str) -> ParentNode:
 
 def line_to_html_list_item(line: str):
     text = re.sub(r"^[\d*-]*\.*\s", "", line).strip()
-    children = list(map(text_node_to_html_node, text_to_text_nodes(text)))
+    children = text_to_html_nodes(text)
     return ParentNode("li", children)
 
 
@@ -157,10 +282,10 @@ def markdown_quote_block_to_html(quote_block: str) -> ParentNode:
     quotes = quote_block.splitlines()
     for quote in quotes:
         text = quote.replace(">", "", 1).strip()
-        children = list(map(text_node_to_html_node, text_to_text_nodes(text)))
+        children = text_to_html_nodes(text)
     return ParentNode("blockquote", children)
 
 
 def markdown_paragraph_block_to_html(paragraph_block: str) -> ParentNode:
-    children = list(map(text_node_to_html_node, text_to_text_nodes(paragraph_block)))
+    children = text_to_html_nodes(paragraph_block)
     return ParentNode("p", children)
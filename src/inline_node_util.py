@@ -1,87 +1,72 @@
 import re
 from typing import List
 
+from profiler import timed
 from textnode import TextNode, TextType
 
-double_star_delimiter_substitute = "[9fe2c4e9-3f65-4fdb-b24c-02b15259716c]"
+INLINE_TOKEN_PATTERN = re.compile(r"`|\*\*?|!?\[")
+IMAGE_PATTERN = re.compile(r"\!\[(.*?)\]\((.*?)\)")
+LINK_PATTERN = re.compile(r"\[(.*?)\]\((.*?)\)")
 
 
-def replace_double_star(text: str):
-    return text.replace("**", double_star_delimiter_substitute)
-
-
-def undo_replace_double_star(text: str):
-    return text.replace(double_star_delimiter_substitute, "**")
+def find_single_star(text: str, start: int) -> int:
+    # "**" pairs are consumed left to right, the same way the bold delimiter is
+    idx = text.find("*", start)
+    while idx != -1 and text.startswith("*", idx + 1):
+        idx = text.find("*", idx + 2)
+    return idx
 
 
 def split_nodes_delimiter(
     old_nodes: List["TextNode"], delimiter: str, text_type: TextType
 ) -> List["TextNode"]:
+    if delimiter == "*":
+        # "**" is not a match for "*", skip over it instead of substituting it
+        find_delimiter = find_single_star
+    else:
+
+        def find_delimiter(text: str, start: int) -> int:
+            return text.find(delimiter, start)
+
     new_nodes = []
     for node in old_nodes:
         node_text = node.text
-        double_star_replaced = False
-
-        if delimiter == "*":
-            # temporarily substitute "**"" with [double_star_delimiter_substitute] to avoid false positive matches with "*"
-            node_text = replace_double_star(node_text)
-            double_star_replaced = True
-
-        # search for the 1st instance of the delimiter
-        starting_delimiter_idx = node_text.find(delimiter)
-
-        if starting_delimiter_idx == -1:
-            # Can't process node for the given delimiter, move one.
+        cursor = 0
+
+        while cursor < len(node_text):
+            # search for the 1st instance of the delimiter
+            starting_delimiter_idx = find_delimiter(node_text, cursor)
+            if starting_delimiter_idx == -1:
+                break
+
+            # search for the 2nd instance of the delimiter
+            delimited_text_start_idx = starting_delimiter_idx + len(delimiter)
+            ending_delimiter_idx = find_delimiter(node_text, delimited_text_start_idx)
+            if ending_delimiter_idx == -1:
+                break
+
+            # Found a valid delimited text, check if preceding text exists and create a node
+            if starting_delimiter_idx > cursor:
+                new_nodes.append(
+                    TextNode(node_text[cursor:starting_delimiter_idx], node.text_type)
+                )
+
+            if ending_delimiter_idx > delimited_text_start_idx:
+                new_nodes.append(
+                    TextNode(
+                        node_text[delimited_text_start_idx:ending_delimiter_idx],
+                        text_type,
+                    )
+                )
+
+            # Move past the closing delimiter and look for the next pair
+            cursor = ending_delimiter_idx + len(delimiter)
+
+        if cursor == 0:
+            # Can't process node for the given delimiter, move on.
             new_nodes.append(node)
-            continue
-
-        # search for the 2nd instance of the delimiter
-        ending_delimiter_search_from_idx = starting_delimiter_idx + len(delimiter)
-        ending_delimiter_idx = node_text.find(
-            delimiter, ending_delimiter_search_from_idx
-        )
-
-        if ending_delimiter_idx == -1:
-            starting_node = 0
-            if len(new_nodes) != 0:
-                last_node_text = new_nodes[-1].text
-                starting_node = node_text.find(last_node_text) + (len(last_node_text))
-            new_nodes.append(TextNode(node_text[starting_node:], node.text_type))
-            continue
-
-        # Found a valid delimited text, check if preceding text exists and create a node
-        preceding_text = node_text[:starting_delimiter_idx]
-        if len(preceding_text) > 0:
-            final = (
-                undo_replace_double_star(preceding_text)
-                if double_star_replaced
-                else preceding_text
-            )
-            new_nodes.append(TextNode(final, node.text_type))
-
-        # slice the delimited text and create a new text node
-        delimited_text_start_idx = starting_delimiter_idx + len(delimiter)
-        delimited_text = node_text[delimited_text_start_idx:ending_delimiter_idx]
-        if len(delimited_text) > 0:
-            final = (
-                undo_replace_double_star(delimited_text)
-                if double_star_replaced
-                else delimited_text
-            )
-            new_nodes.append(TextNode(final, text_type))
-
-        # Recursively call if there are more text
-        succeeding_text_start_idx = ending_delimiter_idx + len(delimiter)
-        succeeding_text = node_text[succeeding_text_start_idx:]
-        if len(succeeding_text) > 0:
-            final = (
-                undo_replace_double_star(succeeding_text)
-                if double_star_replaced
-                else succeeding_text
-            )
-            new_nodes += split_nodes_delimiter(
-                [TextNode(final, node.text_type)], delimiter, text_type
-            )
+        elif cursor < len(node_text):
+            new_nodes.append(TextNode(node_text[cursor:], node.text_type))
 
     return new_nodes
 
@@ -96,12 +81,12 @@ def split_nodes_link(old_nodes: List["TextNode"]) -> List["TextNode"]:
 
 def extract_markdown_images(text: str):
     # Markdown image has the following syntax ![Alt Text](url)
-    return re.findall(r"\!\[(.*?)\]\((.*?)\)", text)
+    return IMAGE_PATTERN.findall(text)
 
 
 def extract_markdown_links(text: str):
     # Markdown link has the following syntax [Link Text](url)
-    return re.findall(r"\[(.*?)\]\((.*?)\)", text)
+    return LINK_PATTERN.findall(text)
 
 
 def split_nodes_image_or_link(old_nodes: List["TextNode"], text_type: TextType):
@@ -110,60 +95,115 @@ def split_nodes_image_or_link(old_nodes: List["TextNode"], text_type: TextType):
 
     new_nodes = []
 
-    extractor = (
-        extract_markdown_images
-        if text_type == TextType.IMAGE
-        else extract_markdown_links
-    )
-
-    def formatter(text, url):
-        formatted = f"[{text}]({url})"
-        return formatted if text_type == TextType.LINK else "!" + formatted
+    pattern = IMAGE_PATTERN if text_type == TextType.IMAGE else LINK_PATTERN
 
     for node in old_nodes:
         if node.text_type != TextType.NORMAL:
             new_nodes.append(node)
             continue
 
-        extracted_text_and_url = extractor(node.text)
-        if len(extracted_text_and_url) == 0:
-            new_nodes.append(node)
-            continue
-
+        node_text = node.text
         search_from_idx = 0
 
-        for i in range(len(extracted_text_and_url)):
-            text_to_search = node.text[search_from_idx:]
-
-            text, url = extracted_text_and_url[i]
-            image_substring = formatter(text, url)
-            image_substring_idx = text_to_search.find(image_substring)
-
+        for match in pattern.finditer(node_text):
             # Check preceding
-            if image_substring_idx != 0:
-                preceding_text = text_to_search[:image_substring_idx]
-                new_nodes.append(TextNode(preceding_text, TextType.NORMAL))
+            start, end = match.span()
+            if start > search_from_idx:
+                new_nodes.append(
+                    TextNode(node_text[search_from_idx:start], TextType.NORMAL)
+                )
 
+            text, url = match.groups()
             new_nodes.append(TextNode(text, text_type, url))
 
             # Move starting pointer
-            search_from_idx = image_substring_idx + len(image_substring)
+            search_from_idx = end
 
-            if i == len(extracted_text_and_url) - 1:
-                # check succeeding
-                if search_from_idx == len(text_to_search):
-                    break
-                succeeding = text_to_search[search_from_idx:]
-                new_nodes.append(TextNode(succeeding, TextType.NORMAL))
+        if search_from_idx == 0:
+            new_nodes.append(node)
+        elif search_from_idx < len(node_text):
+            # check succeeding
+            new_nodes.append(TextNode(node_text[search_from_idx:], TextType.NORMAL))
 
     return new_nodes
 
 
+def emphasis_text_type(bold: bool, italic: bool, opened: TextType) -> TextType:
+    # A TextNode has a single type, the span opened last wins while both are
+    # open and the other one takes over again once it closes
+    if bold and italic:
+        return opened
+    if bold:
+        return TextType.BOLD
+    return TextType.ITALIC if italic else TextType.NORMAL
+
+
+@timed()
 def text_to_text_nodes(text) -> List["TextNode"]:
-    nodes = [TextNode(text, TextType.NORMAL)]
-    nodes = split_nodes_delimiter(nodes, "`", TextType.CODE)
-    nodes = split_nodes_delimiter(nodes, "*", TextType.ITALIC)
-    nodes = split_nodes_delimiter(nodes, "**", TextType.BOLD)
-    nodes = split_nodes_image(nodes)
-    nodes = split_nodes_link(nodes)
+    # Single left-to-right scan: jump between the characters that can start
+    # inline markup and emit a node whenever a span closes. Bold and italic are
+    # toggles, so a bold span inside an italic one comes out as italic, bold,
+    # italic just like splitting italic first and bold second, and an italic
+    # span inside a bold one as bold, italic, bold.
+    nodes = []
+    bold = italic = False
+    text_type = TextType.NORMAL
+    segment_start = 0
+    position = 0
+    search = INLINE_TOKEN_PATTERN.search
+
+    while match := search(text, position):
+        token = match.group()
+        start, end = match.span()
+
+        if token == "`":
+            closing_idx = text.find("`", end)
+            if closing_idx == -1:
+                position = end
+                continue
+            if start > segment_start:
+                nodes.append(TextNode(text[segment_start:start], text_type))
+            if closing_idx > end:
+                nodes.append(TextNode(text[end:closing_idx], TextType.CODE))
+            segment_start = position = closing_idx + 1
+        elif token == "**" or token == "*":
+            if token == "**":
+                if not bold and text.find("**", end) == -1:
+                    position = end
+                    continue
+                bold = not bold
+                opened = TextType.BOLD
+            else:
+                if not italic and find_single_star(text, end) == -1:
+                    position = end
+                    continue
+                italic = not italic
+                opened = TextType.ITALIC
+            if start > segment_start:
+                nodes.append(TextNode(text[segment_start:start], text_type))
+            text_type = emphasis_text_type(bold, italic, opened)
+            segment_start = position = end
+        else:
+            # Images and links are only recognised outside of emphasis
+            is_image = token == "!["
+            link_match = None
+            if text_type == TextType.NORMAL:
+                pattern = IMAGE_PATTERN if is_image else LINK_PATTERN
+                link_match = pattern.match(text, start)
+            if link_match is None:
+                position = start + 1
+                continue
+            if start > segment_start:
+                nodes.append(TextNode(text[segment_start:start], text_type))
+            link_text, url = link_match.groups()
+            link_type = TextType.IMAGE if is_image else TextType.LINK
+            nodes.append(TextNode(link_text, link_type, url))
+            segment_start = position = link_match.end()
+
+    if len(text) > segment_start:
+        nodes.append(TextNode(text[segment_start:], text_type))
+    if not nodes:
+        # Empty text, or only empty spans, is still one node so the block that
+        # holds it has a child
+        nodes.append(TextNode("", TextType.NORMAL))
     return nodes
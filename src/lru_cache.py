@@ -0,0 +1,79 @@
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Tuple
+
+
+# A bounded least recently used cache, safe to share between threads. Callers
+# that need invalidation put the version of the source (its mtime, its hash)
+# in the key, stale entries are never hit again and fall off the end. With
+# size_of, maxsize bounds the total size of the entries instead of their count.
+class LRUCache:
+
+    def __init__(
+        self,
+        maxsize: int = 128,
+        size_of: Callable[[Hashable, Any], int] | None = None,
+    ):
+        if maxsize < 1:
+            raise ValueError("maxsize must be at least 1")
+        self.maxsize = maxsize
+        self.size_of = size_of
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        # Every value is kept with its size so eviction doesn't measure it again
+        self.__entries: OrderedDict[Hashable, Tuple[Any, int]] = OrderedDict()
+        self.__lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self.__lock:
+            if key not in self.__entries:
+                self.misses += 1
+                return default
+            self.hits += 1
+            self.__entries.move_to_end(key)
+            return self.__entries[key][0]
+
+    def put(self, key: Hashable, value: Any) -> None:
+        size = self.size_of(key, value) if self.size_of is not None else 1
+        with self.__lock:
+            if key in self.__entries:
+                self.size -= self.__entries.pop(key)[1]
+            if size > self.maxsize:
+                # Would push out everything else and then itself
+                return
+            self.__entries[key] = (value, size)
+            self.size += size
+            while self.size > self.maxsize:
+                self.size -= self.__entries.popitem(last=False)[1][1]
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        with self.__lock:
+            if key not in self.__entries:
+                return default
+            value, size = self.__entries.pop(key)
+            self.size -= size
+            return value
+
+    def clear(self) -> None:
+        with self.__lock:
+            self.__entries.clear()
+            self.size = 0
+
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self.__lock:
+            return key in self.__entries
+
+    def __len__(self) -> int:
+        with self.__lock:
+            return len(self.__entries)
+
+    def __repr__(self):
+        return (
+            f"LRUCache(maxsize={self.maxsize}, size={self.size}, "
+            f"hits={self.hits}, misses={self.misses})"
+        )
@@ -1,40 +1,265 @@
+import argparse
+import cProfile
 import os
 import shutil
+import sys
+import time
 from typing import List
 
-from markdown_util import generate_pages_recursive
+from ast_cache import AstCache
+from build_manifest import BuildManifest
+from compress import CompressManifest, compressed_copies, precompress
+from fingerprint import ASSET_MANIFEST_NAME, AssetManifest
+from markdown_util import cache_summary, generate_pages_recursive
+from profiler import build_report, format_report, profiler, write_report
+from search_index import SEARCH_DIR_NAME, SearchIndex
+from server import serve
+from site_index import SiteIndex
+from static_util import DEFAULT_COPY_JOBS, copy_files
+from watch import watch
 
+MANIFEST_PATH = os.path.join(".cache", "manifest.json")
+AST_CACHE_DIR = os.path.join(".cache", "ast")
+PROFILE_REPORT_PATH = os.path.join(".cache", "profile.json")
+COMPRESS_MANIFEST_PATH = os.path.join(".cache", "compress.json")
+SEARCH_INDEX_PATH = os.path.join(".cache", "search.json")
+
+
+def main(argv: List["str"] | None = None):
+    parser = argparse.ArgumentParser(description="Build the static site")
+    parser.add_argument(
+        "command",
+        nargs="?",
+        choices=["build", "watch", "serve"],
+        default="build",
+        help=(
+            "build the site once, build it and re-render whatever changes, "
+            "or serve it straight from content/ with live reload"
+        ),
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="keep public/ and only rebuild pages and assets that changed",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        help="number of processes rendering pages in parallel (0 uses every core)",
+    )
+    parser.add_argument(
+        "--copy-jobs",
+        type=int,
+        default=DEFAULT_COPY_JOBS,
+        help=(
+            "number of threads copying static files "
+            f"(0 uses the default of {DEFAULT_COPY_JOBS})"
+        ),
+    )
+    parser.add_argument(
+        "--no-ast-cache",
+        action="store_true",
+        help="parse every page again instead of reusing trees cached in .cache/ast",
+    )
+    parser.add_argument(
+        "--fingerprint",
+        action="store_true",
+        help=(
+            "copy static files under content hashed names, point pages at them "
+            f"and list them in public/{ASSET_MANIFEST_NAME}"
+        ),
+    )
+    parser.add_argument(
+        "--minify",
+        action="store_true",
+        help=(
+            "collapse whitespace, drop optional end tags and strip template "
+            "comments from every page"
+        ),
+    )
+    parser.add_argument(
+        "--site-url",
+        metavar="URL",
+        help="write public/sitemap.xml with page URLs under URL",
+    )
+    parser.add_argument(
+        "--search",
+        action="store_true",
+        help=f"write a search index sharded by term prefix to public/{SEARCH_DIR_NAME}",
+    )
+    parser.add_argument(
+        "--compress",
+        action="store_true",
+        help=(
+            "write .gz copies of every text output next to it, and .br copies "
+            "when the brotli module is installed"
+        ),
+    )
+    parser.add_argument(
+        "--poll",
+        action="store_true",
+        help="watch by polling file mtimes instead of using inotify",
+    )
+    parser.add_argument(
+        "--host", default="127.0.0.1", help="address the dev server listens on"
+    )
+    parser.add_argument(
+        "--port", type=int, default=8888, help="port the dev server listens on"
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="time every build stage and page and write a JSON report",
+    )
+    parser.add_argument(
+        "--profile-report",
+        default=PROFILE_REPORT_PATH,
+        help=f"where --profile writes its report (default {PROFILE_REPORT_PATH})",
+    )
+    parser.add_argument(
+        "--slowest",
+        type=int,
+        default=10,
+        help="number of slowest pages --profile prints",
+    )
+    parser.add_argument(
+        "--cprofile",
+        metavar="PATH",
+        help="dump cProfile stats of the build to PATH, readable with pstats",
+    )
+    args = parser.parse_args(argv)
+    jobs = args.jobs if args.jobs > 0 else os.cpu_count() or 1
+    copy_jobs = args.copy_jobs if args.copy_jobs > 0 else DEFAULT_COPY_JOBS
 
-def main():
     static_dir_path = os.path.join("static")
     public_dir_path = os.path.join("public")
 
-    if os.path.exists(public_dir_path):
-        print("Deleting public dir")
-        shutil.rmtree(public_dir_path)
+    template_path = os.path.join("template.html")
+    content_path = os.path.join("content")
 
-    os.mkdir(public_dir_path)
-    print("Created public dir")
+    if args.command == "watch":
+        watch(content_path, static_dir_path, template_path, public_dir_path, args.poll)
+        return 0
+    if args.command == "serve":
+        serve(
+            content_path,
+            static_dir_path,
+            template_path,
+            args.host,
+            args.port,
+            args.poll,
+        )
+        return 0
 
-    copy_files(static_dir_path, public_dir_path, os.listdir(static_dir_path))
+    profiler.enabled = args.profile
+    cprofile = cProfile.Profile() if args.cprofile else None
+    if cprofile is not None:
+        if jobs > 1:
+            print("cProfile only sees the main process, use -j 1 to include pages")
+        cprofile.enable()
+    start = time.perf_counter()
 
-    template_path = os.path.join("template.html")
-    content_path = os.path.join("content")
-    generate_pages_recursive(content_path, template_path, public_dir_path)
+    if args.incremental:
+        manifest = BuildManifest.load(MANIFEST_PATH)
+    else:
+        manifest = BuildManifest(MANIFEST_PATH)
+        if os.path.exists(public_dir_path):
+            print("Deleting public dir")
+            shutil.rmtree(public_dir_path)
+
+    if not os.path.exists(public_dir_path):
+        os.mkdir(public_dir_path)
+        print("Created public dir")
+
+    # One walk of content/ and static/, every stage below works from it
+    index = SiteIndex.scan(content_path, static_dir_path, public_dir_path)
+    assets = None
+    if args.fingerprint:
+        assets = AssetManifest(
+            os.path.join(public_dir_path, ASSET_MANIFEST_NAME), public_dir_path
+        )
+    copy_stats = copy_files(
+        static_dir_path, public_dir_path, manifest, copy_jobs, index, assets
+    )
+    print(copy_stats.summary())
+    if assets is not None:
+        assets.save()
+        # Recorded as its own output so a build without --fingerprint prunes it
+        manifest.record(assets.path, assets.path)
+
+    ast_cache = None if args.no_ast_cache else AstCache(AST_CACHE_DIR)
+    search_index = None
+    if args.search:
+        if args.incremental:
+            search_index = SearchIndex.load(SEARCH_INDEX_PATH)
+        else:
+            search_index = SearchIndex(SEARCH_INDEX_PATH)
+    results = generate_pages_recursive(
+        content_path,
+        template_path,
+        public_dir_path,
+        manifest,
+        jobs,
+        ast_cache,
+        index,
+        assets,
+        args.minify,
+        args.site_url,
+        search_index,
+    )
+    for line in cache_summary(results):
+        print(line)
+    if ast_cache is not None:
+        evicted = ast_cache.evict()
+        if evicted:
+            print(f"Evicted {len(evicted)} pages from the AST cache")
+
+    compress_manifest = None
+    if args.compress:
+        if args.incremental:
+            compress_manifest = CompressManifest.load(COMPRESS_MANIFEST_PATH)
+        else:
+            compress_manifest = CompressManifest(COMPRESS_MANIFEST_PATH)
+        # The copies of outputs still there are kept, the rest are pruned with
+        # their outputs. Without --compress every copy is pruned.
+        for path in compressed_copies(compress_manifest.previous, manifest.outputs()):
+            manifest.record(path, path)
+
+    for removed_path in manifest.prune(public_dir_path):
+        print("Removed", removed_path)
+    if search_index is not None:
+        search_index.save()
+
+    if compress_manifest is not None:
+        compress_stats = precompress(public_dir_path, compress_manifest, jobs)
+        print(compress_stats.summary())
+        compress_manifest.save()
+        for path in compressed_copies(compress_manifest.current):
+            manifest.record(path, path)
+    manifest.save()
 
+    wall_seconds = time.perf_counter() - start
+    if cprofile is not None:
+        cprofile.disable()
+        cprofile.dump_stats(args.cprofile)
+        print("Wrote cProfile stats to", args.cprofile)
+    if args.profile:
+        report = build_report(profiler.snapshot(), results, wall_seconds, jobs)
+        for line in format_report(report, args.slowest):
+            print(line)
+        write_report(args.profile_report, report)
+        print("Wrote profile report to", args.profile_report)
 
-def copy_files(curr_src_path: str, curr_dest_path: str, items: List["str"]) -> None:
-    for item in items:
-        new_src_path = os.path.join(curr_src_path, item)
-        new_dest_path = os.path.join(curr_dest_path, item)
-        if os.path.isfile(new_src_path):
-            shutil.copy(new_src_path, new_dest_path)
-            print("Copied", item, "to", new_dest_path)
-            continue
-        os.mkdir(new_dest_path)
-        print("Created directory", new_dest_path)
-        copy_files(new_src_path, new_dest_path, os.listdir(new_src_path))
+    failures = [result for result in results if result.error is not None]
+    if failures:
+        print(f"Failed to generate {len(failures)} of {len(results)} pages:")
+        for failure in failures:
+            print(" ", failure.src_path)
+        return 1
+    return 0
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
@@ -1,7 +1,71 @@
+import io
 import os
 import re
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import suppress
+from itertools import chain, repeat
+from typing import Dict, Iterable, List, NamedTuple, TextIO, Tuple
 
-from htmlnode import markdown_to_html_node
+from ast_cache import AstCache
+from build_manifest import BuildManifest
+from fingerprint import AssetManifest
+from htmlnode import (
+    HTMLNode,
+    ParentNode,
+    block_cache,
+    inline_cache,
+    iter_block_html_nodes,
+    markdown_to_html_node,
+)
+from profiler import StageCounts, profiler, timed
+from search_index import SearchIndex, count_terms, iter_counting_terms, page_url
+from site_index import SiteFile, SiteIndex, collect_pages
+from sitemap import write_sitemap
+from template import Template
+
+
+class PageResult(NamedTuple):
+    src_path: str
+    dest_path: str
+    error: str | None = None
+    # Cache name to (hits, misses) while this page was generated, collected here
+    # because pool workers each count in their own copy of the caches
+    cache_counts: Dict[str, Tuple[int, int]] | None = None
+    # Filled in only when profiling
+    seconds: float = 0.0
+    stage_counts: StageCounts | None = None
+    # Filled in only when building the search index
+    title: str | None = None
+    terms: Dict[str, int] | None = None
+
+
+def read_cache_counts(ast_cache: AstCache | None = None) -> Dict[str, Tuple[int, int]]:
+    counts = {
+        "Block": (block_cache.hits, block_cache.misses),
+        "Inline": (inline_cache.hits, inline_cache.misses),
+    }
+    if ast_cache is not None:
+        counts["AST"] = (ast_cache.hits, ast_cache.misses)
+    return counts
+
+
+def cache_summary(results: Iterable[PageResult]) -> List[str]:
+    totals: Dict[str, Tuple[int, int]] = {}
+    for result in results:
+        for name, (hits, misses) in (result.cache_counts or {}).items():
+            total_hits, total_misses = totals.get(name, (0, 0))
+            totals[name] = (total_hits + hits, total_misses + misses)
+
+    lines = []
+    for name, (hits, misses) in totals.items():
+        lookups = hits + misses
+        rate = hits / lookups * 100 if lookups else 0.0
+        lines.append(
+            f"{name} cache: {hits} hits, {misses} misses ({rate:.1f}% hit rate)"
+        )
+    return lines
 
 
 def extract_title(markdown: str) -> str:
@@ -11,36 +75,265 @@ def extract_title(markdown: str) -> str:
     return matches[0].replace("# ", "", 1).strip().strip("\n")
 
 
-def generate_page(from_path: str, template_path: str, dest_path: str):
-    markdown_content = ""
+@timed()
+def generate_page(
+    from_path: str,
+    template: Template,
+    dest_path: str,
+    ast_cache: AstCache | None = None,
+    terms: Counter | None = None,
+) -> str:
+    # Returns the title, and counts the words of the page into terms if given.
+    # Pages too big for the AST cache are streamed like without one.
+    if (
+        ast_cache is not None
+        and os.path.getsize(from_path) <= ast_cache.max_source_bytes
+    ):
+        title, html_node = parse_page(from_path, ast_cache)
+        if terms is not None:
+            count_terms(html_node, terms)
+        write_page(template, dest_path, title, html_node)
+        return title
+
     with open(from_path) as markdown_file:
-        markdown_content = markdown_file.read()
+        # The title has to be on the first line, read it before streaming the
+        # rest so the page body is parsed and written one block at a time
+        first_line = markdown_file.readline()
+        title = extract_title(first_line)
+        lines = chain([first_line], markdown_file)
+        blocks = iter_block_html_nodes(lines)
+        if terms is not None:
+            blocks = iter_counting_terms(blocks, terms)
+        html_node = ParentNode("div", blocks)
+        write_page(template, dest_path, title, html_node)
+        return title
+
+
+@timed()
+def parse_page(
+    from_path: str, ast_cache: AstCache | None = None
+) -> Tuple[str, HTMLNode]:
+    if ast_cache is None:
+        with open(from_path) as markdown_file:
+            return parse_markdown(markdown_file)
+
+    with open(from_path, "rb") as markdown_file:
+        if os.fstat(markdown_file.fileno()).st_size > ast_cache.max_source_bytes:
+            # Parsed from the stream and not cached, see generate_page
+            with io.TextIOWrapper(markdown_file) as text_file:
+                return parse_markdown(text_file)
+        source = markdown_file.read()
+    key = ast_cache.key(source)
+    page = ast_cache.get(key)
+    if page is None:
+        # Decode the way open() does so a cached tree matches a parsed one
+        page = parse_markdown(io.TextIOWrapper(io.BytesIO(source)))
+        ast_cache.put(key, *page)
+    return page
 
-    template_content = ""
-    with open(template_path) as template_file:
-        template_content = template_file.read()
 
-    html_content = markdown_to_html_node(markdown_content).to_html()
-    title = extract_title(markdown_content)
-    page = template_content.replace("{{ Title }}", title)
-    page = page.replace("{{ Content }}", html_content)
+def parse_markdown(markdown_file: TextIO) -> Tuple[str, ParentNode]:
+    first_line = markdown_file.readline()
+    title = extract_title(first_line)
+    return title, markdown_to_html_node(chain([first_line], markdown_file))
 
+
+@timed()
+def write_page(template: Template, dest_path: str, title: str, content: HTMLNode):
     dirname = os.path.dirname(dest_path)
-    if not os.path.exists(dirname):
-        os.makedirs(dirname)
+    if dirname and not os.path.exists(dirname):
+        os.makedirs(dirname, exist_ok=True)
 
-    with open(dest_path, "w") as new_page:
-        new_page.write(page)
+    # Stream straight to disk, then swap the finished page in so a page that
+    # fails halfway never replaces the previous version
+    tmp_path = f"{dest_path}.tmp"
+    try:
+        with open(tmp_path, "w") as new_page:
+            template.write(new_page, Title=title, Content=content)
+    except BaseException:
+        # open() itself may have failed before creating it
+        with suppress(FileNotFoundError):
+            os.remove(tmp_path)
+        raise
+    os.replace(tmp_path, dest_path)
 
 
-def generate_pages_recursive(from_content, template_path, dest_path):
-    for path in os.listdir(from_content):
-        new_src_path = os.path.join(from_content, path)
-        new_dest_path = os.path.join(dest_path, path)
-        if os.path.isfile(new_src_path):
-            if str(path).endswith(".md"):
-                generate_page(
-                    new_src_path, template_path, new_dest_path.replace(".md", ".html")
-                )
+def try_generate_page(
+    from_path: str,
+    template: Template,
+    dest_path: str,
+    ast_cache: AstCache | None = None,
+    profile: bool = False,
+    search: bool = False,
+):
+    # Runs inside pool workers, so errors are returned instead of raised to keep
+    # one broken page from aborting the rest of the build
+    profiler.enabled = profile
+    before = read_cache_counts(ast_cache)
+    stages_before = profiler.snapshot() if profile else {}
+    start = time.perf_counter()
+    error = title = None
+    terms = Counter() if search else None
+    try:
+        title = generate_page(from_path, template, dest_path, ast_cache, terms)
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+    counts = {
+        name: (hits - before[name][0], misses - before[name][1])
+        for name, (hits, misses) in read_cache_counts(ast_cache).items()
+    }
+    seconds, stage_counts = 0.0, None
+    if profile:
+        seconds = time.perf_counter() - start
+        stage_counts = profiler.since(stages_before)
+    return PageResult(
+        from_path,
+        dest_path,
+        error,
+        counts,
+        seconds,
+        stage_counts,
+        title,
+        dict(terms) if terms is not None else None,
+    )
+
+
+@timed()
+def generate_pages_recursive(
+    from_content,
+    template_path,
+    dest_path,
+    manifest: BuildManifest | None = None,
+    jobs: int = 1,
+    ast_cache: AstCache | None = None,
+    index: SiteIndex | None = None,
+    assets: AssetManifest | None = None,
+    minify: bool = False,
+    site_url: str | None = None,
+    search_index: SearchIndex | None = None,
+) -> List["PageResult"]:
+    # With a site index its pages are rendered, and from_content and dest_path
+    # are only walked when there is none. With an asset manifest, asset URLs
+    # point to the fingerprinted copies and the manifest is a dependency of
+    # every page, a changed asset gives every page that may link it a new URL.
+    # A site_url adds sitemap.xml, a search index adds its shards.
+    dependencies = [template_path]
+    if assets is not None:
+        dependencies.append(assets.path)
+    template = Template.load(
+        template_path,
+        asset_urls=assets.urls if assets is not None else None,
+        minify=minify,
+    )
+    if index is not None:
+        site_pages = index.pages
+    else:
+        site_pages = collect_pages(from_content, dest_path)
+    pages = site_pages
+    if manifest is not None:
+        pages = [
+            page
+            for page in pages
+            if manifest.is_stale(
+                page.src_path,
+                page.dest_path,
+                dependencies,
+                page.size,
+                page.mtime_ns,
+                settings="minify" if minify else "",
+            )
+            # A page missing from the search index, or indexed from an older
+            # source, is rendered to count its terms
+            or (
+                search_index is not None
+                and search_index.source_hash(page.src_path)
+                != manifest.current[page.src_path].get("source")
+            )
+        ]
+
+    results = render_pages(pages, template, jobs, ast_cache, search_index is not None)
+    for result in results:
+        if result.error is None:
+            print("Generated", result.dest_path)
             continue
-        generate_pages_recursive(new_src_path, template_path, new_dest_path)
+        print(f"Failed to generate {result.src_path}: {result.error}")
+        if manifest is not None:
+            manifest.forget(result.src_path)
+
+    # The side outputs cover every page, the ones rendered this time and the
+    # unchanged ones, from what is already in memory
+    failed = {result.src_path for result in results if result.error is not None}
+    built_pages = [page for page in site_pages if page.src_path not in failed]
+    if search_index is not None:
+        for result in results:
+            if result.error is None:
+                url = page_url(result.dest_path, dest_path)
+                source_hash = None
+                if manifest is not None:
+                    source_hash = manifest.current[result.src_path].get("source")
+                search_index.update(
+                    result.src_path, url, result.title, result.terms, source_hash
+                )
+        search_index.retain(page.src_path for page in built_pages)
+        written = search_index.write(dest_path)
+        print(
+            f"Search index: {len(search_index.pages)} pages, wrote {len(written)} "
+            f"of {len(search_index.shard_hashes)} files"
+        )
+        if manifest is not None:
+            # Recorded like the sitemap, so a build without the search index
+            # prunes its files
+            for path in search_index.paths(dest_path):
+                manifest.record(path, path)
+    if site_url is not None:
+        sitemap_pages = [
+            (page_url(page.dest_path, dest_path), page.mtime_ns) for page in built_pages
+        ]
+        for path in write_sitemap(dest_path, site_url, sitemap_pages):
+            if manifest is not None:
+                # Recorded so sitemap files that are no longer needed are pruned
+                manifest.record(path, path)
+    return results
+
+
+def render_pages(
+    pages: List[SiteFile],
+    template: Template,
+    jobs: int = 1,
+    ast_cache: AstCache | None = None,
+    search: bool = False,
+) -> List["PageResult"]:
+    if not pages:
+        return []
+    src_paths = [page.src_path for page in pages]
+    dest_paths = [page.dest_path for page in pages]
+    if jobs > 1 and len(pages) > 1:
+        chunksize = max(1, len(pages) // (jobs * 4))
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            results = list(
+                executor.map(
+                    try_generate_page,
+                    src_paths,
+                    repeat(template),
+                    dest_paths,
+                    repeat(ast_cache),
+                    repeat(profiler.enabled),
+                    repeat(search),
+                    chunksize=chunksize,
+                )
+            )
+        # The workers counted these pages in their own profiler, fold them in
+        for result in results:
+            profiler.merge(result.stage_counts or {})
+        return results
+    return list(
+        map(
+            try_generate_page,
+            src_paths,
+            repeat(template),
+            dest_paths,
+            repeat(ast_cache),
+            repeat(profiler.enabled),
+            repeat(search),
+        )
+    )
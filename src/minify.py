@@ -0,0 +1,62 @@
+import re
+
+# Elements whose text is shown as written, their whitespace is never collapsed
+PRESERVE_TAGS = frozenset(["pre", "code", "script", "style", "textarea"])
+VOID_TAGS = frozenset(["area", "br", "col", "embed", "hr", "img", "input", "link"])
+# The end of a <p> is implied by any of these starting, or by the end of its
+# parent unless the parent is one of P_KEEP_END_PARENTS, see the HTML standard's
+# "optional tags" section
+P_CLOSING_TAGS = frozenset(
+    [
+        "address", "article", "aside", "blockquote", "details", "div", "dl",
+        "fieldset", "figcaption", "figure", "footer", "form", "h1", "h2", "h3",
+        "h4", "h5", "h6", "header", "hgroup", "hr", "main", "menu", "nav", "ol",
+        "p", "pre", "section", "table", "ul",
+    ]
+)  # fmt: skip
+P_KEEP_END_PARENTS = frozenset(["a", "audio", "del", "ins", "map", "noscript", "video"])
+# Whitespace next to these tags is never rendered, the template loses it entirely
+BLOCK_TAGS = P_CLOSING_TAGS | frozenset(
+    ["body", "head", "html", "li", "link", "meta", "script", "style", "title"]
+)
+
+WHITESPACE_PATTERN = re.compile(r"\s+")
+COMMENT_PATTERN = re.compile(r"<!--(?!\[if).*?-->", re.DOTALL)
+PRESERVED_PATTERN = re.compile(
+    r"(<(pre|script|style|textarea)\b.*?</\2\s*>)", re.DOTALL | re.IGNORECASE
+)
+BLOCK_TAG_SPACE_PATTERN = re.compile(
+    r"\s*(</?(?:" + "|".join(sorted(BLOCK_TAGS)) + r")\b[^>]*>)\s*", re.IGNORECASE
+)
+
+
+def collapse_whitespace(text: str) -> str:
+    return WHITESPACE_PATTERN.sub(" ", text)
+
+
+def can_omit_end_tag(tag: str, next_tag: str | None, at_end: bool, parent: str):
+    # next_tag is the tag of the following sibling, None for text, and at_end
+    # is true when nothing follows inside parent
+    if tag == "li":
+        return at_end or next_tag == "li"
+    if tag == "p":
+        if at_end:
+            return parent not in P_KEEP_END_PARENTS
+        return next_tag in P_CLOSING_TAGS
+    return False
+
+
+def minify_template(source: str) -> str:
+    # Strips comments (but not conditional comments), drops whitespace around
+    # block level tags and collapses the rest to single spaces. Preformatted
+    # elements are copied untouched.
+    source = COMMENT_PATTERN.sub("", source)
+    parts = PRESERVED_PATTERN.split(source)
+    minified = []
+    # split() returns text, then the two groups of every preserved element
+    for i in range(0, len(parts), 3):
+        text = BLOCK_TAG_SPACE_PATTERN.sub(r"\1", parts[i])
+        minified.append(collapse_whitespace(text))
+        if i + 1 < len(parts):
+            minified.append(parts[i + 1])
+    return "".join(minified).strip()
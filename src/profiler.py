@@ -0,0 +1,191 @@
+import functools
+import inspect
+import json
+import os
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Tuple
+
+REPORT_VERSION = 1
+
+# Stage name to (calls, total seconds, self seconds). Total includes the stages
+# called from inside a stage, self doesn't, so self times add up to the build.
+StageCounts = Dict[str, Tuple[int, float, float]]
+
+
+# Collects wall time and call counts per stage. There is one per process, pool
+# workers count in their own and send the difference for each page back in its
+# PageResult. Timing is skipped entirely unless enabled.
+class Profiler:
+
+    def __init__(self):
+        self.enabled = False
+        self.stats: Dict[str, List] = {}
+        # Time spent in stages nested inside each running stage
+        self.__nested: List[float] = []
+
+    def enter(self) -> float:
+        self.__nested.append(0.0)
+        return time.perf_counter()
+
+    def exit(self, name: str, start: float, calls: int = 1) -> None:
+        elapsed = time.perf_counter() - start
+        nested = self.__nested.pop()
+        if self.__nested:
+            self.__nested[-1] += elapsed
+        entry = self.stats.setdefault(name, [0, 0.0, 0.0])
+        entry[0] += calls
+        entry[1] += elapsed
+        entry[2] += elapsed - nested
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        if not self.enabled:
+            yield
+            return
+        start = self.enter()
+        try:
+            yield
+        finally:
+            self.exit(name, start)
+
+    def iter_stage(self, name: str, iterator: Iterator) -> Iterator:
+        # A generator runs a little every time it is resumed, time each resume.
+        # Serializing a page resumes thousands of times, so the bookkeeping of
+        # enter() and exit() is inlined and the totals are stored once at the end.
+        nested = self.__nested
+        perf_counter = time.perf_counter
+        total = own = 0.0
+        try:
+            while True:
+                nested.append(0.0)
+                start = perf_counter()
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+                finally:
+                    elapsed = perf_counter() - start
+                    own += elapsed - nested.pop()
+                    total += elapsed
+                    if nested:
+                        nested[-1] += elapsed
+                yield item
+        finally:
+            entry = self.stats.setdefault(name, [0, 0.0, 0.0])
+            entry[0] += 1
+            entry[1] += total
+            entry[2] += own
+
+    def snapshot(self) -> StageCounts:
+        return {name: tuple(entry) for name, entry in self.stats.items()}
+
+    def since(self, snapshot: StageCounts) -> StageCounts:
+        counts = {}
+        for name, (calls, total, own) in self.snapshot().items():
+            before = snapshot.get(name, (0, 0.0, 0.0))
+            if calls != before[0] or total != before[1]:
+                counts[name] = (calls - before[0], total - before[1], own - before[2])
+        return counts
+
+    def merge(self, counts: StageCounts) -> None:
+        for name, (calls, total, own) in counts.items():
+            entry = self.stats.setdefault(name, [0, 0.0, 0.0])
+            entry[0] += calls
+            entry[1] += total
+            entry[2] += own
+
+    def reset(self) -> None:
+        self.stats.clear()
+
+
+profiler = Profiler()
+
+
+def timed(name: str | None = None) -> Callable:
+    # Decorator that counts a function as a stage, generator functions are
+    # timed across every resume
+    def decorate(function: Callable) -> Callable:
+        stage_name = name or function.__name__
+        if inspect.isgeneratorfunction(function):
+
+            @functools.wraps(function)
+            def timed_generator(*args, **kwargs):
+                iterator = function(*args, **kwargs)
+                if not profiler.enabled:
+                    return iterator
+                return profiler.iter_stage(stage_name, iterator)
+
+            return timed_generator
+
+        @functools.wraps(function)
+        def timed_function(*args, **kwargs):
+            if not profiler.enabled:
+                return function(*args, **kwargs)
+            start = profiler.enter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                profiler.exit(stage_name, start)
+
+        return timed_function
+
+    return decorate
+
+
+def build_report(
+    stats: StageCounts, results: Iterable[Any], wall_seconds: float, jobs: int
+) -> Dict[str, Any]:
+    # results are PageResults, read by attribute to keep this module free of
+    # the page generation imports
+    pages = sorted(results, key=lambda result: result.seconds, reverse=True)
+    return {
+        "version": REPORT_VERSION,
+        "wall_seconds": wall_seconds,
+        "jobs": jobs,
+        "stages": {
+            name: {"calls": calls, "seconds": total, "self_seconds": own}
+            for name, (calls, total, own) in sorted(
+                stats.items(), key=lambda item: item[1][2], reverse=True
+            )
+        },
+        "pages": [
+            {
+                "src": page.src_path,
+                "dest": page.dest_path,
+                "seconds": page.seconds,
+                "error": page.error,
+                "stages": {
+                    name: {"calls": calls, "seconds": total, "self_seconds": own}
+                    for name, (calls, total, own) in (page.stage_counts or {}).items()
+                },
+            }
+            for page in pages
+        ],
+    }
+
+
+def format_report(report: Dict[str, Any], slowest: int = 10) -> List[str]:
+    lines = [
+        f"Profile: {report['wall_seconds']:.3f}s wall, {report['jobs']} jobs "
+        "(stage times are summed over every process)",
+        f"  {'stage':<28}{'calls':>10}{'total s':>12}{'self s':>12}",
+    ]
+    for name, stage in report["stages"].items():
+        lines.append(
+            f"  {name:<28}{stage['calls']:>10}"
+            f"{stage['seconds']:>12.3f}{stage['self_seconds']:>12.3f}"
+        )
+    if report["pages"] and slowest > 0:
+        lines.append(f"Slowest {min(slowest, len(report['pages']))} pages:")
+        for page in report["pages"][:slowest]:
+            lines.append(f"  {page['seconds']:>8.3f}s  {page['src']}")
+    return lines
+
+
+def write_report(path: str, report: Dict[str, Any]) -> None:
+    dirname = os.path.dirname(path)
+    if dirname:
+        os.makedirs(dirname, exist_ok=True)
+    with open(path, "w") as report_file:
+        json.dump(report, report_file, indent=2)
@@ -0,0 +1,192 @@
+import hashlib
+import json
+import os
+import re
+from collections import Counter
+from typing import Dict, Iterable, Iterator, List
+
+from htmlnode import HTMLNode, ParentNode
+from profiler import timed
+
+SEARCH_INDEX_VERSION = 1
+SEARCH_DIR_NAME = "search"
+PAGES_FILE_NAME = "pages.json"
+# Terms are sharded by their first characters, a browser looking up a word
+# loads pages.json and the one shard for it
+PREFIX_LENGTH = 2
+MIN_TERM_LENGTH = 2
+TERM_PATTERN = re.compile(r"\w+")
+# Code blocks are mostly identifiers and punctuation, they're left out
+SKIPPED_TAGS = frozenset(["pre"])
+JSON_SEPARATORS = (",", ":")
+
+
+def tokenize(text: str) -> Iterator[str]:
+    for term in TERM_PATTERN.findall(text.lower()):
+        if len(term) >= MIN_TERM_LENGTH:
+            yield term
+
+
+def count_terms(node: HTMLNode, counts: Counter) -> None:
+    # Counts the words of every text leaf under node, walking with a stack like
+    # the serializer so deep trees can't hit the recursion limit
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        if node.tag in SKIPPED_TAGS:
+            continue
+        if isinstance(node, ParentNode):
+            stack.extend(node.children)
+        elif node.value:
+            counts.update(tokenize(node.value))
+
+
+def iter_counting_terms(nodes: Iterable[HTMLNode], counts: Counter) -> Iterator:
+    # For pages streamed one block at a time, counts each block as it passes
+    for node in nodes:
+        count_terms(node, counts)
+        yield node
+
+
+def page_url(dest_path: str, public_dir: str) -> str:
+    url = "/" + os.path.relpath(dest_path, public_dir).replace(os.sep, "/")
+    if url == "/index.html" or url.endswith("/index.html"):
+        return url[: -len("index.html")]
+    return url
+
+
+def shard_name(term: str) -> str:
+    return term[:PREFIX_LENGTH]
+
+
+# Term to page postings for a client side search, written under public/search/.
+# Every page keeps the id it was given, and its title, URL and term counts are
+# kept in .cache, so a build only counts the pages it renders and only rewrites
+# the shards whose postings changed.
+class SearchIndex:
+
+    def __init__(self, path: str, data: Dict | None = None):
+        self.path = path
+        data = data or {}
+        # Source path to {"id", "url", "title", "terms", "source"}
+        self.pages: Dict[str, Dict] = data.get("pages", {})
+        self.shard_hashes: Dict[str, str] = data.get("shards", {})
+        self.next_id: int = data.get("next_id", 0)
+
+    @classmethod
+    def load(cls, path: str) -> "SearchIndex":
+        if not os.path.exists(path):
+            return cls(path)
+        with open(path) as index_file:
+            data = json.load(index_file)
+        if data.get("version") != SEARCH_INDEX_VERSION:
+            return cls(path)
+        return cls(path, data)
+
+    def save(self) -> None:
+        dirname = os.path.dirname(self.path)
+        if dirname and not os.path.exists(dirname):
+            os.makedirs(dirname)
+        with open(self.path, "w") as index_file:
+            json.dump(
+                {
+                    "version": SEARCH_INDEX_VERSION,
+                    "next_id": self.next_id,
+                    "pages": self.pages,
+                    "shards": self.shard_hashes,
+                },
+                index_file,
+                separators=JSON_SEPARATORS,
+                sort_keys=True,
+            )
+
+    def update(
+        self,
+        src_path: str,
+        url: str,
+        title: str,
+        terms: Dict[str, int],
+        source_hash: str | None = None,
+    ) -> None:
+        # source_hash is the hash of the source the terms were counted from, a
+        # build that changed the page without the index leaves it behind
+        previous = self.pages.get(src_path)
+        if previous is not None:
+            page_id = previous["id"]
+        else:
+            page_id = self.next_id
+            self.next_id += 1
+        self.pages[src_path] = {
+            "id": page_id,
+            "url": url,
+            "title": title,
+            "terms": terms,
+            "source": source_hash,
+        }
+
+    def source_hash(self, src_path: str) -> str | None:
+        # None for a page that isn't indexed
+        page = self.pages.get(src_path)
+        return page.get("source") if page is not None else None
+
+    def retain(self, src_paths: Iterable[str]) -> None:
+        # Drops the pages that are gone or failed to build
+        keep = set(src_paths)
+        for src_path in list(self.pages):
+            if src_path not in keep:
+                del self.pages[src_path]
+        if len(self.pages) * 2 < self.next_id:
+            # Removed pages leave holes in pages.json, renumber once they are
+            # most of it. Every shard changes and is written again.
+            for page_id, src_path in enumerate(sorted(self.pages)):
+                self.pages[src_path]["id"] = page_id
+            self.next_id = len(self.pages)
+
+    def shards(self) -> Dict[str, Dict[str, List[List[int]]]]:
+        shards: Dict[str, Dict[str, List[List[int]]]] = {}
+        for page in sorted(self.pages.values(), key=lambda page: page["id"]):
+            for term, count in page["terms"].items():
+                postings = shards.setdefault(shard_name(term), {})
+                postings.setdefault(term, []).append([page["id"], count])
+        return shards
+
+    def paths(self, public_dir: str) -> List[str]:
+        # Every file of the last write, the unchanged ones too
+        search_dir = os.path.join(public_dir, SEARCH_DIR_NAME)
+        return [os.path.join(search_dir, name) for name in sorted(self.shard_hashes)]
+
+    @timed("search_index")
+    def write(self, public_dir: str) -> List[str]:
+        # Returns the files written, shards that didn't change are skipped
+        search_dir = os.path.join(public_dir, SEARCH_DIR_NAME)
+        os.makedirs(search_dir, exist_ok=True)
+        titles: List[List[str] | None] = [None] * self.next_id
+        for page in self.pages.values():
+            titles[page["id"]] = [page["url"], page["title"]]
+        files = {
+            PAGES_FILE_NAME: {"prefix_length": PREFIX_LENGTH, "pages": titles},
+        }
+        for name, postings in self.shards().items():
+            files[f"{name}.json"] = postings
+
+        written = []
+        for name, content in files.items():
+            data = json.dumps(
+                content, separators=JSON_SEPARATORS, sort_keys=True, ensure_ascii=False
+            ).encode()
+            digest = hashlib.sha256(data).hexdigest()
+            path = os.path.join(search_dir, name)
+            if self.shard_hashes.get(name) == digest and os.path.exists(path):
+                continue
+            with open(path, "wb") as shard_file:
+                shard_file.write(data)
+            self.shard_hashes[name] = digest
+            written.append(path)
+
+        for name in list(self.shard_hashes):
+            if name not in files:
+                del self.shard_hashes[name]
+                path = os.path.join(search_dir, name)
+                if os.path.exists(path):
+                    os.remove(path)
+        return written
@@ -0,0 +1,325 @@
+import asyncio
+import html
+import mimetypes
+import os
+import threading
+from http import HTTPStatus
+from typing import Dict, Iterable, Set, Tuple
+from urllib.parse import urlsplit
+
+from site_renderer import PAGE_CACHE_SIZE, Site, resolve_path
+from template import Template
+from watch import create_watcher
+
+RELOAD_PATH = "/__reload"
+RELOAD_SCRIPT = (
+    "<script>"
+    f'new EventSource("{RELOAD_PATH}").onmessage = () => location.reload();'
+    "</script>"
+)
+# Browsers drop an idle event stream eventually, a comment line keeps it open
+# and tells the server which clients have gone away
+KEEPALIVE_SECONDS = 15
+MAX_HEADERS = 100
+
+
+class BadRequest(Exception):
+    pass
+
+
+def inject_reload_script(page: str) -> str:
+    index = page.rfind("</body>")
+    if index == -1:
+        return page + RELOAD_SCRIPT
+    return page[:index] + RELOAD_SCRIPT + page[index:]
+
+
+async def read_request(
+    reader: asyncio.StreamReader,
+) -> Tuple[str, str, str, Dict[str, str]] | None:
+    request_line = await reader.readline()
+    if not request_line:
+        return None
+    parts = request_line.decode("latin-1").split()
+    if len(parts) != 3:
+        raise BadRequest(f"Malformed request line {request_line!r}")
+    method, target, version = parts
+
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            return method, target, version, headers
+        if len(headers) >= MAX_HEADERS:
+            raise BadRequest("Too many headers")
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+
+
+# Serves the site straight from content/ and static/ without building public/.
+# Pages are rendered on request in worker threads by a shared Site, so an edit is
+# picked up on the next request, and every open tab is told to reload through a
+# server-sent event stream.
+class DevServer:
+
+    def __init__(
+        self,
+        content_dir: str,
+        static_dir: str,
+        template_path: str,
+        host: str = "127.0.0.1",
+        port: int = 8888,
+        polling: bool = False,
+        cache_size: int = PAGE_CACHE_SIZE,
+    ):
+        self.content_dir = os.path.normpath(content_dir)
+        self.static_dir = os.path.normpath(static_dir)
+        self.template_path = os.path.normpath(template_path)
+        self.host = host
+        self.port = port
+        self.polling = polling
+        self.site = Site(self.content_dir, self.template_path, cache_size)
+        self.server: asyncio.Server | None = None
+        self.reload_queues: Set[asyncio.Queue] = set()
+        self.connections: Dict[asyncio.Task, asyncio.StreamWriter] = {}
+        self.__stop_watching = threading.Event()
+        self.__watch_thread: threading.Thread | None = None
+
+    @property
+    def pages(self):
+        return self.site.pages
+
+    def load_template(self) -> Tuple[int, Template]:
+        return self.site.load_template()
+
+    def render_page(self, src_path: str) -> bytes:
+        # Called from worker threads
+        return inject_reload_script(self.site.render_page(src_path)).encode()
+
+    def find_page(self, url_path: str) -> str | None:
+        return self.site.find_page(url_path)
+
+    def find_static_file(self, url_path: str) -> str | None:
+        path = resolve_path(self.static_dir, url_path)
+        return path if path is not None and os.path.isfile(path) else None
+
+    def is_page_directory(self, url_path: str) -> bool:
+        return self.site.is_page_directory(url_path)
+
+    async def start(self) -> None:
+        self.server = await asyncio.start_server(
+            self.handle_connection, self.host, self.port
+        )
+        self.port = self.server.sockets[0].getsockname()[1]
+        self.__stop_watching.clear()
+        self.__watch_thread = threading.Thread(
+            target=self.watch_changes, args=(asyncio.get_running_loop(),), daemon=True
+        )
+        self.__watch_thread.start()
+
+    async def stop(self) -> None:
+        self.__stop_watching.set()
+        if self.server is not None:
+            self.server.close()
+        # Event streams and idle keep-alive connections never end on their own
+        for queue in self.reload_queues:
+            queue.put_nowait(None)
+        for writer in self.connections.values():
+            writer.close()
+        await asyncio.gather(*self.connections, return_exceptions=True)
+        if self.server is not None:
+            await self.server.wait_closed()
+        if self.__watch_thread is not None:
+            await asyncio.to_thread(self.__watch_thread.join)
+
+    async def serve_forever(self) -> None:
+        await self.start()
+        print(f"Serving on http://{self.host}:{self.port}/, Ctrl+C to stop")
+        try:
+            # Not Server.serve_forever, whose cleanup waits for every connection
+            # to close and an open event stream never does
+            await asyncio.get_running_loop().create_future()
+        finally:
+            await self.stop()
+
+    def watch_changes(self, loop: asyncio.AbstractEventLoop) -> None:
+        # Runs in its own thread, both watchers block while they wait
+        paths = [self.content_dir, self.static_dir, self.template_path]
+        watcher = create_watcher(paths, self.polling)
+        try:
+            while not self.__stop_watching.is_set():
+                changed, removed = watcher.wait(timeout=0.5)
+                if changed or removed:
+                    loop.call_soon_threadsafe(self.notify_reload, changed | removed)
+        finally:
+            watcher.close()
+
+    def notify_reload(self, paths: Set[str]) -> None:
+        for path in sorted(paths):
+            print("Changed", path)
+        if self.reload_queues:
+            print(f"Reloading {len(self.reload_queues)} clients")
+        for queue in self.reload_queues:
+            queue.put_nowait(paths)
+
+    async def handle_connection(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        connection = asyncio.current_task()
+        self.connections[connection] = writer
+        try:
+            while True:
+                try:
+                    request = await read_request(reader)
+                except (BadRequest, ValueError):
+                    await self.send(writer, HTTPStatus.BAD_REQUEST, keep_alive=False)
+                    return
+                if request is None:
+                    return
+                method, target, version, headers = request
+                keep_alive = (
+                    version == "HTTP/1.1"
+                    and headers.get("connection", "").lower() != "close"
+                )
+                if not await self.respond(writer, method, target, keep_alive):
+                    return
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self.connections.pop(connection, None)
+            writer.close()
+
+    async def respond(
+        self, writer: asyncio.StreamWriter, method: str, target: str, keep_alive: bool
+    ) -> bool:
+        # Returns whether the connection can take another request
+        if method not in ("GET", "HEAD"):
+            await self.send(
+                writer, HTTPStatus.METHOD_NOT_ALLOWED, keep_alive=keep_alive
+            )
+            return keep_alive
+        head = method == "HEAD"
+        url_path = urlsplit(target).path
+        loop = asyncio.get_running_loop()
+
+        if url_path == RELOAD_PATH:
+            await self.stream_reloads(writer)
+            return False
+
+        static_path = self.find_static_file(url_path)
+        if static_path is not None:
+            body = await loop.run_in_executor(None, read_bytes, static_path)
+            content_type = mimetypes.guess_type(static_path)[0]
+            await self.send(
+                writer,
+                HTTPStatus.OK,
+                body,
+                content_type or "application/octet-stream",
+                keep_alive,
+                head,
+            )
+            return keep_alive
+
+        page_path = self.find_page(url_path)
+        if page_path is not None:
+            try:
+                body = await loop.run_in_executor(None, self.render_page, page_path)
+                status = HTTPStatus.OK
+            except Exception as e:
+                print(f"Failed to generate {page_path}: {type(e).__name__}: {e}")
+                body = error_page(page_path, e)
+                status = HTTPStatus.INTERNAL_SERVER_ERROR
+            await self.send(
+                writer, status, body, "text/html; charset=utf-8", keep_alive, head
+            )
+            return keep_alive
+
+        if self.is_page_directory(url_path):
+            location = url_path + "/"
+            await self.send(
+                writer,
+                HTTPStatus.MOVED_PERMANENTLY,
+                keep_alive=keep_alive,
+                extra_headers=[("Location", location)],
+            )
+            return keep_alive
+
+        await self.send(writer, HTTPStatus.NOT_FOUND, keep_alive=keep_alive, head=head)
+        return keep_alive
+
+    async def stream_reloads(self, writer: asyncio.StreamWriter) -> None:
+        queue: asyncio.Queue = asyncio.Queue()
+        self.reload_queues.add(queue)
+        try:
+            writer.write(
+                b"HTTP/1.1 200 OK\r\n"
+                b"Content-Type: text/event-stream\r\n"
+                b"Cache-Control: no-cache\r\n"
+                b"Connection: keep-alive\r\n"
+                b"\r\n"
+                b"retry: 500\n\n"
+            )
+            await writer.drain()
+            while True:
+                try:
+                    paths = await asyncio.wait_for(queue.get(), KEEPALIVE_SECONDS)
+                    if paths is None:
+                        return
+                    writer.write(b"data: reload\n\n")
+                except asyncio.TimeoutError:
+                    writer.write(b": keep-alive\n\n")
+                await writer.drain()
+        finally:
+            self.reload_queues.discard(queue)
+
+    async def send(
+        self,
+        writer: asyncio.StreamWriter,
+        status: HTTPStatus,
+        body: bytes | None = None,
+        content_type: str = "text/plain; charset=utf-8",
+        keep_alive: bool = True,
+        head: bool = False,
+        extra_headers: Iterable[Tuple[str, str]] = (),
+    ) -> None:
+        if body is None:
+            body = f"{status.value} {status.phrase}\n".encode()
+        headers = [
+            ("Content-Type", content_type),
+            ("Content-Length", str(len(body))),
+            ("Cache-Control", "no-cache"),
+            ("Connection", "keep-alive" if keep_alive else "close"),
+            *extra_headers,
+        ]
+        lines = [f"HTTP/1.1 {status.value} {status.phrase}"]
+        lines += [f"{name}: {value}" for name, value in headers]
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1"))
+        if not head:
+            writer.write(body)
+        await writer.drain()
+
+
+def read_bytes(path: str) -> bytes:
+    with open(path, "rb") as file:
+        return file.read()
+
+
+def error_page(src_path: str, error: Exception) -> bytes:
+    message = html.escape(f"{type(error).__name__}: {error}")
+    page = f"<h1>Failed to generate {html.escape(src_path)}</h1><pre>{message}</pre>"
+    return inject_reload_script(page).encode()
+
+
+def serve(
+    content_dir: str,
+    static_dir: str,
+    template_path: str,
+    host: str = "127.0.0.1",
+    port: int = 8888,
+    polling: bool = False,
+) -> None:
+    server = DevServer(content_dir, static_dir, template_path, host, port, polling)
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        pass
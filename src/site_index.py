@@ -0,0 +1,87 @@
+import os
+from typing import List, NamedTuple, Tuple
+
+from profiler import timed
+
+PAGE_SUFFIX = ".md"
+
+
+def is_within(path: str, directory: str) -> bool:
+    # Both normalized, directory itself counts as within
+    return path == directory or path.startswith(directory + os.sep)
+
+
+class SiteFile(NamedTuple):
+    src_path: str
+    dest_path: str
+    size: int
+    mtime_ns: int
+
+
+def scan_tree(src_dir: str, dest_dir: str) -> Tuple[List["str"], List[SiteFile]]:
+    # Returns every destination directory and every file under src_dir in
+    # sorted depth first order. DirEntry knows whether it is a file without a
+    # stat call, so each file costs a single stat, and the tree is walked with
+    # a stack instead of recursion so deep sections can't hit the recursion limit.
+    dirs = []
+    files = []
+    # Files wait on the stack too, so they keep their sorted place between the
+    # subdirectories
+    stack: List[SiteFile | Tuple[str, str]] = [(src_dir, dest_dir)]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, SiteFile):
+            files.append(item)
+            continue
+        src_path, dest_path = item
+        dirs.append(dest_path)
+        with os.scandir(src_path) as entries:
+            children = sorted(entries, key=lambda entry: entry.name, reverse=True)
+        for entry in children:
+            new_dest_path = os.path.join(dest_path, entry.name)
+            if entry.is_file():
+                stat = entry.stat()
+                stack.append(
+                    SiteFile(entry.path, new_dest_path, stat.st_size, stat.st_mtime_ns)
+                )
+            else:
+                stack.append((entry.path, new_dest_path))
+    return dirs, files
+
+
+def collect_pages(from_content: str, dest_path: str) -> List[SiteFile]:
+    _, files = scan_tree(from_content, dest_path)
+    return [
+        file._replace(dest_path=file.dest_path[: -len(PAGE_SUFFIX)] + ".html")
+        for file in files
+        if file.src_path.endswith(PAGE_SUFFIX)
+    ]
+
+
+# Every source of the site and the output it becomes, collected in one walk of
+# content/ and static/ so the later stages (incremental checks, page rendering,
+# the static sync) read sizes and mtimes from here instead of the disk.
+class SiteIndex:
+
+    def __init__(
+        self,
+        pages: List[SiteFile],
+        static_files: List[SiteFile],
+        static_dirs: List["str"],
+    ):
+        self.pages = pages
+        self.static_files = static_files
+        self.static_dirs = static_dirs
+
+    @classmethod
+    @timed("site_index")
+    def scan(cls, content_dir: str, static_dir: str, dest_dir: str) -> "SiteIndex":
+        pages = collect_pages(content_dir, dest_dir)
+        static_dirs, static_files = scan_tree(static_dir, dest_dir)
+        return cls(pages, static_files, static_dirs)
+
+    def __repr__(self) -> str:
+        return (
+            f"SiteIndex({len(self.pages)} pages, "
+            f"{len(self.static_files)} static files)"
+        )
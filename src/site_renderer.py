@@ -0,0 +1,124 @@
+import os
+import threading
+from typing import Dict, List, Tuple
+from urllib.parse import unquote
+
+from lru_cache import LRUCache
+from markdown_util import parse_page
+from search_index import page_url
+from site_index import PAGE_SUFFIX, collect_pages, is_within
+from template import Template
+
+PAGE_CACHE_SIZE = 256
+
+
+def resolve_path(root: str, url_path: str) -> str | None:
+    # Maps a URL path below root, refusing anything that climbs out of it
+    root = os.path.normpath(root)
+    path = os.path.normpath(os.path.join(root, unquote(url_path).lstrip("/")))
+    if "\0" in path or not is_within(path, root):
+        return None
+    return path
+
+
+# Renders pages of content/ one at a time, on request, for a web app or the dev
+# server instead of a build into public/. The page list is only walked when
+# asked for, rendered pages are kept in a bounded LRU keyed by the mtime of the
+# source and of the template, so an edit is picked up by the next render. One
+# instance can be shared by every thread of a threaded server.
+class Site:
+
+    def __init__(
+        self,
+        content_dir: str,
+        template_path: str,
+        cache_size: int = PAGE_CACHE_SIZE,
+        asset_urls: Dict[str, str] | None = None,
+        minify: bool = False,
+    ):
+        self.content_dir = os.path.normpath(content_dir)
+        self.template_path = os.path.normpath(template_path)
+        self.asset_urls = asset_urls
+        self.minify = minify
+        self.pages = LRUCache(cache_size)
+        # URL path to source path, None until first needed
+        self.__index: Dict[str, str] | None = None
+        self.__index_lock = threading.Lock()
+        self.__template: Tuple[int, Template] | None = None
+        self.__template_lock = threading.Lock()
+
+    def urls(self) -> List[str]:
+        with self.__index_lock:
+            if self.__index is None:
+                self.__index = {
+                    page_url(page.dest_path, self.content_dir): page.src_path
+                    for page in collect_pages(self.content_dir, self.content_dir)
+                }
+            return sorted(self.__index)
+
+    def refresh(self) -> None:
+        # Forgets the page list, the next urls() walks content/ again
+        with self.__index_lock:
+            self.__index = None
+
+    def find_page(self, url_path: str) -> str | None:
+        # Looks on the disk rather than in the page list, so pages added or
+        # removed since it was walked are found or missed all the same
+        if url_path.endswith("/"):
+            page = resolve_path(self.content_dir, url_path + "index" + PAGE_SUFFIX)
+        elif url_path.endswith(".html"):
+            page = resolve_path(
+                self.content_dir, url_path[: -len(".html")] + PAGE_SUFFIX
+            )
+        else:
+            return None
+        found = page is not None and os.path.isfile(page)
+        with self.__index_lock:
+            if self.__index is not None and page is not None:
+                url = page_url(page[: -len(PAGE_SUFFIX)] + ".html", self.content_dir)
+                if found:
+                    self.__index[url] = page
+                else:
+                    self.__index.pop(url, None)
+        return page if found else None
+
+    def is_page_directory(self, url_path: str) -> bool:
+        path = resolve_path(self.content_dir, url_path)
+        return path is not None and os.path.isfile(
+            os.path.join(path, "index" + PAGE_SUFFIX)
+        )
+
+    def load_template(self) -> Tuple[int, Template]:
+        mtime = os.stat(self.template_path).st_mtime_ns
+        with self.__template_lock:
+            if self.__template is None or self.__template[0] != mtime:
+                template = Template.load(
+                    self.template_path, asset_urls=self.asset_urls, minify=self.minify
+                )
+                self.__template = (mtime, template)
+            return self.__template
+
+    def render_page(self, src_path: str) -> str:
+        template_mtime, template = self.load_template()
+        key = (src_path, os.stat(src_path).st_mtime_ns, template_mtime)
+        page = self.pages.get(key)
+        if page is None:
+            # Two threads missing the same page both render it, the pages are
+            # identical and the second put only refreshes the entry
+            title, html_node = parse_page(src_path)
+            page = template.render(Title=title, Content=html_node)
+            self.pages.put(key, page)
+        return page
+
+    def render(self, url_path: str) -> str | None:
+        # Returns None when no page has this URL
+        src_path = self.find_page(url_path)
+        if src_path is None:
+            return None
+        try:
+            return self.render_page(src_path)
+        except FileNotFoundError:
+            if os.path.exists(src_path):
+                raise
+            # Removed since find_page saw it
+            return None
@@ -0,0 +1,76 @@
+import os
+import time
+from typing import Iterable, List, Tuple
+from xml.sax.saxutils import escape
+
+from profiler import timed
+
+SITEMAP_NAME = "sitemap.xml"
+# The sitemap protocol's limit per file, bigger sites get a sitemap index
+MAX_URLS_PER_SITEMAP = 50000
+SITEMAP_NAMESPACE = "http://www.sitemaps.org/schemas/sitemap/0.9"
+
+
+def format_lastmod(mtime_ns: int) -> str:
+    return time.strftime("%Y-%m-%d", time.gmtime(mtime_ns / 1e9))
+
+
+def urlset(entries: Iterable[Tuple[str, str]]) -> str:
+    lines = [
+        '<?xml version="1.0" encoding="UTF-8"?>',
+        f'<urlset xmlns="{SITEMAP_NAMESPACE}">',
+    ]
+    for loc, lastmod in entries:
+        lines.append(f"<url><loc>{escape(loc)}</loc><lastmod>{lastmod}</lastmod></url>")
+    lines.append("</urlset>")
+    return "\n".join(lines) + "\n"
+
+
+def sitemap_index(locs: Iterable[str]) -> str:
+    lines = [
+        '<?xml version="1.0" encoding="UTF-8"?>',
+        f'<sitemapindex xmlns="{SITEMAP_NAMESPACE}">',
+    ]
+    for loc in locs:
+        lines.append(f"<sitemap><loc>{escape(loc)}</loc></sitemap>")
+    lines.append("</sitemapindex>")
+    return "\n".join(lines) + "\n"
+
+
+def write_if_changed(path: str, content: str) -> bool:
+    if os.path.exists(path):
+        with open(path) as existing:
+            if existing.read() == content:
+                return False
+    with open(path, "w") as sitemap_file:
+        sitemap_file.write(content)
+    return True
+
+
+@timed("sitemap")
+def write_sitemap(
+    public_dir: str, site_url: str, pages: Iterable[Tuple[str, int]]
+) -> List[str]:
+    # pages are (URL path, source mtime) pairs. Returns every sitemap file, the
+    # ones whose content didn't change aren't written again.
+    site_url = site_url.rstrip("/")
+    entries = [
+        (site_url + url, format_lastmod(mtime_ns)) for url, mtime_ns in sorted(pages)
+    ]
+    files = {}
+    if len(entries) <= MAX_URLS_PER_SITEMAP:
+        files[SITEMAP_NAME] = urlset(entries)
+    else:
+        names = []
+        for start in range(0, len(entries), MAX_URLS_PER_SITEMAP):
+            name = f"sitemap-{start // MAX_URLS_PER_SITEMAP + 1}.xml"
+            files[name] = urlset(entries[start : start + MAX_URLS_PER_SITEMAP])
+            names.append(name)
+        files[SITEMAP_NAME] = sitemap_index(f"{site_url}/{name}" for name in names)
+
+    paths = []
+    for name, content in files.items():
+        path = os.path.join(public_dir, name)
+        write_if_changed(path, content)
+        paths.append(path)
+    return paths
@@ -0,0 +1,174 @@
+import os
+import shutil
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import partial
+from typing import List, NamedTuple
+
+from build_manifest import BuildManifest, hash_file
+from fingerprint import AssetManifest
+from profiler import timed
+from site_index import SiteFile, SiteIndex, scan_tree
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+# ioctl request that asks Linux filesystems such as btrfs and xfs to share the
+# source file's extents with the destination (a copy-on-write "reflink")
+FICLONE = 0x40049409
+# Copies wait on the disk, not the CPU, so the thread count isn't per core
+DEFAULT_COPY_JOBS = 8
+
+PROGRESS_INTERVAL_SECONDS = 1.0
+
+
+class CopyStats(NamedTuple):
+    files_copied: int
+    files_unchanged: int
+    bytes_copied: int
+    seconds: float
+
+    def summary(self) -> str:
+        seconds = max(self.seconds, 1e-9)
+        return (
+            f"Synced static files: {self.files_copied} copied"
+            f" ({format_bytes(self.bytes_copied)}), {self.files_unchanged} unchanged"
+            f" in {self.seconds:.2f}s"
+            f" ({self.files_copied / seconds:.1f} files/s,"
+            f" {format_bytes(self.bytes_copied / seconds)}/s)"
+        )
+
+
+@timed()
+def copy_files(
+    src_dir: str,
+    dest_dir: str,
+    manifest: BuildManifest | None = None,
+    jobs: int = DEFAULT_COPY_JOBS,
+    index: SiteIndex | None = None,
+    assets: AssetManifest | None = None,
+) -> CopyStats:
+    # With an asset manifest every file is copied under a content hashed name,
+    # which is added to the manifest
+    start = time.perf_counter()
+    if index is not None:
+        dirs, files = index.static_dirs, index.static_files
+    else:
+        dirs, files = scan_tree(src_dir, dest_dir)
+
+    # Create the whole directory tree before fanning out, so workers never race
+    # on makedirs and only ever touch files
+    for new_dest_dir in dirs:
+        os.makedirs(new_dest_dir, exist_ok=True)
+
+    files_copied = files_unchanged = bytes_copied = 0
+    last_report = start
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        digests: List[str | None] = [None] * len(files)
+        if assets is not None:
+            digests = list(executor.map(partial(hash_static_file, manifest), files))
+            files = [assets.fingerprint(*item) for item in zip(files, digests)]
+        if manifest is not None:
+            for file, digest in zip(files, digests):
+                manifest.record(
+                    file.src_path, file.dest_path, "", digest, file.size, file.mtime_ns
+                )
+
+        futures = [executor.submit(sync_file, *file) for file in files]
+        for done, future in enumerate(as_completed(futures), start=1):
+            size = future.result()
+            if size is None:
+                files_unchanged += 1
+            else:
+                files_copied += 1
+                bytes_copied += size
+
+            now = time.perf_counter()
+            if now - last_report >= PROGRESS_INTERVAL_SECONDS:
+                print(f"Synced {done}/{len(files)} static files")
+                last_report = now
+
+    return CopyStats(
+        files_copied, files_unchanged, bytes_copied, time.perf_counter() - start
+    )
+
+
+def hash_static_file(manifest: BuildManifest | None, file: SiteFile) -> str:
+    # The build manifest remembers the hash of files whose size and mtime are
+    # unchanged, only new and edited assets are read
+    if manifest is None:
+        return hash_file(file.src_path)
+    return manifest.source_hash(file.src_path, file.size, file.mtime_ns)
+
+
+def sync_file(
+    src_path: str,
+    dest_path: str,
+    size: int | None = None,
+    mtime_ns: int | None = None,
+) -> int | None:
+    # Returns the number of bytes brought up to date, or None when unchanged.
+    # The site index passes the source's size and mtime so it isn't stat'ed again.
+    if is_up_to_date(src_path, dest_path, size, mtime_ns):
+        return None
+    clone_file(src_path, dest_path)
+    return size if size is not None else os.path.getsize(src_path)
+
+
+def is_up_to_date(
+    src_path: str,
+    dest_path: str,
+    size: int | None = None,
+    mtime_ns: int | None = None,
+) -> bool:
+    try:
+        dest_stat = os.stat(dest_path)
+    except FileNotFoundError:
+        return False
+    if size is None or mtime_ns is None:
+        src_stat = os.stat(src_path)
+        if os.path.samestat(src_stat, dest_stat):
+            # A hard link always has the source's content
+            return True
+        size, mtime_ns = src_stat.st_size, src_stat.st_mtime_ns
+    # A hard link shares the source's size and mtime, so it passes this too
+    return size == dest_stat.st_size and mtime_ns == dest_stat.st_mtime_ns
+
+
+def clone_file(src_path: str, dest_path: str) -> str:
+    # Prefer a reflink, then a hard link, and only copy the bytes when the
+    # filesystem supports neither. The destination keeps the source's mtime
+    # so is_up_to_date can skip it next build.
+    if os.path.lexists(dest_path):
+        os.remove(dest_path)
+    if reflink_file(src_path, dest_path):
+        shutil.copystat(src_path, dest_path)
+        return "reflinked"
+    try:
+        os.link(src_path, dest_path)
+        return "linked"
+    except OSError:
+        shutil.copy2(src_path, dest_path)
+        return "copied"
+
+
+def reflink_file(src_path: str, dest_path: str) -> bool:
+    if fcntl is None:
+        return False
+    try:
+        with open(src_path, "rb") as src_file, open(dest_path, "wb") as dest_file:
+            fcntl.ioctl(dest_file.fileno(), FICLONE, src_file.fileno())
+    except OSError:
+        os.remove(dest_path)
+        return False
+    return True
+
+
+def format_bytes(size: float) -> str:
+    for unit in ["B", "KiB", "MiB", "GiB"]:
+        if size < 1024 or unit == "GiB":
+            break
+        size /= 1024
+    return f"{size:.1f} {unit}"
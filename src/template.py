@@ -0,0 +1,87 @@
+import re
+from typing import Dict, Iterable, Iterator, List, TextIO
+
+from fingerprint import rewrite_html_urls
+from htmlnode import HTMLNode
+from minify import minify_template
+
+PLACEHOLDER_PATTERN = re.compile(r"\{\{\s*(\w+)\s*\}\}")
+SLOT_NAMES = ("Title", "Content")
+
+
+class Template:
+
+    def __init__(
+        self,
+        literals: List["str"],
+        slots: List["str"],
+        asset_urls: Dict[str, str] | None = None,
+        minify: bool = False,
+    ):
+        # literals always has one more item than slots: the page is
+        # literals[0] + slots[0] + literals[1] + ... + literals[-1]
+        self.literals = literals
+        self.slots = slots
+        # Fingerprinted asset URLs and minification apply to the literals when
+        # compiled and to the nodes rendered into the slots while serialized
+        self.asset_urls = asset_urls
+        self.minify = minify
+
+    @classmethod
+    def compile(
+        cls,
+        source: str,
+        slot_names: Iterable[str] = SLOT_NAMES,
+        asset_urls: Dict[str, str] | None = None,
+        minify: bool = False,
+    ):
+        if asset_urls:
+            source = rewrite_html_urls(source, asset_urls)
+        if minify:
+            source = minify_template(source)
+        literals: List["str"] = []
+        slots: List["str"] = []
+        position = 0
+        for match in PLACEHOLDER_PATTERN.finditer(source):
+            name = match.group(1)
+            if name not in slot_names:
+                raise ValueError(f"Unknown placeholder {match.group()} in template")
+            literals.append(source[position : match.start()])
+            slots.append(name)
+            position = match.end()
+        literals.append(source[position:])
+        return cls(literals, slots, asset_urls, minify)
+
+    @classmethod
+    def load(
+        cls,
+        path: str,
+        slot_names: Iterable[str] = SLOT_NAMES,
+        asset_urls: Dict[str, str] | None = None,
+        minify: bool = False,
+    ):
+        with open(path) as template_file:
+            return cls.compile(template_file.read(), slot_names, asset_urls, minify)
+
+    def render(self, **values: str | HTMLNode) -> str:
+        return "".join(self.iter_render(**values))
+
+    def iter_render(self, **values: str | HTMLNode) -> Iterator[str]:
+        for slot in self.slots:
+            if slot not in values:
+                raise ValueError(f"Missing value for {slot}")
+
+        yield self.literals[0]
+        for slot, literal in zip(self.slots, self.literals[1:]):
+            value = values[slot]
+            if isinstance(value, HTMLNode):
+                yield from value.iter_html(self.asset_urls, self.minify)
+            else:
+                yield value
+            yield literal
+
+    def write(self, stream: TextIO, **values: str | HTMLNode) -> None:
+        stream.writelines(self.iter_render(**values))
+
+    def __repr__(self):
+        return f"Template({self.literals}, {self.slots})"
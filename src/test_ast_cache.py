@@ -0,0 +1,140 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from ast_cache import AstCache, flatten, unflatten
+from htmlnode import LeafNode, ParentNode, markdown_to_html_node
+from markdown_util import parse_page
+
+MARKDOWN = """# Title
+
+Some **bold** and *italic* text with a [link](https://boot.dev).
+
+- one
+- two
+
+> quote
+
+```
+code
+```"""
+
+
+class TestFlatten(unittest.TestCase):
+    def test_round_trip(self):
+        root = markdown_to_html_node(MARKDOWN)
+        self.assertEqual(unflatten(flatten(root)).to_html(), root.to_html())
+
+    def test_records(self):
+        root = ParentNode(
+            "p", [LeafNode("b", "bold"), LeafNode("a", "link", {"href": "/"})]
+        )
+        self.assertEqual(
+            flatten(root),
+            [("p", 2, None), ("b", "bold", None), ("a", "link", {"href": "/"})],
+        )
+
+    def test_deep_nesting(self):
+        root = LeafNode(None, "text")
+        for _ in range(5000):
+            root = ParentNode("div", [root])
+        self.assertEqual(unflatten(flatten(root)).to_html(), root.to_html())
+
+    def test_truncated_records(self):
+        with self.assertRaises(ValueError):
+            unflatten([("p", 2, None), ("b", "bold", None)])
+        with self.assertRaises(ValueError):
+            unflatten([("b", "bold", None), ("i", "italic", None)])
+        with self.assertRaises(ValueError):
+            unflatten([])
+
+
+class TestAstCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache = AstCache(os.path.join(self.tmp.name, "ast"))
+        self.page = os.path.join(self.tmp.name, "page.md")
+        with open(self.page, "w") as file:
+            file.write(MARKDOWN)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_miss_then_hit(self):
+        key = self.cache.key(MARKDOWN.encode())
+        self.assertIsNone(self.cache.get(key))
+        root = markdown_to_html_node(MARKDOWN)
+        self.cache.put(key, "Title", root)
+        title, cached = self.cache.get(key)
+        self.assertEqual(title, "Title")
+        self.assertEqual(cached.to_html(), root.to_html())
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 1))
+
+    def test_key_depends_on_parser_version(self):
+        key = self.cache.key(b"# Title")
+        with mock.patch("ast_cache.PARSER_VERSION", 2):
+            self.assertNotEqual(self.cache.key(b"# Title"), key)
+
+    def test_corrupt_entry_is_a_miss(self):
+        key = self.cache.key(b"# Title")
+        os.makedirs(self.cache.directory)
+        with open(self.cache.path(key), "wb") as file:
+            file.write(b"not marshal")
+        self.assertIsNone(self.cache.get(key))
+
+    def test_parse_page_skips_parsing_on_hit(self):
+        title, root = parse_page(self.page, self.cache)
+        with mock.patch("markdown_util.parse_markdown") as parse_markdown:
+            cached_title, cached_root = parse_page(self.page, self.cache)
+        parse_markdown.assert_not_called()
+        self.assertEqual(cached_title, title)
+        self.assertEqual(cached_root.to_html(), root.to_html())
+        self.assertEqual(cached_root.to_html(), parse_page(self.page)[1].to_html())
+
+    def test_changed_source_is_parsed_again(self):
+        parse_page(self.page, self.cache)
+        with open(self.page, "w") as file:
+            file.write("# Changed")
+        title, _ = parse_page(self.page, self.cache)
+        self.assertEqual(title, "Changed")
+        self.assertEqual(self.cache.misses, 2)
+
+    def test_evicts_least_recently_used(self):
+        keys = [self.cache.key(str(i).encode()) for i in range(3)]
+        for i, key in enumerate(keys):
+            self.cache.put(key, "Title", markdown_to_html_node(MARKDOWN))
+            os.utime(self.cache.path(key), ns=(i, i))
+        # Reading an entry makes it the most recently used
+        self.cache.get(keys[0])
+        size = os.path.getsize(self.cache.path(keys[0]))
+        self.cache.max_bytes = size * 2
+
+        removed = self.cache.evict()
+        self.assertEqual(removed, [self.cache.path(keys[1])])
+        self.assertIsNotNone(self.cache.get(keys[0]))
+        self.assertIsNotNone(self.cache.get(keys[2]))
+
+    def test_evicts_while_putting(self):
+        root = markdown_to_html_node(MARKDOWN)
+        self.cache.put(self.cache.key(b"0"), "Title", root)
+        size = os.path.getsize(self.cache.path(self.cache.key(b"0")))
+        self.cache.max_bytes = size * 3
+        for i in range(1, 20):
+            self.cache.put(self.cache.key(str(i).encode()), "Title", root)
+        total = sum(entry.stat().st_size for entry in os.scandir(self.cache.directory))
+        self.assertLessEqual(total, self.cache.max_bytes + size)
+
+    def test_large_page_is_not_cached(self):
+        self.cache.max_source_bytes = len(MARKDOWN) - 1
+        title, root = parse_page(self.page, self.cache)
+        self.assertEqual(title, "Title")
+        self.assertEqual(root.to_html(), parse_page(self.page)[1].to_html())
+        self.assertFalse(os.path.exists(self.cache.directory))
+
+    def test_evict_without_directory(self):
+        self.assertEqual(self.cache.evict(), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,6 +1,12 @@
+import io
 import unittest
 
-from block_node_util import BlockType, block_to_block_type, markdown_to_block
+from block_node_util import (
+    BlockType,
+    block_to_block_type,
+    iter_markdown_blocks,
+    markdown_to_block,
+)
 
 
 class TestMarkdownToBlock(unittest.TestCase):
@@ -24,6 +30,30 @@ class TestMarkdownToBlock(unittest.TestCase):
             ],
         )
 
+    def test_markdown_to_block_trailing_whitespace_ends_block(self):
+        blocks = markdown_to_block("first line  \nsecond line\n   third line")
+        self.assertListEqual(blocks, ["first line", "second line\nthird line"])
+
+
+class TestIterMarkdownBlocks(unittest.TestCase):
+    def test_yields_blocks_from_file(self):
+        markdown_file = io.StringIO(
+            "\n\n# Heading\n\n\n  para line 1\npara line 2\n \t \n* item\n* item\n"
+        )
+        blocks = iter_markdown_blocks(markdown_file)
+        self.assertEqual(next(blocks), "# Heading")
+        self.assertEqual(next(blocks), "para line 1\npara line 2")
+        self.assertEqual(next(blocks), "* item\n* item")
+        self.assertIsNone(next(blocks, None))
+
+    def test_yields_block_before_reading_the_rest(self):
+        def lines():
+            yield "# Heading\n"
+            yield "\n"
+            raise AssertionError("read past the first block")
+
+        self.assertEqual(next(iter_markdown_blocks(lines())), "# Heading")
+
 
 class TestBlockToBlockType(unittest.TestCase):
     def test_heading_levels(self):
@@ -51,6 +81,18 @@ class TestBlockToBlockType(unittest.TestCase):
                 code block
         ```"""
         self.assertEqual(block_to_block_type(text), BlockType.CODE)
+        text = "```\nfirst\n\nsecond\n```"
+        self.assertEqual(block_to_block_type(text), BlockType.CODE)
+        text = "```\nnot closed"
+        self.assertEqual(block_to_block_type(text), BlockType.PARAGRAPH)
+        text = "text\n```"
+        self.assertEqual(block_to_block_type(text), BlockType.PARAGRAPH)
+
+    def test_multiline_heading_block(self):
+        text = "# heading\n## heading"
+        self.assertEqual(block_to_block_type(text), BlockType.HEADING)
+        text = "# heading\nparagraph"
+        self.assertEqual(block_to_block_type(text), BlockType.PARAGRAPH)
 
     def test_quote_block(self):
         text = "> quotes 1\n>quote 2"
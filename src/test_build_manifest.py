@@ -0,0 +1,136 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from build_manifest import BuildManifest
+
+
+class TestBuildManifest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+        self.manifest_path = os.path.join(self.root, "cache", "manifest.json")
+        self.public = os.path.join(self.root, "public")
+        os.makedirs(os.path.join(self.public, "blog"))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, name: str, content: str) -> str:
+        path = os.path.join(self.root, name)
+        with open(path, "w") as file:
+            file.write(content)
+        return path
+
+    def rebuild(self, manifest: BuildManifest) -> BuildManifest:
+        manifest.save()
+        return BuildManifest.load(self.manifest_path)
+
+    def test_new_source_is_stale(self):
+        src = self.write("index.md", "# Hello")
+        manifest = BuildManifest.load(self.manifest_path)
+        dest = os.path.join(self.public, "index.html")
+        self.assertTrue(manifest.is_stale(src, dest))
+
+    def test_unchanged_source_is_not_stale(self):
+        src = self.write("index.md", "# Hello")
+        dest = self.write("public/index.html", "<h1>Hello</h1>")
+        manifest = BuildManifest.load(self.manifest_path)
+        manifest.is_stale(src, dest)
+        manifest = self.rebuild(manifest)
+        self.assertFalse(manifest.is_stale(src, dest))
+
+    def test_changed_source_is_stale(self):
+        src = self.write("index.md", "# Hello")
+        dest = self.write("public/index.html", "<h1>Hello</h1>")
+        manifest = BuildManifest.load(self.manifest_path)
+        manifest.is_stale(src, dest)
+        manifest = self.rebuild(manifest)
+        self.write("index.md", "# Hello!")
+        self.assertTrue(manifest.is_stale(src, dest))
+
+    def test_changed_dependency_is_stale(self):
+        src = self.write("index.md", "# Hello")
+        template = self.write("template.html", "{{ Content }}")
+        dest = self.write("public/index.html", "<h1>Hello</h1>")
+        manifest = BuildManifest.load(self.manifest_path)
+        manifest.is_stale(src, dest, [template])
+        manifest = self.rebuild(manifest)
+        self.write("template.html", "<main>{{ Content }}</main>")
+        self.assertTrue(manifest.is_stale(src, dest, [template]))
+
+    def test_unchanged_stat_skips_hashing(self):
+        src = self.write("index.md", "# Hello")
+        dest = self.write("public/index.html", "<h1>Hello</h1>")
+        stat = os.stat(src)
+        manifest = BuildManifest.load(self.manifest_path)
+        manifest.is_stale(src, dest, (), stat.st_size, stat.st_mtime_ns)
+        manifest = self.rebuild(manifest)
+        with mock.patch("build_manifest.hash_file") as hash_file:
+            stale = manifest.is_stale(src, dest, (), stat.st_size, stat.st_mtime_ns)
+        self.assertFalse(stale)
+        hash_file.assert_not_called()
+
+    def test_changed_stat_is_hashed(self):
+        src = self.write("index.md", "# Hello")
+        dest = self.write("public/index.html", "<h1>Hello</h1>")
+        stat = os.stat(src)
+        manifest = BuildManifest.load(self.manifest_path)
+        manifest.is_stale(src, dest, (), stat.st_size, stat.st_mtime_ns)
+        manifest = self.rebuild(manifest)
+        self.write("index.md", "# Hello!")
+        stat = os.stat(src)
+        self.assertTrue(
+            manifest.is_stale(src, dest, (), stat.st_size, stat.st_mtime_ns)
+        )
+
+    def test_missing_output_is_stale(self):
+        src = self.write("index.md", "# Hello")
+        dest = self.write("public/index.html", "<h1>Hello</h1>")
+        manifest = BuildManifest.load(self.manifest_path)
+        manifest.is_stale(src, dest)
+        manifest = self.rebuild(manifest)
+        os.remove(dest)
+        self.assertTrue(manifest.is_stale(src, dest))
+
+    def test_forgotten_source_is_stale(self):
+        src = self.write("index.md", "# Hello")
+        dest = self.write("public/index.html", "<h1>Hello</h1>")
+        manifest = BuildManifest.load(self.manifest_path)
+        manifest.is_stale(src, dest)
+        manifest.forget(src)
+        manifest = self.rebuild(manifest)
+        self.assertTrue(manifest.is_stale(src, dest))
+
+    def test_forgotten_source_output_is_not_pruned(self):
+        src = self.write("index.md", "# Hello")
+        dest = self.write("public/index.html", "<h1>Hello</h1>")
+        manifest = BuildManifest.load(self.manifest_path)
+        manifest.is_stale(src, dest)
+        manifest = self.rebuild(manifest)
+
+        self.write("index.md", "no title")
+        manifest.is_stale(src, dest)
+        manifest.forget(src)
+        self.assertListEqual(manifest.prune(self.public), [])
+        self.assertTrue(os.path.exists(dest))
+        manifest = self.rebuild(manifest)
+        self.assertTrue(manifest.is_stale(src, dest))
+
+    def test_prune_removes_outputs_of_removed_sources(self):
+        kept_src = self.write("index.md", "# Hello")
+        kept_dest = self.write("public/index.html", "<h1>Hello</h1>")
+        removed_src = self.write("post.md", "# Post")
+        removed_dest = self.write("public/blog/post.html", "<h1>Post</h1>")
+        manifest = BuildManifest.load(self.manifest_path)
+        manifest.is_stale(kept_src, kept_dest)
+        manifest.is_stale(removed_src, removed_dest)
+        manifest = self.rebuild(manifest)
+
+        os.remove(removed_src)
+        manifest.is_stale(kept_src, kept_dest)
+        self.assertListEqual(manifest.prune(self.public), [removed_dest])
+        self.assertTrue(os.path.exists(kept_dest))
+        self.assertFalse(os.path.exists(os.path.join(self.public, "blog")))
+        self.assertTrue(os.path.exists(self.public))
@@ -0,0 +1,183 @@
+import gzip
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+from unittest import mock
+
+from compress import (
+    CompressManifest,
+    CompressStats,
+    compress_file,
+    compressed_copies,
+    precompress,
+)
+from main import main
+
+PAGE = "<p>" + "the same paragraph again " * 40 + "</p>"
+
+
+class TestPrecompress(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.public = os.path.join(self.tmp.name, "public")
+        self.manifest_path = os.path.join(self.tmp.name, "compress.json")
+        os.makedirs(os.path.join(self.public, "blog"))
+        self.write("index.html", PAGE)
+        self.write("blog/post.html", PAGE)
+        self.write("tiny.css", "body {}")
+        self.write("image.png", PAGE)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, name: str, content: str):
+        with open(os.path.join(self.public, name), "w") as file:
+            file.write(content)
+
+    def path(self, name: str) -> str:
+        return os.path.join(self.public, name)
+
+    def compress(self, jobs: int = 1) -> CompressStats:
+        manifest = CompressManifest.load(self.manifest_path)
+        stats = precompress(self.public, manifest, jobs)
+        manifest.save()
+        return stats
+
+    def test_writes_gzip_copies(self):
+        stats = self.compress()
+        self.assertEqual((stats.files_compressed, stats.files_incompressible), (2, 1))
+        with gzip.open(self.path("blog/post.html.gz"), "rt") as compressed:
+            self.assertEqual(compressed.read(), PAGE)
+        self.assertLess(stats.bytes_out, stats.bytes_in)
+        # Too small to pay off, and not a text format
+        self.assertFalse(os.path.exists(self.path("tiny.css.gz")))
+        self.assertFalse(os.path.exists(self.path("image.png.gz")))
+
+    def test_parallel(self):
+        stats = self.compress(jobs=2)
+        self.assertEqual(stats.files_compressed, 2)
+        self.assertTrue(os.path.exists(self.path("index.html.gz")))
+
+    def test_skips_unchanged_outputs(self):
+        self.compress()
+        with mock.patch("compress.compress_file") as compress_file:
+            stats = self.compress()
+        compress_file.assert_not_called()
+        self.assertEqual(stats.files_unchanged, 3)
+
+    def test_rewritten_with_same_content_is_not_compressed_again(self):
+        self.compress()
+        compressed_mtime = os.stat(self.path("index.html.gz")).st_mtime_ns
+        self.write("index.html", PAGE)
+        os.utime(self.path("index.html"), ns=(1, 1))
+        stats = self.compress()
+        self.assertEqual(stats.files_compressed, 0)
+        self.assertEqual(
+            os.stat(self.path("index.html.gz")).st_mtime_ns, compressed_mtime
+        )
+
+    def test_changed_output_is_compressed_again(self):
+        self.compress()
+        self.write("index.html", PAGE + "<p>more</p>")
+        stats = self.compress()
+        self.assertEqual(stats.files_compressed, 1)
+        with gzip.open(self.path("index.html.gz"), "rt") as compressed:
+            self.assertEqual(compressed.read(), PAGE + "<p>more</p>")
+
+    def test_missing_copy_is_written_again(self):
+        self.compress()
+        os.remove(self.path("index.html.gz"))
+        self.assertEqual(self.compress().files_compressed, 1)
+        self.assertTrue(os.path.exists(self.path("index.html.gz")))
+
+    def test_removed_output_takes_its_copies(self):
+        self.compress()
+        os.remove(self.path("blog/post.html"))
+        self.compress()
+        self.assertFalse(os.path.exists(self.path("blog/post.html.gz")))
+
+    def test_incompressible_content_drops_stale_copy(self):
+        self.compress()
+        self.write("index.html", "<p>now short</p>")
+        self.compress()
+        self.assertFalse(os.path.exists(self.path("index.html.gz")))
+
+
+class TestCompressFile(unittest.TestCase):
+    def test_brotli_when_available(self):
+        brotli = mock.Mock()
+        brotli.compress.return_value = b"br"
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "index.html")
+            with open(path, "w") as file:
+                file.write(PAGE)
+            with mock.patch("compress.brotli", brotli):
+                _, written, _, _ = compress_file(path, None, [".gz", ".br"])
+            self.assertEqual(written, [".gz", ".br"])
+            with open(path + ".br", "rb") as file:
+                self.assertEqual(file.read(), b"br")
+
+            # Without brotli a stale .br is removed
+            _, written, _, _ = compress_file(path, None, [".gz"])
+            self.assertEqual(written, [".gz"])
+            self.assertFalse(os.path.exists(path + ".br"))
+
+
+class TestCompressedBuild(unittest.TestCase):
+    # Builds through main(), which works on content/, static/ and public/ under
+    # the current directory
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.addCleanup(os.chdir, os.getcwd())
+        os.chdir(self.tmp.name)
+        os.makedirs("content/blog")
+        os.makedirs("static")
+        self.write("template.html", "<title>{{ Title }}</title>{{ Content }}")
+        self.write("content/index.md", "# Home\n\n" + "old words " * 60)
+        self.write("content/blog/post.md", "# Post\n\n" + "a post " * 60)
+
+    def write(self, name: str, content: str):
+        with open(name, "w") as file:
+            file.write(content)
+
+    def build(self, *args: str) -> str:
+        output = StringIO()
+        with redirect_stdout(output):
+            self.assertEqual(main(["--incremental", *args]), 0)
+        return output.getvalue()
+
+    def test_compressed_copies(self):
+        entries = {"a.html": {"written": [".gz", ".br"]}, "b.css": {"written": []}}
+        self.assertEqual(compressed_copies(entries), ["a.html.gz", "a.html.br"])
+        self.assertEqual(compressed_copies(entries, {"b.css"}), [])
+
+    def test_build_without_compress_prunes_copies(self):
+        self.build("--compress")
+        self.assertTrue(os.path.exists("public/index.html.gz"))
+        self.assertTrue(os.path.exists("public/blog/post.html.gz"))
+
+        # Kept by the next build, not pruned and compressed again
+        self.assertIn("Compressed 0 files", self.build("--compress"))
+        self.assertTrue(os.path.exists("public/index.html.gz"))
+
+        self.write("content/index.md", "# Home\n\n" + "new words " * 60)
+        self.build()
+        with open("public/index.html") as page:
+            self.assertIn("new words", page.read())
+        self.assertFalse(os.path.exists("public/index.html.gz"))
+        self.assertFalse(os.path.exists("public/blog/post.html.gz"))
+
+    def test_removed_page_takes_its_copies(self):
+        self.build("--compress")
+        os.remove("content/blog/post.md")
+        self.build("--compress")
+        self.assertFalse(os.path.exists("public/blog"))
+        self.assertTrue(os.path.exists("public/index.html.gz"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,123 @@
+import json
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+from unittest import mock
+
+from build_manifest import BuildManifest
+from fingerprint import (
+    AssetManifest,
+    fingerprinted_path,
+    rewrite_html_urls,
+    rewrite_url,
+)
+from htmlnode import LeafNode, ParentNode
+from static_util import copy_files
+from template import Template
+
+ASSET_URLS = {"/index.css": "/index.0123456789ab.css", "/logo.png": "/logo.ba98.png"}
+
+
+class TestRewrite(unittest.TestCase):
+    def test_fingerprinted_path(self):
+        self.assertEqual(
+            fingerprinted_path(os.path.join("public", "index.css"), "0123456789abcdef"),
+            os.path.join("public", "index.0123456789ab.css"),
+        )
+
+    def test_rewrite_url(self):
+        self.assertEqual(
+            rewrite_url("/index.css", ASSET_URLS), ASSET_URLS["/index.css"]
+        )
+        self.assertEqual(
+            rewrite_url("/index.css?v=1#top", ASSET_URLS),
+            "/index.0123456789ab.css?v=1#top",
+        )
+        self.assertEqual(rewrite_url("/about", ASSET_URLS), "/about")
+        self.assertEqual(rewrite_url("index.css", ASSET_URLS), "index.css")
+        self.assertEqual(
+            rewrite_url("https://example.com/index.css", ASSET_URLS),
+            "https://example.com/index.css",
+        )
+
+    def test_rewrite_html_urls(self):
+        self.assertEqual(
+            rewrite_html_urls(
+                '<link href="/index.css" rel="stylesheet"><img src=\'/logo.png\'>',
+                ASSET_URLS,
+            ),
+            '<link href="/index.0123456789ab.css" rel="stylesheet">'
+            "<img src='/logo.ba98.png'>",
+        )
+
+    def test_template_and_nodes(self):
+        template = Template.compile(
+            '<link href="/index.css">{{ Content }}', asset_urls=ASSET_URLS
+        )
+        image = LeafNode("img", "", {"src": "/logo.png", "alt": "/logo.png"})
+        content = ParentNode("p", [image, LeafNode("a", "home", {"href": "/"})])
+        self.assertEqual(
+            template.render(Content=content),
+            '<link href="/index.0123456789ab.css">'
+            '<p><img src="/logo.ba98.png" alt="/logo.png"></img><a href="/">home</a></p>',
+        )
+        # The shared node itself is left alone
+        self.assertEqual(image.props["src"], "/logo.png")
+
+
+class TestFingerprintAssets(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.static = os.path.join(self.tmp.name, "static")
+        self.public = os.path.join(self.tmp.name, "public")
+        self.manifest_path = os.path.join(self.tmp.name, "manifest.json")
+        os.makedirs(os.path.join(self.static, "images"))
+        self.write("static/index.css", "body {}")
+        self.write("static/images/logo.png", "png")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, name: str, content: str):
+        with open(os.path.join(self.tmp.name, name), "w") as file:
+            file.write(content)
+
+    def build(self, manifest: BuildManifest) -> AssetManifest:
+        assets = AssetManifest(
+            os.path.join(self.public, "asset-manifest.json"), self.public
+        )
+        with redirect_stdout(StringIO()):
+            copy_files(self.static, self.public, manifest, jobs=2, assets=assets)
+        assets.save()
+        manifest.save()
+        return assets
+
+    def test_copies_under_hashed_names(self):
+        assets = self.build(BuildManifest(self.manifest_path))
+        css_url = assets.urls["/index.css"]
+        self.assertRegex(css_url, r"^/index\.[0-9a-f]{12}\.css$")
+        self.assertTrue(os.path.isfile(self.public + css_url))
+        self.assertFalse(os.path.exists(os.path.join(self.public, "index.css")))
+        with open(assets.path) as manifest_file:
+            self.assertEqual(json.load(manifest_file), assets.urls)
+
+    def test_changed_asset_gets_a_new_name(self):
+        old_url = self.build(BuildManifest(self.manifest_path)).urls["/index.css"]
+        self.write("static/index.css", "body { margin: 0 }")
+        manifest = BuildManifest.load(self.manifest_path)
+        new_url = self.build(manifest).urls["/index.css"]
+        self.assertNotEqual(new_url, old_url)
+        self.assertEqual(manifest.prune(self.public), [self.public + old_url])
+
+    def test_unchanged_assets_are_not_hashed_again(self):
+        urls = self.build(BuildManifest(self.manifest_path)).urls
+        manifest = BuildManifest.load(self.manifest_path)
+        with mock.patch("build_manifest.hash_file") as hash_file:
+            self.assertEqual(self.build(manifest).urls, urls)
+        hash_file.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,10 +1,15 @@
+import io
 import re
+import sys
 import unittest
 
 from htmlnode import (
+    MEMO_MAX_TEXT_LENGTH,
     HTMLNode,
     LeafNode,
     ParentNode,
+    block_cache,
+    inline_cache,
     markdown_to_html_node,
     text_node_to_html_node,
 )
@@ -31,6 +36,17 @@ class TestHTMLNode(unittest.TestCase):
         expected = 'a="1" b="2"'
         self.assertEqual(actual, expected)
 
+    def test_slots(self):
+        nodes = [
+            HTMLNode("p", "hello"),
+            LeafNode("b", "bold"),
+            ParentNode("p", [LeafNode(None, "text")]),
+        ]
+        for node in nodes:
+            self.assertFalse(hasattr(node, "__dict__"))
+            with self.assertRaises(AttributeError):
+                node.extra = True
+
 
 class TestLeafNode(unittest.TestCase):
     def test_to_html_no_value(self):
@@ -128,6 +144,67 @@ class TestParentNode(unittest.TestCase):
             expected,
         )
 
+    def test_to_html_nested_node_without_children(self):
+        node = ParentNode("div", [LeafNode("b", "bold"), ParentNode("p", [])])
+        with self.assertRaises(ValueError) as ctx:
+            node.to_html()
+        self.assertEqual(str(ctx.exception), "children is required")
+
+    def test_to_html_with_many_siblings(self):
+        node = ParentNode("ul", [LeafNode("li", str(i)) for i in range(100_000)])
+        html = node.to_html()
+        self.assertTrue(html.startswith("<ul><li>0</li><li>1</li>"))
+        self.assertTrue(html.endswith("<li>99999</li></ul>"))
+
+    def test_to_html_with_deep_nesting(self):
+        depth = 10 * sys.getrecursionlimit()
+        node = LeafNode("b", "deep")
+        for _ in range(depth):
+            node = ParentNode("span", [node])
+        self.assertEqual(
+            node.to_html(),
+            "<span>" * depth + "<b>deep</b>" + "</span>" * depth,
+        )
+
+    def test_to_html_minified_with_deep_nesting(self):
+        # Linear in the depth, a quadratic walk would take minutes here
+        depth = 100000
+        node = LeafNode("b", "deep  text")
+        node = ParentNode("pre", [node, LeafNode(None, "  kept  ")])
+        for _ in range(depth):
+            node = ParentNode("span", [node, LeafNode(None, "  a  ")])
+        self.assertEqual(
+            node.to_html(minify=True),
+            "<span>" * depth
+            + "<pre><b>deep  text</b>  kept  </pre>"
+            + " a </span>" * depth,
+        )
+
+
+class TestIterHTML(unittest.TestCase):
+    def test_leaf_iter_html(self):
+        node = LeafNode("b", "bold")
+        self.assertListEqual(list(node.iter_html()), ["<b>bold</b>"])
+
+    def test_parent_iter_html_yields_chunks(self):
+        node = ParentNode(
+            "p", [LeafNode(None, "a "), ParentNode("i", [LeafNode("b", "c")])]
+        )
+        self.assertListEqual(
+            list(node.iter_html()),
+            ["<p>", "a ", "<i>", "<b>c</b>", "</i>", "</p>"],
+        )
+
+    def test_parent_iter_html_accepts_lazy_children(self):
+        node = ParentNode("ul", (LeafNode("li", str(i)) for i in range(2)))
+        self.assertEqual("".join(node.iter_html()), "<ul><li>0</li><li>1</li></ul>")
+
+    def test_write_html(self):
+        node = ParentNode("div", [LeafNode("a", "link", {"href": "/"})])
+        stream = io.StringIO()
+        node.write_html(stream)
+        self.assertEqual(stream.getvalue(), node.to_html())
+
 
 class TestTextNodeToHTMLNode(unittest.TestCase):
     def test_text_to_normal(self):
@@ -178,6 +255,13 @@ class TestMarkdownToHTMLNode(unittest.TestCase):
         html_node = markdown_to_html_node(markdown)
         self.assertRegex(html_node.to_html(), r"^<div>.+</div>$")
 
+    def test_should_accept_file_object(self):
+        markdown = "# Heading\n\nSome *text*\n"
+        self.assertEqual(
+            markdown_to_html_node(io.StringIO(markdown)).to_html(),
+            markdown_to_html_node(markdown).to_html(),
+        )
+
     def test_should_handle_different_html_headers(self):
         markdown = """
         # Heading 1
@@ -384,6 +468,38 @@ class TestMarkdownToHTMLNode(unittest.TestCase):
         )
 
 
+class TestMemoization(unittest.TestCase):
+    def setUp(self):
+        block_cache.clear()
+        inline_cache.clear()
+
+    def test_repeated_block_is_built_once(self):
+        footer = "Copyright **me**, see the [terms](/terms)"
+        hits = block_cache.hits
+        first = markdown_to_html_node(f"# One\n\n{footer}")
+        second = markdown_to_html_node(f"# Two\n\n{footer}")
+        self.assertIs(first.children[1], second.children[1])
+        self.assertIsNot(first.children[0], second.children[0])
+        self.assertEqual(block_cache.hits - hits, 1)
+
+    def test_repeated_inline_text_is_parsed_once(self):
+        hits = inline_cache.hits
+        first = markdown_to_html_node("- a **b**\n- c")
+        second = markdown_to_html_node("- c\n- a **b**")
+        self.assertEqual(
+            second.to_html(), "<div><ul><li>c</li><li>a <b>b</b></li></ul></div>"
+        )
+        first_bold = first.children[0].children[0].children[1]
+        second_bold = second.children[0].children[1].children[1]
+        self.assertIs(first_bold, second_bold)
+        self.assertEqual(inline_cache.hits - hits, 2)
+
+    def test_long_text_is_not_cached(self):
+        markdown_to_html_node("word " * MEMO_MAX_TEXT_LENGTH)
+        self.assertEqual(len(block_cache), 0)
+        self.assertEqual(len(inline_cache), 0)
+
+
 def prepare(node: str):
     return re.sub(
         r"\s{2,}",
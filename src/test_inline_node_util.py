@@ -1,3 +1,4 @@
+import sys
 import unittest
 
 from inline_node_util import (
@@ -164,6 +165,35 @@ class TestSplitNodesDelimiter(unittest.TestCase):
             ],
         )
 
+    def test_with_unclosed_star_after_double_star(self):
+        node = TextNode("2 * 3 is **six**", TextType.NORMAL)
+        new_nodes = split_nodes_delimiter([node], "*", TextType.ITALIC)
+        self.assertListEqual(new_nodes, [node])
+
+    def test_with_multiple_nodes(self):
+        nodes = [
+            TextNode("a `b` c", TextType.NORMAL),
+            TextNode("d `e", TextType.NORMAL),
+        ]
+        new_nodes = split_nodes_delimiter(nodes, "`", TextType.CODE)
+        self.assertListEqual(
+            new_nodes,
+            [
+                TextNode("a ", TextType.NORMAL),
+                TextNode("b", TextType.CODE),
+                TextNode(" c", TextType.NORMAL),
+                TextNode("d `e", TextType.NORMAL),
+            ],
+        )
+
+    def test_with_many_delimited_spans(self):
+        count = 10 * sys.getrecursionlimit()
+        node = TextNode("x `y` " * count, TextType.NORMAL)
+        new_nodes = split_nodes_delimiter([node], "`", TextType.CODE)
+        self.assertEqual(len(new_nodes), 2 * count + 1)
+        self.assertEqual(new_nodes[1], TextNode("y", TextType.CODE))
+        self.assertEqual(new_nodes[-1], TextNode(" ", TextType.NORMAL))
+
 
 class TestExtractMarkdownImages(unittest.TestCase):
     def test_extracting_markdown_images(self):
@@ -368,6 +398,29 @@ class TestSplitNodesLink(unittest.TestCase):
             ],
         )
 
+    def test_split_nodes_link_three_links(self):
+        nodes = [TextNode("[a](1) and [b](2) and [c](3)!", TextType.NORMAL)]
+        nodes = split_nodes_link(nodes)
+        self.assertListEqual(
+            nodes,
+            [
+                TextNode("a", TextType.LINK, "1"),
+                TextNode(" and ", TextType.NORMAL),
+                TextNode("b", TextType.LINK, "2"),
+                TextNode(" and ", TextType.NORMAL),
+                TextNode("c", TextType.LINK, "3"),
+                TextNode("!", TextType.NORMAL),
+            ],
+        )
+
+    def test_split_nodes_link_only_link(self):
+        nodes = split_nodes_link([TextNode("[a](1)", TextType.NORMAL)])
+        self.assertListEqual(nodes, [TextNode("a", TextType.LINK, "1")])
+
+    def test_split_nodes_link_skips_non_normal_nodes(self):
+        node = TextNode("[a](1)", TextType.CODE)
+        self.assertListEqual(split_nodes_link([node]), [node])
+
 
 class TestTextToTextnodes(unittest.TestCase):
     def test_contains_everything(self):
@@ -390,3 +443,64 @@ class TestTextToTextnodes(unittest.TestCase):
                 TextNode("link", TextType.LINK, "https://google.com"),
             ],
         )
+
+    def test_italic_with_nested_bold(self):
+        nodes = text_to_text_nodes(
+            "This is *an italic text with a **bolded word** inside*"
+        )
+        self.assertListEqual(
+            nodes,
+            [
+                TextNode("This is ", TextType.NORMAL),
+                TextNode("an italic text with a ", TextType.ITALIC),
+                TextNode("bolded word", TextType.BOLD),
+                TextNode(" inside", TextType.ITALIC),
+            ],
+        )
+
+    def test_bold_with_nested_italic(self):
+        nodes = text_to_text_nodes("**a *i* b**")
+        self.assertListEqual(
+            nodes,
+            [
+                TextNode("a ", TextType.BOLD),
+                TextNode("i", TextType.ITALIC),
+                TextNode(" b", TextType.BOLD),
+            ],
+        )
+
+    def test_empty_text(self):
+        self.assertListEqual(text_to_text_nodes(""), [TextNode("", TextType.NORMAL)])
+        self.assertListEqual(text_to_text_nodes("``"), [TextNode("", TextType.NORMAL)])
+
+    def test_unclosed_delimiters_are_literal(self):
+        nodes = text_to_text_nodes("2 * 3 is **six and `x")
+        self.assertListEqual(
+            nodes, [TextNode("2 * 3 is **six and `x", TextType.NORMAL)]
+        )
+
+    def test_markup_inside_code_is_literal(self):
+        nodes = text_to_text_nodes("run `ls *.md [a](b)` now")
+        self.assertListEqual(
+            nodes,
+            [
+                TextNode("run ", TextType.NORMAL),
+                TextNode("ls *.md [a](b)", TextType.CODE),
+                TextNode(" now", TextType.NORMAL),
+            ],
+        )
+
+    def test_many_links(self):
+        nodes = text_to_text_nodes("[a](1) [b](2) [c](3) ![d](4)")
+        self.assertListEqual(
+            nodes,
+            [
+                TextNode("a", TextType.LINK, "1"),
+                TextNode(" ", TextType.NORMAL),
+                TextNode("b", TextType.LINK, "2"),
+                TextNode(" ", TextType.NORMAL),
+                TextNode("c", TextType.LINK, "3"),
+                TextNode(" ", TextType.NORMAL),
+                TextNode("d", TextType.IMAGE, "4"),
+            ],
+        )
@@ -0,0 +1,93 @@
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from lru_cache import LRUCache
+
+
+class TestLRUCache(unittest.TestCase):
+    def test_get_and_put(self):
+        cache = LRUCache(2)
+        cache.put("a", 1)
+        self.assertEqual(cache.get("a"), 1)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("b", 0), 0)
+        self.assertEqual((cache.hits, cache.misses), (1, 2))
+
+    def test_evicts_least_recently_used(self):
+        cache = LRUCache(2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        cache.get("a")
+        cache.put("c", 3)
+        self.assertIn("a", cache)
+        self.assertNotIn("b", cache)
+        self.assertIn("c", cache)
+        self.assertEqual(len(cache), 2)
+
+    def test_put_refreshes_entry(self):
+        cache = LRUCache(2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        cache.put("a", 3)
+        cache.put("c", 4)
+        self.assertEqual(cache.get("a"), 3)
+        self.assertNotIn("b", cache)
+
+    def test_pop_and_clear(self):
+        cache = LRUCache()
+        cache.put("a", 1)
+        cache.put("b", 2)
+        self.assertEqual(cache.pop("a"), 1)
+        self.assertIsNone(cache.pop("a"))
+        cache.clear()
+        self.assertEqual(len(cache), 0)
+
+    def test_hit_rate(self):
+        cache = LRUCache()
+        self.assertEqual(cache.hit_rate(), 0.0)
+        cache.put("a", 1)
+        cache.get("a")
+        cache.get("b")
+        self.assertEqual(cache.hit_rate(), 0.5)
+
+    def test_bounded_by_size(self):
+        cache = LRUCache(10, size_of=lambda key, value: len(value))
+        cache.put("a", "aaaa")
+        cache.put("b", "bbbb")
+        cache.put("c", "cc")
+        self.assertEqual(cache.size, 10)
+        cache.put("d", "d")
+        self.assertNotIn("a", cache)
+        self.assertEqual(cache.size, 7)
+        cache.put("b", "b")
+        self.assertEqual(cache.size, 4)
+        cache.pop("c")
+        self.assertEqual(cache.size, 2)
+
+    def test_entry_bigger_than_maxsize_is_not_kept(self):
+        cache = LRUCache(4, size_of=lambda key, value: len(value))
+        cache.put("a", "a")
+        cache.put("b", "bbbbb")
+        self.assertNotIn("b", cache)
+        self.assertIn("a", cache)
+
+    def test_invalid_maxsize(self):
+        with self.assertRaises(ValueError):
+            LRUCache(0)
+
+    def test_threads(self):
+        cache = LRUCache(64)
+
+        def work(n):
+            for i in range(1000):
+                cache.put((n, i % 100), i)
+                cache.get((n, i % 50))
+
+        with ThreadPoolExecutor(8) as executor:
+            list(executor.map(work, range(8)))
+        self.assertEqual(len(cache), 64)
+        self.assertEqual(cache.hits + cache.misses, 8000)
+
+
+if __name__ == "__main__":
+    unittest.main()
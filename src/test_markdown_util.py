@@ -1,6 +1,25 @@
+import json
+import os
+import tempfile
 import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+from unittest import mock
 
-from markdown_util import extract_title
+from ast_cache import AstCache
+from build_manifest import BuildManifest
+from fingerprint import AssetManifest
+from markdown_util import (
+    PageResult,
+    cache_summary,
+    collect_pages,
+    extract_title,
+    generate_pages_recursive,
+    write_page,
+)
+from profiler import profiler
+from search_index import SearchIndex
+from template import Template
 
 
 class TestExtractTitle(unittest.TestCase):
@@ -12,3 +31,306 @@ class TestExtractTitle(unittest.TestCase):
     def test_with_title(self):
         title = extract_title("# This is the main title  ")
         self.assertEqual(title, "This is the main title")
+
+
+class TestWritePage(unittest.TestCase):
+    def test_open_error_is_raised(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            dest = os.path.join(tmp, "index.html")
+            template = Template.compile("{{ Title }}{{ Content }}")
+            with mock.patch("builtins.open", side_effect=PermissionError("denied")):
+                with self.assertRaisesRegex(PermissionError, "denied"):
+                    write_page(template, dest, "Home", "")
+            self.assertListEqual(os.listdir(tmp), [])
+
+
+class TestGeneratePagesRecursive(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.content = os.path.join(self.tmp.name, "content")
+        self.public = os.path.join(self.tmp.name, "public")
+        self.template = os.path.join(self.tmp.name, "template.html")
+        with open(self.template, "w") as template_file:
+            template_file.write("<title>{{ Title }}</title>{{ Content }}")
+        self.write("index.md", "# Home\n\nWelcome")
+        self.write("blog/first.md", "# First\n\nHello *world*")
+        self.write("blog/second.md", "# Second\n\nBye")
+        self.write("blog/notes.txt", "not a page")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, name: str, content: str):
+        path = os.path.join(self.content, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as file:
+            file.write(content)
+
+    def read(self, name: str) -> str:
+        with open(os.path.join(self.public, name)) as file:
+            return file.read()
+
+    def path(self, name: str) -> str:
+        return os.path.join(self.content, name)
+
+    def test_collect_pages_is_sorted(self):
+        pages = collect_pages(self.content, self.public)
+        self.assertListEqual(
+            [(page.src_path, page.dest_path) for page in pages],
+            [
+                (
+                    os.path.join(self.content, "blog", "first.md"),
+                    os.path.join(self.public, "blog", "first.html"),
+                ),
+                (
+                    os.path.join(self.content, "blog", "second.md"),
+                    os.path.join(self.public, "blog", "second.html"),
+                ),
+                (
+                    os.path.join(self.content, "index.md"),
+                    os.path.join(self.public, "index.html"),
+                ),
+            ],
+        )
+
+    def test_parallel_matches_serial(self):
+        with redirect_stdout(StringIO()):
+            generate_pages_recursive(self.content, self.template, self.public)
+        serial = [self.read("index.html"), self.read("blog/first.html")]
+
+        with redirect_stdout(StringIO()):
+            results = generate_pages_recursive(
+                self.content, self.template, self.public, jobs=2
+            )
+        self.assertListEqual([result.error for result in results], [None] * 3)
+        self.assertListEqual(
+            [self.read("index.html"), self.read("blog/first.html")], serial
+        )
+        self.assertEqual(
+            serial[1],
+            "<title>First</title><div><h1>First</h1><p>Hello <i>world</i></p></div>",
+        )
+
+    def test_failed_page_does_not_stop_build(self):
+        self.write("blog/first.md", "No title here")
+        output = StringIO()
+        with redirect_stdout(output):
+            results = generate_pages_recursive(
+                self.content, self.template, self.public, jobs=2
+            )
+
+        failed = [result for result in results if result.error is not None]
+        self.assertEqual(len(failed), 1)
+        self.assertEqual(
+            failed[0].src_path, os.path.join(self.content, "blog", "first.md")
+        )
+        self.assertIn("No title found", failed[0].error)
+        self.assertIn(f"Failed to generate {failed[0].src_path}", output.getvalue())
+        self.assertTrue(
+            os.path.exists(os.path.join(self.public, "blog", "second.html"))
+        )
+        self.assertTrue(os.path.exists(os.path.join(self.public, "index.html")))
+
+    def test_failed_page_keeps_previous_output(self):
+        manifest = BuildManifest(os.path.join(self.tmp.name, "manifest.json"))
+        with redirect_stdout(StringIO()):
+            generate_pages_recursive(self.content, self.template, self.public, manifest)
+        manifest.save()
+        previous = self.read("blog/first.html")
+
+        self.write("blog/first.md", "No title here")
+        manifest = BuildManifest.load(manifest.path)
+        with redirect_stdout(StringIO()):
+            generate_pages_recursive(self.content, self.template, self.public, manifest)
+        manifest.prune(self.public)
+        self.assertEqual(self.read("blog/first.html"), previous)
+
+        # Still retried on the next build
+        manifest.save()
+        manifest = BuildManifest.load(manifest.path)
+        with redirect_stdout(StringIO()):
+            results = generate_pages_recursive(
+                self.content, self.template, self.public, manifest
+            )
+        self.assertEqual(
+            [result.src_path for result in results], [self.path("blog/first.md")]
+        )
+
+    def test_fingerprinted_assets(self):
+        self.write("index.md", "# Home\n\n![logo](/logo.png) [home](/)")
+        assets = AssetManifest(
+            os.path.join(self.public, "asset-manifest.json"), self.public
+        )
+        assets.urls["/logo.png"] = "/logo.0123.png"
+        assets.save()
+        manifest = BuildManifest(os.path.join(self.tmp.name, "manifest.json"))
+        with redirect_stdout(StringIO()):
+            generate_pages_recursive(
+                self.content, self.template, self.public, manifest, assets=assets
+            )
+        self.assertEqual(
+            self.read("index.html"),
+            '<title>Home</title><div><h1>Home</h1><p><img src="/logo.0123.png" '
+            'alt="logo"></img> <a href="/">home</a></p></div>',
+        )
+
+        # A changed asset manifest makes every page stale
+        manifest.save()
+        manifest = BuildManifest.load(manifest.path)
+        assets.urls["/logo.png"] = "/logo.4567.png"
+        assets.save()
+        with redirect_stdout(StringIO()):
+            results = generate_pages_recursive(
+                self.content, self.template, self.public, manifest, assets=assets
+            )
+        self.assertEqual(len(results), 3)
+        self.assertIn("/logo.4567.png", self.read("index.html"))
+
+    def test_sitemap_and_search_index(self):
+        search_path = os.path.join(self.tmp.name, "search.json")
+        manifest = BuildManifest(os.path.join(self.tmp.name, "manifest.json"))
+        search_index = SearchIndex(search_path)
+        with redirect_stdout(StringIO()):
+            generate_pages_recursive(
+                self.content,
+                self.template,
+                self.public,
+                manifest,
+                jobs=2,
+                site_url="https://example.com",
+                search_index=search_index,
+            )
+        self.assertIn(
+            "<loc>https://example.com/blog/first.html</loc>", self.read("sitemap.xml")
+        )
+        with open(os.path.join(self.public, "search", "wo.json")) as shard:
+            self.assertEqual(json.load(shard), {"world": [[0, 1]]})
+        self.assertEqual(search_index.pages[self.path("index.md")]["title"], "Home")
+
+        # Unchanged pages aren't rendered again but stay in both
+        manifest.save()
+        search_index.save()
+        self.write("blog/second.md", "# Second\n\nHello again")
+        manifest = BuildManifest.load(manifest.path)
+        search_index = SearchIndex.load(search_path)
+        with redirect_stdout(StringIO()):
+            results = generate_pages_recursive(
+                self.content,
+                self.template,
+                self.public,
+                manifest,
+                site_url="https://example.com",
+                search_index=search_index,
+            )
+        self.assertEqual(
+            [result.src_path for result in results], [self.path("blog/second.md")]
+        )
+        self.assertEqual(self.read("sitemap.xml").count("<url>"), 3)
+        with open(os.path.join(self.public, "search", "he.json")) as shard:
+            self.assertEqual(json.load(shard), {"hello": [[0, 1], [1, 1]]})
+
+        # A page changed by a build without the search index is indexed again
+        manifest.save()
+        search_index.save()
+        self.write("blog/second.md", "# Second\n\nZebraword")
+        manifest = BuildManifest.load(manifest.path)
+        with redirect_stdout(StringIO()):
+            generate_pages_recursive(self.content, self.template, self.public, manifest)
+        manifest.save()
+        manifest = BuildManifest.load(manifest.path)
+        search_index = SearchIndex.load(search_path)
+        with redirect_stdout(StringIO()):
+            results = generate_pages_recursive(
+                self.content,
+                self.template,
+                self.public,
+                manifest,
+                site_url="https://example.com",
+                search_index=search_index,
+            )
+        self.assertEqual(
+            [result.src_path for result in results], [self.path("blog/second.md")]
+        )
+        with open(os.path.join(self.public, "search", "ze.json")) as shard:
+            self.assertEqual(json.load(shard), {"zebraword": [[1, 1]]})
+
+        # Without either, the next build prunes their files
+        manifest.save()
+        manifest = BuildManifest.load(manifest.path)
+        with redirect_stdout(StringIO()):
+            generate_pages_recursive(self.content, self.template, self.public, manifest)
+        manifest.prune(self.public)
+        self.assertFalse(os.path.exists(os.path.join(self.public, "sitemap.xml")))
+        self.assertFalse(os.path.exists(os.path.join(self.public, "search")))
+
+    def test_ast_cache_matches_parsing(self):
+        with redirect_stdout(StringIO()):
+            generate_pages_recursive(self.content, self.template, self.public)
+        parsed = self.read("blog/first.html")
+
+        ast_cache = AstCache(os.path.join(self.tmp.name, "ast"))
+        for jobs in [1, 2, 1]:
+            with redirect_stdout(StringIO()):
+                generate_pages_recursive(
+                    self.content,
+                    self.template,
+                    self.public,
+                    jobs=jobs,
+                    ast_cache=ast_cache,
+                )
+            self.assertEqual(self.read("blog/first.html"), parsed)
+        self.assertEqual(len(os.listdir(ast_cache.directory)), 3)
+        # Pool workers count their hits in their own copy of the cache
+        self.assertEqual(ast_cache.hits, 3)
+
+    def test_large_page_skips_ast_cache(self):
+        ast_cache = AstCache(os.path.join(self.tmp.name, "ast"), max_source_bytes=10)
+        with redirect_stdout(StringIO()):
+            generate_pages_recursive(
+                self.content, self.template, self.public, ast_cache=ast_cache
+            )
+        self.assertFalse(os.path.exists(ast_cache.directory))
+        self.assertIn("<i>world</i>", self.read("blog/first.html"))
+
+    def test_cache_counts_are_collected_from_workers(self):
+        footer = "Shared *footer*"
+        self.write("index.md", f"# Home\n\n{footer}")
+        self.write("blog/first.md", f"# First\n\n{footer}")
+        self.write("blog/second.md", f"# Second\n\n{footer}")
+        with redirect_stdout(StringIO()):
+            results = generate_pages_recursive(
+                self.content, self.template, self.public, jobs=2
+            )
+        for result in results:
+            self.assertEqual(set(result.cache_counts), {"Block", "Inline"})
+        block_lookups = sum(sum(result.cache_counts["Block"]) for result in results)
+        self.assertEqual(block_lookups, 6)
+
+        summary = cache_summary(
+            [
+                PageResult("a.md", "a.html", None, {"Block": (1, 3)}),
+                PageResult("b.md", "b.html", None, {"Block": (2, 2)}),
+                PageResult("c.md", "c.html", "failed"),
+            ]
+        )
+        self.assertEqual(summary, ["Block cache: 3 hits, 5 misses (37.5% hit rate)"])
+
+    def test_profile_collects_stages_from_workers(self):
+        profiler.reset()
+        profiler.enabled = True
+        try:
+            with redirect_stdout(StringIO()):
+                results = generate_pages_recursive(
+                    self.content, self.template, self.public, jobs=2
+                )
+            stats = profiler.snapshot()
+        finally:
+            profiler.enabled = False
+            profiler.reset()
+
+        for result in results:
+            self.assertGreater(result.seconds, 0)
+            self.assertEqual(result.stage_counts["generate_page"][0], 1)
+        self.assertEqual(stats["generate_page"][0], 3)
+        self.assertEqual(stats["generate_pages_recursive"][0], 1)
+        self.assertEqual(stats["iter_markdown_blocks"][0], 3)
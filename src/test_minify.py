@@ -0,0 +1,104 @@
+import unittest
+
+from htmlnode import LeafNode, ParentNode, markdown_to_html_node
+from minify import minify_template
+from template import Template
+
+
+class TestMinifyNodes(unittest.TestCase):
+    def test_collapses_whitespace_in_text(self):
+        node = ParentNode(
+            "p", [LeafNode(None, "two\n  lines"), LeafNode("b", " a  b ")]
+        )
+        self.assertEqual(node.to_html(minify=True), "<p>two lines<b> a b </b></p>")
+        self.assertEqual(node.to_html(), "<p>two\n  lines<b> a  b </b></p>")
+
+    def test_keeps_preformatted_text(self):
+        node = ParentNode(
+            "div",
+            [
+                LeafNode("pre", "def f():\n    return 1"),
+                ParentNode("pre", [LeafNode("b", "a  b"), LeafNode(None, "\n  x")]),
+                ParentNode("p", [LeafNode("code", "x  =  1"), LeafNode(None, " a  b")]),
+            ],
+        )
+        self.assertEqual(
+            node.to_html(minify=True),
+            "<div><pre>def f():\n    return 1</pre><pre><b>a  b</b>\n  x</pre>"
+            "<p><code>x  =  1</code> a b</div>",
+        )
+
+    def test_omits_optional_end_tags(self):
+        node = markdown_to_html_node("Intro\n\n- one\n- two\n\nOutro")
+        self.assertEqual(
+            node.to_html(minify=True),
+            "<div><p>Intro<ul><li>one<li>two</ul><p>Outro</div>",
+        )
+
+    def test_keeps_end_tag_before_text_and_inside_a(self):
+        node = ParentNode(
+            "div",
+            [
+                ParentNode("p", [LeafNode(None, "first")]),
+                LeafNode(None, "loose text"),
+                ParentNode("a", [ParentNode("p", [LeafNode(None, "link")])]),
+                ParentNode("p", [LeafNode(None, "before")]),
+                LeafNode("b", "inline"),
+            ],
+        )
+        self.assertEqual(
+            node.to_html(minify=True),
+            "<div><p>first</p>loose text<a><p>link</p></a><p>before</p><b>inline</b></div>",
+        )
+
+    def test_void_elements(self):
+        node = ParentNode("p", [LeafNode("img", "", {"src": "/a.png", "alt": "a"})])
+        self.assertEqual(node.to_html(minify=True), '<p><img src="/a.png" alt="a"></p>')
+
+    def test_streamed_children(self):
+        node = ParentNode("ul", iter([ParentNode("li", [LeafNode(None, "a")])]))
+        self.assertEqual(node.to_html(minify=True), "<ul><li>a</ul>")
+
+
+class TestMinifyTemplate(unittest.TestCase):
+    def test_minify_template(self):
+        source = """<!DOCTYPE html>
+<html>
+<!-- navigation goes here -->
+<head>
+    <title> {{ Title }} </title>
+</head>
+<body>
+    <pre>
+  keep   this
+</pre>
+    <article>
+        <span>a</span>   <span>b</span>
+        {{ Content }}
+    </article>
+</body>
+</html>
+"""
+        self.assertEqual(
+            minify_template(source),
+            "<!DOCTYPE html><html><head><title>{{ Title }}</title></head><body>"
+            "<pre>\n  keep   this\n</pre><article><span>a</span> <span>b</span> "
+            "{{ Content }}</article></body></html>",
+        )
+
+    def test_keeps_conditional_comments(self):
+        source = "<head><!--[if IE]><p>old</p><![endif]--></head>"
+        self.assertEqual(minify_template(source), source)
+
+    def test_template_minifies_content(self):
+        template = Template.compile(
+            "<main>\n  {{ Content }}\n</main>\n<!-- end -->", minify=True
+        )
+        content = ParentNode("ul", [ParentNode("li", [LeafNode(None, "a\n b")])])
+        self.assertEqual(
+            template.render(Content=content), "<main><ul><li>a b</ul></main>"
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,157 @@
+import json
+import os
+import tempfile
+import time
+import unittest
+from types import SimpleNamespace
+
+from profiler import (
+    Profiler,
+    build_report,
+    format_report,
+    profiler,
+    timed,
+    write_report,
+)
+
+
+@timed()
+def sleep_briefly():
+    time.sleep(0.01)
+
+
+@timed("outer")
+def outer():
+    sleep_briefly()
+    sleep_briefly()
+
+
+@timed()
+def count_up(n):
+    for i in range(n):
+        sleep_briefly()
+        yield i
+
+
+class TestTimed(unittest.TestCase):
+    def setUp(self):
+        profiler.reset()
+        profiler.enabled = True
+
+    def tearDown(self):
+        profiler.enabled = False
+        profiler.reset()
+
+    def test_disabled(self):
+        profiler.enabled = False
+        outer()
+        self.assertEqual(profiler.stats, {})
+
+    def test_counts_calls_and_time(self):
+        outer()
+        calls, total, own = profiler.snapshot()["sleep_briefly"]
+        self.assertEqual(calls, 2)
+        self.assertGreaterEqual(total, 0.02)
+        self.assertEqual(total, own)
+
+    def test_self_time_excludes_nested_stages(self):
+        outer()
+        calls, total, own = profiler.snapshot()["outer"]
+        self.assertEqual(calls, 1)
+        self.assertGreaterEqual(total, 0.02)
+        self.assertLess(own, 0.01)
+
+    def test_generator(self):
+        self.assertEqual(list(count_up(3)), [0, 1, 2])
+        calls, total, own = profiler.snapshot()["count_up"]
+        self.assertEqual(calls, 1)
+        self.assertGreaterEqual(total, 0.03)
+        self.assertLess(own, 0.01)
+        self.assertEqual(profiler.snapshot()["sleep_briefly"][0], 3)
+
+    def test_generator_closed_early(self):
+        numbers = count_up(3)
+        next(numbers)
+        numbers.close()
+        self.assertEqual(profiler.snapshot()["count_up"][0], 1)
+
+    def test_exception_still_counts(self):
+        @timed("failing")
+        def failing():
+            raise ValueError()
+
+        with self.assertRaises(ValueError):
+            failing()
+        self.assertEqual(profiler.snapshot()["failing"][0], 1)
+        with profiler.stage("after"):
+            pass
+        # The failed stage must not stay on the stack of running stages
+        self.assertEqual(profiler.snapshot()["after"][0], 1)
+
+
+class TestProfiler(unittest.TestCase):
+    def test_since_and_merge(self):
+        worker = Profiler()
+        worker.merge({"parse": (1, 0.5, 0.5)})
+        before = worker.snapshot()
+        worker.merge({"parse": (2, 1.0, 0.5), "write": (1, 0.25, 0.25)})
+        self.assertEqual(
+            worker.since(before),
+            {"parse": (2, 1.0, 0.5), "write": (1, 0.25, 0.25)},
+        )
+
+        main = Profiler()
+        main.merge(worker.since(before))
+        main.merge(worker.since(before))
+        self.assertEqual(main.snapshot()["parse"], (4, 2.0, 1.0))
+
+
+class TestReport(unittest.TestCase):
+    def setUp(self):
+        self.results = [
+            SimpleNamespace(
+                src_path="content/fast.md",
+                dest_path="public/fast.html",
+                error=None,
+                seconds=0.1,
+                stage_counts={"parse": (1, 0.05, 0.05)},
+            ),
+            SimpleNamespace(
+                src_path="content/slow.md",
+                dest_path="public/slow.html",
+                error=None,
+                seconds=0.5,
+                stage_counts=None,
+            ),
+        ]
+        stats = {"parse": (2, 0.3, 0.3), "build": (1, 1.0, 0.7)}
+        self.report = build_report(stats, self.results, 1.25, 2)
+
+    def test_build_report(self):
+        self.assertEqual(list(self.report["stages"]), ["build", "parse"])
+        self.assertEqual(
+            self.report["stages"]["parse"],
+            {"calls": 2, "seconds": 0.3, "self_seconds": 0.3},
+        )
+        self.assertEqual(
+            [page["src"] for page in self.report["pages"]],
+            ["content/slow.md", "content/fast.md"],
+        )
+        self.assertEqual(self.report["pages"][1]["stages"]["parse"]["calls"], 1)
+
+    def test_format_report(self):
+        lines = format_report(self.report, slowest=1)
+        self.assertTrue(lines[0].startswith("Profile: 1.250s wall, 2 jobs"))
+        self.assertIn("Slowest 1 pages:", lines)
+        self.assertEqual(lines[-1], "     0.500s  content/slow.md")
+
+    def test_write_report(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "reports", "profile.json")
+            write_report(path, self.report)
+            with open(path) as report_file:
+                self.assertEqual(json.load(report_file), self.report)
+
+
+if __name__ == "__main__":
+    unittest.main()
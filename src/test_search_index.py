@@ -0,0 +1,133 @@
+import json
+import os
+import tempfile
+import unittest
+from collections import Counter
+
+from htmlnode import LeafNode, ParentNode, markdown_to_html_node
+from search_index import SearchIndex, count_terms, page_url, tokenize
+
+
+class TestTerms(unittest.TestCase):
+    def test_tokenize(self):
+        self.assertEqual(
+            list(tokenize("Gandalf's staff, a 2nd x-ray!")),
+            ["gandalf", "staff", "2nd", "ray"],
+        )
+
+    def test_count_terms(self):
+        counts = Counter()
+        count_terms(
+            markdown_to_html_node(
+                "# Frodo\n\nFrodo and *Sam*\n\n```\nskipped code\n```"
+            ),
+            counts,
+        )
+        self.assertEqual(counts, {"frodo": 2, "and": 1, "sam": 1})
+
+    def test_count_terms_deep_tree(self):
+        node = LeafNode(None, "deep")
+        for _ in range(5000):
+            node = ParentNode("div", [node])
+        counts = Counter()
+        count_terms(node, counts)
+        self.assertEqual(counts, {"deep": 1})
+
+    def test_page_url(self):
+        public = os.path.join("public")
+        self.assertEqual(page_url(os.path.join(public, "index.html"), public), "/")
+        self.assertEqual(
+            page_url(os.path.join(public, "blog", "index.html"), public), "/blog/"
+        )
+        self.assertEqual(
+            page_url(os.path.join(public, "blog", "post.html"), public),
+            "/blog/post.html",
+        )
+
+
+class TestSearchIndex(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.public = os.path.join(self.tmp.name, "public")
+        self.path = os.path.join(self.tmp.name, "search.json")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def read(self, name: str):
+        with open(os.path.join(self.public, "search", name)) as shard:
+            return json.load(shard)
+
+    def test_writes_shards_by_prefix(self):
+        index = SearchIndex(self.path)
+        index.update("a.md", "/a.html", "A", {"gandalf": 2, "galadriel": 1})
+        index.update("b.md", "/b.html", "B", {"gandalf": 1, "sam": 3})
+        index.write(self.public)
+        self.assertEqual(
+            self.read("pages.json"),
+            {"prefix_length": 2, "pages": [["/a.html", "A"], ["/b.html", "B"]]},
+        )
+        self.assertEqual(
+            self.read("ga.json"),
+            {"galadriel": [[0, 1]], "gandalf": [[0, 2], [1, 1]]},
+        )
+        self.assertEqual(self.read("sa.json"), {"sam": [[1, 3]]})
+        search_dir = os.path.join(self.public, "search")
+        self.assertEqual(
+            index.paths(self.public),
+            [
+                os.path.join(search_dir, name)
+                for name in ["ga.json", "pages.json", "sa.json"]
+            ],
+        )
+
+    def test_only_changed_shards_are_written(self):
+        index = SearchIndex(self.path)
+        index.update("a.md", "/a.html", "A", {"gandalf": 1, "sam": 1})
+        index.write(self.public)
+        index.save()
+
+        index = SearchIndex.load(self.path)
+        index.update("a.md", "/a.html", "A", {"gandalf": 1, "sam": 2})
+        written = index.write(self.public)
+        self.assertEqual(written, [os.path.join(self.public, "search", "sa.json")])
+
+    def test_removed_pages_and_shards(self):
+        index = SearchIndex(self.path)
+        index.update("a.md", "/a.html", "A", {"gandalf": 1})
+        index.update("b.md", "/b.html", "B", {"sam": 1})
+        index.update("c.md", "/c.html", "C", {"sam": 1})
+        index.write(self.public)
+
+        index.retain(["b.md", "c.md"])
+        index.write(self.public)
+        # Ids stay put while most pages remain
+        self.assertEqual(self.read("pages.json")["pages"][0], None)
+        self.assertEqual(self.read("sa.json"), {"sam": [[1, 1], [2, 1]]})
+        self.assertFalse(os.path.exists(os.path.join(self.public, "search", "ga.json")))
+
+        index.retain(["c.md"])
+        index.write(self.public)
+        self.assertEqual(self.read("pages.json")["pages"], [["/c.html", "C"]])
+        self.assertEqual(self.read("sa.json"), {"sam": [[0, 1]]})
+
+    def test_page_keeps_its_id(self):
+        index = SearchIndex(self.path)
+        index.update("b.md", "/b.html", "B", {})
+        index.update("a.md", "/a.html", "A", {})
+        index.update("b.md", "/b.html", "B again", {})
+        self.assertEqual(index.pages["b.md"]["id"], 0)
+        self.assertEqual(index.pages["a.md"]["id"], 1)
+
+    def test_rewrites_missing_files(self):
+        index = SearchIndex(self.path)
+        index.update("a.md", "/a.html", "A", {"sam": 1})
+        index.write(self.public)
+        os.remove(os.path.join(self.public, "search", "sa.json"))
+        self.assertEqual(
+            index.write(self.public), [os.path.join(self.public, "search", "sa.json")]
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,183 @@
+import asyncio
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+from typing import Dict, Tuple
+
+from server import RELOAD_SCRIPT, DevServer, inject_reload_script, resolve_path
+
+TEMPLATE = "<title>{{ Title }}</title><body>{{ Content }}</body>"
+
+
+class TestHelpers(unittest.TestCase):
+    def test_inject_reload_script(self):
+        self.assertEqual(
+            inject_reload_script("<body><p>hi</p></body>"),
+            f"<body><p>hi</p>{RELOAD_SCRIPT}</body>",
+        )
+        self.assertEqual(inject_reload_script("<p>hi</p>"), f"<p>hi</p>{RELOAD_SCRIPT}")
+
+    def test_resolve_path(self):
+        self.assertEqual(resolve_path("static", "/index.css"), "static/index.css")
+        self.assertEqual(resolve_path("static", "/a/../b.css"), "static/b.css")
+        self.assertEqual(resolve_path("static", "/a%20b.css"), "static/a b.css")
+        self.assertIsNone(resolve_path("static", "/../main.py"))
+        self.assertIsNone(resolve_path("static", "/%2e%2e/main.py"))
+        self.assertIsNone(resolve_path("static", "/a%00.css"))
+
+
+class TestDevServer(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        os.makedirs(self.path("content/blog"))
+        os.makedirs(self.path("static"))
+        self.write("template.html", TEMPLATE)
+        self.write("content/index.md", "# Home\n\nwelcome")
+        self.write("content/blog/index.md", "# Blog\n\nposts")
+        self.write("static/index.css", "body {}")
+        self.server = DevServer(
+            self.path("content"),
+            self.path("static"),
+            self.path("template.html"),
+            port=0,
+            polling=True,
+        )
+        self.enterContext(redirect_stdout(StringIO()))
+        await self.server.start()
+
+    async def asyncTearDown(self):
+        await self.server.stop()
+        self.tmp.cleanup()
+
+    def path(self, name: str) -> str:
+        return os.path.join(self.tmp.name, name)
+
+    def write(self, name: str, content: str):
+        with open(self.path(name), "w") as file:
+            file.write(content)
+
+    async def get(
+        self, target: str, method: str = "GET"
+    ) -> Tuple[int, Dict[str, str], bytes]:
+        reader, writer = await asyncio.open_connection("127.0.0.1", self.server.port)
+        writer.write(f"{method} {target} HTTP/1.1\r\nHost: test\r\n\r\n".encode())
+        try:
+            return await self.read_response(reader, method == "HEAD")
+        finally:
+            writer.close()
+
+    async def read_response(
+        self, reader: asyncio.StreamReader, head: bool = False
+    ) -> Tuple[int, Dict[str, str], bytes]:
+        status = int((await reader.readline()).split()[1])
+        headers = {}
+        while (line := await reader.readline()) != b"\r\n":
+            name, _, value = line.decode().partition(":")
+            headers[name.lower()] = value.strip()
+        length = 0 if head else int(headers["content-length"])
+        return status, headers, await reader.readexactly(length)
+
+    async def test_page(self):
+        status, headers, body = await self.get("/")
+        self.assertEqual(status, 200)
+        self.assertEqual(headers["content-type"], "text/html; charset=utf-8")
+        self.assertEqual(
+            body.decode(),
+            "<title>Home</title><body><div><h1>Home</h1><p>welcome</p></div>"
+            f"{RELOAD_SCRIPT}</body>",
+        )
+
+    async def test_page_paths(self):
+        status, _, body = await self.get("/blog/")
+        self.assertEqual(status, 200)
+        self.assertIn(b"<h1>Blog</h1>", body)
+        status, _, _ = await self.get("/blog/index.html")
+        self.assertEqual(status, 200)
+        status, headers, _ = await self.get("/blog")
+        self.assertEqual(status, 301)
+        self.assertEqual(headers["location"], "/blog/")
+
+    async def test_static_file(self):
+        status, headers, body = await self.get("/index.css")
+        self.assertEqual(status, 200)
+        self.assertEqual(headers["content-type"], "text/css")
+        self.assertEqual(body, b"body {}")
+
+    async def test_head(self):
+        status, headers, body = await self.get("/index.css", "HEAD")
+        self.assertEqual(status, 200)
+        self.assertEqual(headers["content-length"], "7")
+        self.assertEqual(body, b"")
+
+    async def test_not_found(self):
+        self.assertEqual((await self.get("/missing/"))[0], 404)
+        self.assertEqual((await self.get("/../template.html"))[0], 404)
+        self.assertEqual((await self.get("/", "POST"))[0], 405)
+
+    async def test_rendered_page_is_cached_until_modified(self):
+        await self.get("/")
+        await self.get("/")
+        self.assertEqual((self.server.pages.hits, self.server.pages.misses), (1, 1))
+
+        self.write("content/index.md", "# Home\n\nchanged")
+        os.utime(self.path("content/index.md"), ns=(0, 1))
+        _, _, body = await self.get("/")
+        self.assertIn(b"<p>changed</p>", body)
+
+    async def test_template_change(self):
+        await self.get("/")
+        self.write("template.html", "<h2>{{ Title }}</h2>{{ Content }}")
+        os.utime(self.path("template.html"), ns=(0, 1))
+        _, _, body = await self.get("/")
+        self.assertTrue(body.startswith(b"<h2>Home</h2>"))
+
+    async def test_failed_page(self):
+        self.write("content/index.md", "no title")
+        status, _, body = await self.get("/")
+        self.assertEqual(status, 500)
+        self.assertIn(b"No title found", body)
+        self.assertIn(RELOAD_SCRIPT.encode(), body)
+
+    async def test_keep_alive(self):
+        reader, writer = await asyncio.open_connection("127.0.0.1", self.server.port)
+        try:
+            for target in ["/", "/index.css", "/blog/"]:
+                writer.write(f"GET {target} HTTP/1.1\r\n\r\n".encode())
+                status, _, _ = await self.read_response(reader)
+                self.assertEqual(status, 200)
+        finally:
+            writer.close()
+
+    async def test_bad_request(self):
+        reader, writer = await asyncio.open_connection("127.0.0.1", self.server.port)
+        writer.write(b"nonsense\r\n\r\n")
+        status, headers, _ = await self.read_response(reader)
+        self.assertEqual(status, 400)
+        self.assertEqual(headers["connection"], "close")
+        writer.close()
+
+    async def test_concurrent_requests(self):
+        results = await asyncio.gather(*[self.get("/blog/") for _ in range(20)])
+        self.assertEqual({status for status, _, _ in results}, {200})
+
+    async def test_reload_event(self):
+        reader, writer = await asyncio.open_connection("127.0.0.1", self.server.port)
+        try:
+            writer.write(b"GET /__reload HTTP/1.1\r\n\r\n")
+            self.assertIn(b"200", await reader.readline())
+            while await reader.readline() != b"\r\n":
+                pass
+            self.assertEqual(await reader.readline(), b"retry: 500\n")
+            await reader.readline()
+
+            self.write("content/index.md", "# Home\n\nchanged")
+            event = await asyncio.wait_for(reader.readline(), 5)
+            self.assertEqual(event, b"data: reload\n")
+        finally:
+            writer.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,102 @@
+import os
+import sys
+import tempfile
+import unittest
+
+from site_index import SiteFile, SiteIndex, collect_pages, is_within, scan_tree
+
+
+class TestIsWithin(unittest.TestCase):
+    def test_is_within(self):
+        content = os.path.join("site", "content")
+        self.assertTrue(is_within(content, content))
+        self.assertTrue(is_within(os.path.join(content, "a.md"), content))
+        self.assertFalse(is_within(content + "-old", content))
+        self.assertFalse(is_within("site", content))
+
+
+class TestSiteIndex(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.content = os.path.join(self.tmp.name, "content")
+        self.static = os.path.join(self.tmp.name, "static")
+        self.public = os.path.join(self.tmp.name, "public")
+        self.write("content/index.md", "# Home")
+        self.write("content/blog/first.md", "# First")
+        self.write("content/blog/notes.txt", "not a page")
+        self.write("static/index.css", "body {}")
+        self.write("static/images/logo.png", "png")
+        os.makedirs(os.path.join(self.static, "fonts"))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, name: str, content: str):
+        path = os.path.join(self.tmp.name, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as file:
+            file.write(content)
+
+    def test_scan(self):
+        index = SiteIndex.scan(self.content, self.static, self.public)
+        self.assertListEqual(
+            [(page.src_path, page.dest_path) for page in index.pages],
+            [
+                (
+                    os.path.join(self.content, "blog", "first.md"),
+                    os.path.join(self.public, "blog", "first.html"),
+                ),
+                (
+                    os.path.join(self.content, "index.md"),
+                    os.path.join(self.public, "index.html"),
+                ),
+            ],
+        )
+        self.assertListEqual(
+            [file.dest_path for file in index.static_files],
+            [
+                os.path.join(self.public, "images", "logo.png"),
+                os.path.join(self.public, "index.css"),
+            ],
+        )
+        self.assertListEqual(
+            index.static_dirs,
+            [
+                self.public,
+                os.path.join(self.public, "fonts"),
+                os.path.join(self.public, "images"),
+            ],
+        )
+
+    def test_records_size_and_mtime(self):
+        _, files = scan_tree(self.static, self.public)
+        stat = os.stat(os.path.join(self.static, "index.css"))
+        self.assertEqual(
+            files[1],
+            SiteFile(
+                os.path.join(self.static, "index.css"),
+                os.path.join(self.public, "index.css"),
+                stat.st_size,
+                stat.st_mtime_ns,
+            ),
+        )
+
+    def test_deeper_than_the_recursion_limit(self):
+        path = os.path.join(self.content, *["d"] * 200)
+        os.makedirs(path)
+        with open(os.path.join(path, "deep.md"), "w") as file:
+            file.write("# Deep")
+        # Lowered rather than nesting past the real limit, which os.makedirs and
+        # shutil.rmtree would hit themselves
+        limit = sys.getrecursionlimit()
+        sys.setrecursionlimit(100)
+        try:
+            pages = collect_pages(self.content, self.public)
+        finally:
+            sys.setrecursionlimit(limit)
+        self.assertEqual(len(pages), 3)
+        self.assertEqual(pages[1].src_path, os.path.join(path, "deep.md"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,94 @@
+import os
+import tempfile
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from site_renderer import Site
+
+TEMPLATE = "<title>{{ Title }}</title><body>{{ Content }}</body>"
+
+
+class TestSite(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        os.makedirs(self.path("content/blog"))
+        self.write("template.html", TEMPLATE)
+        self.write("content/index.md", "# Home\n\nwelcome")
+        self.write("content/blog/index.md", "# Blog\n\nposts")
+        self.write("content/blog/first.md", "# First\n\npost")
+        self.site = Site(self.path("content"), self.path("template.html"))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def path(self, name: str) -> str:
+        return os.path.join(self.tmp.name, name)
+
+    def write(self, name: str, content: str):
+        with open(self.path(name), "w") as file:
+            file.write(content)
+
+    def test_render(self):
+        self.assertEqual(
+            self.site.render("/"),
+            "<title>Home</title><body><div><h1>Home</h1><p>welcome</p></div></body>",
+        )
+        self.assertIn("<h1>Blog</h1>", self.site.render("/blog/"))
+        self.assertIn("<h1>First</h1>", self.site.render("/blog/first.html"))
+
+    def test_missing_page(self):
+        self.assertIsNone(self.site.render("/missing.html"))
+        self.assertIsNone(self.site.render("/blog"))
+        self.assertIsNone(self.site.render("/../template.html"))
+        self.assertTrue(self.site.is_page_directory("/blog"))
+
+    def test_urls_are_indexed_lazily(self):
+        self.site.render("/")
+        self.write("content/about.md", "# About\n\nus")
+        self.assertEqual(
+            self.site.urls(), ["/", "/about.html", "/blog/", "/blog/first.html"]
+        )
+
+        self.write("content/later.md", "# Later\n\npage")
+        os.remove(self.path("content/about.md"))
+        self.assertIsNotNone(self.site.render("/later.html"))
+        self.assertIsNone(self.site.render("/about.html"))
+        self.assertEqual(
+            self.site.urls(), ["/", "/blog/", "/blog/first.html", "/later.html"]
+        )
+
+    def test_cached_until_modified(self):
+        self.site.render("/")
+        self.site.render("/")
+        self.assertEqual((self.site.pages.hits, self.site.pages.misses), (1, 1))
+
+        self.write("content/index.md", "# Home\n\nchanged")
+        os.utime(self.path("content/index.md"), ns=(0, 1))
+        self.assertIn("<p>changed</p>", self.site.render("/"))
+
+        self.write("template.html", "<h2>{{ Title }}</h2>{{ Content }}")
+        os.utime(self.path("template.html"), ns=(0, 1))
+        self.assertTrue(self.site.render("/").startswith("<h2>Home</h2>"))
+
+    def test_cache_is_bounded(self):
+        site = Site(self.path("content"), self.path("template.html"), cache_size=2)
+        for url in ["/", "/blog/", "/blog/first.html"]:
+            site.render(url)
+        self.assertEqual(len(site.pages), 2)
+
+    def test_concurrent_renders(self):
+        urls = ["/", "/blog/", "/blog/first.html"] * 20
+        expected = [self.site.render(url) for url in urls]
+        self.site.pages.clear()
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            self.assertEqual(list(executor.map(self.site.render, urls)), expected)
+        self.assertLessEqual(len(self.site.pages), 3)
+
+    def test_failed_page(self):
+        self.write("content/index.md", "no title")
+        with self.assertRaisesRegex(Exception, "No title found"):
+            self.site.render("/")
+
+
+if __name__ == "__main__":
+    unittest.main()
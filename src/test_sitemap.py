@@ -0,0 +1,65 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from sitemap import write_sitemap
+
+# 2024-01-02 in nanoseconds
+MTIME_NS = 1704153600 * 10**9
+
+
+class TestSitemap(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.public = self.tmp.name
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def read(self, name: str) -> str:
+        with open(os.path.join(self.public, name)) as sitemap_file:
+            return sitemap_file.read()
+
+    def test_write_sitemap(self):
+        paths = write_sitemap(
+            self.public,
+            "https://example.com/",
+            [("/blog/a&b.html", MTIME_NS), ("/", MTIME_NS)],
+        )
+        self.assertEqual(paths, [os.path.join(self.public, "sitemap.xml")])
+        self.assertEqual(
+            self.read("sitemap.xml"),
+            '<?xml version="1.0" encoding="UTF-8"?>\n'
+            '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+            "<url><loc>https://example.com/</loc><lastmod>2024-01-02</lastmod></url>\n"
+            "<url><loc>https://example.com/blog/a&amp;b.html</loc>"
+            "<lastmod>2024-01-02</lastmod></url>\n"
+            "</urlset>\n",
+        )
+
+    def test_unchanged_sitemap_is_not_written(self):
+        path = write_sitemap(self.public, "https://example.com", [("/", MTIME_NS)])[0]
+        os.utime(path, ns=(1, 1))
+        write_sitemap(self.public, "https://example.com", [("/", MTIME_NS)])
+        self.assertEqual(os.stat(path).st_mtime_ns, 1)
+        write_sitemap(self.public, "https://example.com", [("/a.html", MTIME_NS)])
+        self.assertNotEqual(os.stat(path).st_mtime_ns, 1)
+
+    def test_large_sites_get_a_sitemap_index(self):
+        pages = [(f"/{i}.html", MTIME_NS) for i in range(5)]
+        with mock.patch("sitemap.MAX_URLS_PER_SITEMAP", 2):
+            paths = write_sitemap(self.public, "https://example.com", pages)
+        self.assertEqual(
+            [os.path.basename(path) for path in paths],
+            ["sitemap-1.xml", "sitemap-2.xml", "sitemap-3.xml", "sitemap.xml"],
+        )
+        self.assertIn(
+            "<sitemap><loc>https://example.com/sitemap-3.xml</loc></sitemap>",
+            self.read("sitemap.xml"),
+        )
+        self.assertEqual(self.read("sitemap-3.xml").count("<url>"), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,133 @@
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+from unittest import mock
+
+from build_manifest import BuildManifest
+from site_index import SiteIndex
+from static_util import CopyStats, clone_file, copy_files, is_up_to_date
+
+
+class TestCopyFiles(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.static = os.path.join(self.tmp.name, "static")
+        self.public = os.path.join(self.tmp.name, "public")
+        os.makedirs(os.path.join(self.static, "images"))
+        os.makedirs(self.public)
+        self.write("static/index.css", "body {}")
+        self.write("static/images/logo.png", "png")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, name: str, content: str):
+        with open(os.path.join(self.tmp.name, name), "w") as file:
+            file.write(content)
+
+    def read(self, name: str) -> str:
+        with open(os.path.join(self.tmp.name, name)) as file:
+            return file.read()
+
+    def sync(self, manifest: BuildManifest | None = None) -> CopyStats:
+        with redirect_stdout(StringIO()):
+            return copy_files(self.static, self.public, manifest, jobs=4)
+
+    def test_copies_new_files(self):
+        stats = self.sync()
+        self.assertEqual(stats.files_copied, 2)
+        self.assertEqual(stats.bytes_copied, len("body {}") + len("png"))
+        self.assertEqual(self.read("public/index.css"), "body {}")
+        self.assertEqual(self.read("public/images/logo.png"), "png")
+
+    def test_skips_unchanged_files(self):
+        self.sync()
+        stats = self.sync()
+        self.assertEqual(stats.files_copied, 0)
+        self.assertEqual(stats.files_unchanged, 2)
+
+    def test_replaces_changed_files(self):
+        with mock.patch("os.link", side_effect=OSError):
+            self.sync()
+        self.write("static/index.css", "body { margin: 0 }")
+        stats = self.sync()
+        self.assertEqual(stats.files_copied, 1)
+        self.assertEqual(stats.files_unchanged, 1)
+        self.assertEqual(self.read("public/index.css"), "body { margin: 0 }")
+
+    def test_uses_site_index(self):
+        self.sync()
+        content = os.path.join(self.tmp.name, "content")
+        os.makedirs(content)
+        index = SiteIndex.scan(content, self.static, self.public)
+        with mock.patch("os.stat", wraps=os.stat) as stat:
+            with redirect_stdout(StringIO()):
+                stats = copy_files(self.static, self.public, jobs=4, index=index)
+        self.assertEqual(stats.files_unchanged, 2)
+        # Only the destinations are stat'ed, the index knows the sources
+        stat_paths = [call.args[0] for call in stat.call_args_list]
+        self.assertFalse([path for path in stat_paths if path.startswith(self.static)])
+        self.assertIn(os.path.join(self.public, "index.css"), stat_paths)
+
+    def test_creates_empty_directories(self):
+        os.makedirs(os.path.join(self.static, "fonts", "empty"))
+        self.sync()
+        self.assertTrue(os.path.isdir(os.path.join(self.public, "fonts", "empty")))
+
+    def test_records_files_for_pruning(self):
+        manifest_path = os.path.join(self.tmp.name, "manifest.json")
+        manifest = BuildManifest(manifest_path)
+        self.sync(manifest)
+        manifest.save()
+
+        os.remove(os.path.join(self.static, "images", "logo.png"))
+        manifest = BuildManifest.load(manifest_path)
+        self.sync(manifest)
+        removed = manifest.prune(self.public)
+        self.assertListEqual(removed, [os.path.join(self.public, "images", "logo.png")])
+        self.assertTrue(os.path.exists(os.path.join(self.public, "index.css")))
+
+
+class TestCopyStats(unittest.TestCase):
+    def test_summary(self):
+        stats = CopyStats(4, 6, 3 * 1024 * 1024, 2.0)
+        self.assertEqual(
+            stats.summary(),
+            "Synced static files: 4 copied (3.0 MiB), 6 unchanged in 2.00s"
+            " (2.0 files/s, 1.5 MiB/s)",
+        )
+
+
+class TestCloneFile(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.src = os.path.join(self.tmp.name, "src.txt")
+        self.dest = os.path.join(self.tmp.name, "dest.txt")
+        with open(self.src, "w") as file:
+            file.write("content")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_falls_back_to_copy(self):
+        with mock.patch("static_util.reflink_file", return_value=False):
+            with mock.patch("os.link", side_effect=OSError):
+                self.assertEqual(clone_file(self.src, self.dest), "copied")
+        self.assertFalse(os.path.samefile(self.src, self.dest))
+        self.assertTrue(is_up_to_date(self.src, self.dest))
+
+    def test_hard_link(self):
+        with mock.patch("static_util.reflink_file", return_value=False):
+            self.assertEqual(clone_file(self.src, self.dest), "linked")
+        self.assertTrue(os.path.samefile(self.src, self.dest))
+        self.assertTrue(is_up_to_date(self.src, self.dest))
+
+    def test_replaces_existing_destination(self):
+        with open(self.dest, "w") as file:
+            file.write("stale")
+        self.assertFalse(is_up_to_date(self.src, self.dest))
+        clone_file(self.src, self.dest)
+        with open(self.dest) as file:
+            self.assertEqual(file.read(), "content")
@@ -0,0 +1,62 @@
+import io
+import unittest
+
+from htmlnode import LeafNode, ParentNode
+from template import Template
+
+
+class TestTemplate(unittest.TestCase):
+    def test_compile_splits_literals_and_slots(self):
+        template = Template.compile(
+            "<title>{{ Title }}</title><main>{{ Content }}</main>"
+        )
+        self.assertListEqual(
+            template.literals, ["<title>", "</title><main>", "</main>"]
+        )
+        self.assertListEqual(template.slots, ["Title", "Content"])
+
+    def test_compile_without_placeholders(self):
+        template = Template.compile("<p>static</p>")
+        self.assertListEqual(template.literals, ["<p>static</p>"])
+        self.assertListEqual(template.slots, [])
+        self.assertEqual(template.render(), "<p>static</p>")
+
+    def test_compile_unknown_placeholder(self):
+        with self.assertRaises(ValueError) as ctx:
+            Template.compile("<title>{{ Title }}</title>{{ Footer }}")
+        self.assertEqual(
+            str(ctx.exception), "Unknown placeholder {{ Footer }} in template"
+        )
+
+    def test_render(self):
+        template = Template.compile("<title> {{ Title }} </title>{{Content}}")
+        self.assertEqual(
+            template.render(Title="Home", Content="<p>hi</p>"),
+            "<title> Home </title><p>hi</p>",
+        )
+
+    def test_render_repeated_slot(self):
+        template = Template.compile("<h1>{{ Title }}</h1><title>{{ Title }}</title>")
+        self.assertEqual(
+            template.render(Title="Home"), "<h1>Home</h1><title>Home</title>"
+        )
+
+    def test_render_missing_value(self):
+        template = Template.compile("{{ Title }}{{ Content }}")
+        with self.assertRaises(ValueError) as ctx:
+            template.render(Title="Home")
+        self.assertEqual(str(ctx.exception), "Missing value for Content")
+
+    def test_render_html_node(self):
+        template = Template.compile("<main>{{ Content }}</main>")
+        content = ParentNode("p", [LeafNode("b", "bold")])
+        self.assertEqual(
+            template.render(Content=content), "<main><p><b>bold</b></p></main>"
+        )
+
+    def test_write_streams_chunks(self):
+        template = Template.compile("<title>{{ Title }}</title>{{ Content }}")
+        content = ParentNode("p", [LeafNode(None, "hi")])
+        stream = io.StringIO()
+        template.write(stream, Title="Home", Content=content)
+        self.assertEqual(stream.getvalue(), "<title>Home</title><p>hi</p>")
@@ -19,6 +19,14 @@ class TestTextNode(unittest.TestCase):
         node2 = TextNode("url1", TextType.LINK, "http://some-url.com")
         self.assertEqual(node, node2)
 
+    def test_slots(self):
+        node = TextNode("url1", TextType.LINK, "http://some-url.com")
+        self.assertFalse(hasattr(node, "__dict__"))
+        node.url = "http://other-url.com"
+        self.assertEqual(node, TextNode("url1", TextType.LINK, "http://other-url.com"))
+        with self.assertRaises(AttributeError):
+            node.extra = True
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,171 @@
+import os
+import sys
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+from unittest import mock
+
+from markdown_util import write_page
+from watch import InotifyWatcher, PollingWatcher, WatchSession
+
+TEMPLATE = "<title>{{ Title }}</title><main>{{ Content }}</main>"
+
+
+class TestWatchSession(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        os.makedirs(self.path("content/blog"))
+        os.makedirs(self.path("static"))
+        self.write("template.html", TEMPLATE)
+        self.write("content/index.md", "# Home\n\nwelcome")
+        self.write("content/blog/index.md", "# Blog\n\nposts")
+        self.write("static/index.css", "body {}")
+        self.session = WatchSession(
+            self.path("content"),
+            self.path("static"),
+            self.path("template.html"),
+            self.path("public"),
+        )
+        self.run_quietly(self.session.build_all)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def path(self, name: str) -> str:
+        return os.path.join(self.tmp.name, name)
+
+    def write(self, name: str, content: str):
+        with open(self.path(name), "w") as file:
+            file.write(content)
+
+    def read(self, name: str) -> str:
+        with open(self.path(name)) as file:
+            return file.read()
+
+    def run_quietly(self, function, *args):
+        with redirect_stdout(StringIO()):
+            function(*args)
+
+    def test_build_all(self):
+        self.assertEqual(
+            self.read("public/index.html"),
+            "<title>Home</title><main><div><h1>Home</h1><p>welcome</p></div></main>",
+        )
+        self.assertTrue(os.path.isfile(self.path("public/blog/index.html")))
+        self.assertEqual(self.read("public/index.css"), "body {}")
+
+    def test_changed_page_is_rebuilt_alone(self):
+        self.write("content/index.md", "# Home\n\nchanged")
+        with mock.patch("watch.write_page", wraps=write_page) as write:
+            self.run_quietly(self.session.apply, [self.path("content/index.md")], [])
+        self.assertEqual(write.call_count, 1)
+        self.assertIn("<p>changed</p>", self.read("public/index.html"))
+
+    def test_template_change_reuses_parsed_pages(self):
+        self.write("template.html", "<h2>{{ Title }}</h2>{{ Content }}")
+        with mock.patch("watch.parse_page") as parse_page:
+            self.run_quietly(self.session.apply, [self.path("template.html")], [])
+        parse_page.assert_not_called()
+        self.assertTrue(self.read("public/index.html").startswith("<h2>Home</h2>"))
+        self.assertTrue(self.read("public/blog/index.html").startswith("<h2>Blog</h2>"))
+
+    def test_invalid_template_keeps_previous(self):
+        self.write("template.html", "{{ Unknown }}")
+        self.run_quietly(self.session.apply, [self.path("template.html")], [])
+        self.assertTrue(self.read("public/index.html").startswith("<title>Home"))
+
+    def test_changed_page_and_template(self):
+        self.write("template.html", "<h2>{{ Title }}</h2>{{ Content }}")
+        self.write("content/index.md", "# Start\n\nchanged")
+        changed = [self.path("template.html"), self.path("content/index.md")]
+        self.run_quietly(self.session.apply, changed, [])
+        self.assertTrue(self.read("public/index.html").startswith("<h2>Start</h2>"))
+
+    def test_removed_page(self):
+        os.remove(self.path("content/blog/index.md"))
+        self.run_quietly(self.session.apply, [], [self.path("content/blog/index.md")])
+        self.assertFalse(os.path.exists(self.path("public/blog")))
+        self.assertTrue(os.path.isfile(self.path("public/index.html")))
+
+    def test_removed_directory(self):
+        os.remove(self.path("content/blog/index.md"))
+        os.rmdir(self.path("content/blog"))
+        self.run_quietly(self.session.apply, [], [self.path("content/blog")])
+        self.assertFalse(os.path.exists(self.path("public/blog")))
+
+    def test_changed_static_file(self):
+        self.write("static/index.css", "body { margin: 0 }")
+        self.run_quietly(self.session.apply, [self.path("static/index.css")], [])
+        self.assertEqual(self.read("public/index.css"), "body { margin: 0 }")
+
+    def test_failed_page_keeps_watching(self):
+        self.write("content/index.md", "no title")
+        output = StringIO()
+        with redirect_stdout(output):
+            self.session.apply([self.path("content/index.md")], [])
+        self.assertIn("Failed to generate", output.getvalue())
+        self.assertNotIn(self.path("content/index.md"), self.session.pages)
+
+
+class WatcherTests:
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.content = os.path.join(self.tmp.name, "content")
+        self.template = os.path.join(self.tmp.name, "template.html")
+        os.makedirs(self.content)
+        self.write(os.path.join(self.content, "index.md"), "# Home")
+        self.write(self.template, TEMPLATE)
+        self.watcher = self.create_watcher([self.content, self.template])
+
+    def tearDown(self):
+        self.watcher.close()
+        self.tmp.cleanup()
+
+    def write(self, path: str, content: str):
+        with open(path, "w") as file:
+            file.write(content)
+
+    def test_changed_file(self):
+        path = os.path.join(self.content, "index.md")
+        self.write(path, "# Changed home")
+        self.assertEqual(self.watcher.wait(timeout=2), ({path}, set()))
+
+    def test_new_file_in_new_directory(self):
+        os.makedirs(os.path.join(self.content, "blog"))
+        path = os.path.join(self.content, "blog", "index.md")
+        self.write(path, "# Blog")
+        changed, _ = self.watcher.wait(timeout=2)
+        if path not in changed:
+            # inotify reports the directory first and the file afterwards
+            changed, _ = self.watcher.wait(timeout=2)
+        self.assertIn(path, changed)
+
+    def test_removed_file(self):
+        path = os.path.join(self.content, "index.md")
+        os.remove(path)
+        self.assertEqual(self.watcher.wait(timeout=2), (set(), {path}))
+
+    def test_watched_file(self):
+        self.write(self.template, "{{ Content }}")
+        changed, _ = self.watcher.wait(timeout=2)
+        self.assertEqual(changed, {self.template})
+
+    def test_unwatched_sibling_is_ignored(self):
+        self.write(os.path.join(self.tmp.name, "notes.txt"), "notes")
+        self.assertEqual(self.watcher.wait(timeout=0.3), (set(), set()))
+
+
+class TestPollingWatcher(WatcherTests, unittest.TestCase):
+    def create_watcher(self, paths):
+        return PollingWatcher(paths, interval=0.05)
+
+
+@unittest.skipUnless(sys.platform == "linux", "inotify is only available on Linux")
+class TestInotifyWatcher(WatcherTests, unittest.TestCase):
+    def create_watcher(self, paths):
+        return InotifyWatcher(paths)
+
+
+if __name__ == "__main__":
+    unittest.main()
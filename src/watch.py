@@ -0,0 +1,325 @@
+import ctypes
+import os
+import select
+import struct
+import time
+from typing import Dict, Iterable, List, Set, Tuple
+
+from build_manifest import remove_empty_dirs
+from htmlnode import HTMLNode
+from markdown_util import parse_page, write_page
+from site_index import SiteIndex, is_within
+from static_util import sync_file
+from template import Template
+
+# inotify(7) constants, see <sys/inotify.h>
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = os.O_CLOEXEC
+WATCH_MASK = (
+    IN_MODIFY
+    | IN_ATTRIB
+    | IN_CLOSE_WRITE
+    | IN_MOVED_FROM
+    | IN_MOVED_TO
+    | IN_CREATE
+    | IN_DELETE
+)
+EVENT_HEADER = struct.Struct("iIII")
+
+# Editors save in several steps (truncate, write, rename), wait this long after
+# the first event so a save is handled as a single change
+DEBOUNCE_SECONDS = 0.02
+
+
+def walk_files(path: str) -> List["str"]:
+    if os.path.isfile(path):
+        return [path]
+    files = []
+    for dirpath, _, filenames in os.walk(path):
+        files += [os.path.join(dirpath, filename) for filename in filenames]
+    return files
+
+
+class PollingWatcher:
+
+    def __init__(self, paths: Iterable[str], interval: float = 0.2):
+        self.paths = [os.path.normpath(path) for path in paths]
+        self.interval = interval
+        self.snapshot = self.__scan()
+
+    def __scan(self) -> Dict[str, Tuple[int, int]]:
+        snapshot = {}
+        for path in self.paths:
+            for file_path in walk_files(path):
+                try:
+                    stat = os.stat(file_path)
+                except FileNotFoundError:
+                    continue
+                snapshot[file_path] = (stat.st_mtime_ns, stat.st_size)
+        return snapshot
+
+    def wait(self, timeout: float | None = None) -> Tuple[Set[str], Set[str]]:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            time.sleep(self.interval)
+            current = self.__scan()
+            changed = {
+                path
+                for path, stat in current.items()
+                if self.snapshot.get(path) != stat
+            }
+            removed = set(self.snapshot) - set(current)
+            self.snapshot = current
+            if changed or removed:
+                return changed, removed
+            if deadline is not None and time.monotonic() >= deadline:
+                return set(), set()
+
+    def close(self) -> None:
+        pass
+
+
+class InotifyWatcher:
+
+    def __init__(self, paths: Iterable[str]):
+        self.libc = ctypes.CDLL(None, use_errno=True)
+        self.fd = self.libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+
+        self.paths = [os.path.normpath(path) for path in paths]
+        self.dirs: Dict[int, str] = {}
+        # Single files are watched through their directory, since editors often
+        # replace a file with a rename and a watch on the old inode would go quiet
+        self.files: Set[str] = set()
+        self.file_dirs: Set[int] = set()
+        try:
+            for path in self.paths:
+                if os.path.isdir(path):
+                    self.__watch_tree(path)
+                    continue
+                self.files.add(path)
+                self.file_dirs.add(self.__add_watch(os.path.dirname(path) or "."))
+        except OSError:
+            self.close()
+            raise
+
+    def __add_watch(self, directory: str) -> int:
+        wd = self.libc.inotify_add_watch(self.fd, os.fsencode(directory), WATCH_MASK)
+        if wd < 0:
+            raise OSError(ctypes.get_errno(), f"inotify_add_watch failed: {directory}")
+        self.dirs[wd] = directory
+        return wd
+
+    def __watch_tree(self, root: str) -> List["str"]:
+        # Returns the files already in the tree, a directory that is moved or
+        # created with content in it doesn't produce events for them
+        files = []
+        for dirpath, _, filenames in os.walk(root):
+            self.__add_watch(dirpath)
+            files += [os.path.join(dirpath, filename) for filename in filenames]
+        return files
+
+    def __read_events(self) -> List[Tuple[int, int, str]]:
+        events = []
+        while True:
+            try:
+                buffer = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                return events
+            offset = 0
+            while offset < len(buffer):
+                wd, mask, _, length = EVENT_HEADER.unpack_from(buffer, offset)
+                offset += EVENT_HEADER.size
+                name = buffer[offset : offset + length].rstrip(b"\0")
+                offset += length
+                events.append((wd, mask, os.fsdecode(name)))
+
+    def wait(self, timeout: float | None = None) -> Tuple[Set[str], Set[str]]:
+        changed: Set[str] = set()
+        removed: Set[str] = set()
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return changed, removed
+        time.sleep(DEBOUNCE_SECONDS)
+
+        for wd, mask, name in self.__read_events():
+            if mask & IN_Q_OVERFLOW:
+                # Events were dropped, report everything as changed
+                for path in self.paths:
+                    changed.update(walk_files(path))
+                continue
+            if mask & IN_IGNORED:
+                self.dirs.pop(wd, None)
+                continue
+            directory = self.dirs.get(wd)
+            if directory is None:
+                continue
+            path = (
+                os.path.normpath(os.path.join(directory, name)) if name else directory
+            )
+            if wd in self.file_dirs and path not in self.files:
+                continue
+
+            if mask & (IN_DELETE | IN_MOVED_FROM):
+                removed.add(path)
+                changed.discard(path)
+            elif mask & IN_ISDIR:
+                if mask & (IN_CREATE | IN_MOVED_TO):
+                    changed.update(self.__watch_tree(path))
+            else:
+                changed.add(path)
+                removed.discard(path)
+        return changed, removed
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+
+def create_watcher(paths: Iterable[str], polling: bool = False):
+    paths = list(paths)
+    if not polling:
+        try:
+            return InotifyWatcher(paths)
+        except (OSError, AttributeError):
+            # Not Linux, or inotify is unavailable
+            pass
+    return PollingWatcher(paths)
+
+
+class WatchSession:
+    # Keeps the compiled template and the parsed tree of every page in memory,
+    # so a change re-renders only the page it touched and a template change
+    # re-renders every page without parsing any markdown again
+
+    def __init__(
+        self, content_dir: str, static_dir: str, template_path: str, public_dir: str
+    ):
+        self.content_dir = os.path.normpath(content_dir)
+        self.static_dir = os.path.normpath(static_dir)
+        self.template_path = os.path.normpath(template_path)
+        self.public_dir = os.path.normpath(public_dir)
+        self.template = Template.load(self.template_path)
+        self.pages: Dict[str, Tuple[str, HTMLNode]] = {}
+        self.static_files: Set[str] = set()
+
+    def build_all(self) -> None:
+        index = SiteIndex.scan(self.content_dir, self.static_dir, self.public_dir)
+        for file in index.static_files:
+            self.sync_static(file.src_path, file.size, file.mtime_ns)
+        for page in index.pages:
+            self.update_page(page.src_path)
+
+    def apply(self, changed: Iterable[str], removed: Iterable[str]) -> None:
+        changed = {os.path.normpath(path) for path in changed}
+        removed = {os.path.normpath(path) for path in removed}
+        template_changed = self.template_path in changed
+        if template_changed:
+            changed.discard(self.template_path)
+            self.reload_template()
+
+        for path in sorted(removed):
+            self.remove(path)
+        for path in sorted(changed):
+            if is_within(path, self.static_dir):
+                self.sync_static(path)
+            elif is_within(path, self.content_dir) and path.endswith(".md"):
+                self.update_page(path, render=not template_changed)
+
+        if template_changed:
+            start = time.perf_counter()
+            for path in sorted(self.pages):
+                self.render_page(path)
+            elapsed = (time.perf_counter() - start) * 1000
+            print(f"Re-rendered {len(self.pages)} pages in {elapsed:.1f} ms")
+
+    def reload_template(self) -> None:
+        try:
+            self.template = Template.load(self.template_path)
+        except Exception as e:
+            print(f"Keeping the previous template, {self.template_path}: {e}")
+
+    def update_page(self, src_path: str, render: bool = True) -> None:
+        start = time.perf_counter()
+        try:
+            self.pages[src_path] = parse_page(src_path)
+        except Exception as e:
+            self.pages.pop(src_path, None)
+            print(f"Failed to generate {src_path}: {type(e).__name__}: {e}")
+            return
+        if render and self.render_page(src_path):
+            elapsed = (time.perf_counter() - start) * 1000
+            print(f"Rebuilt {self.page_dest_path(src_path)} in {elapsed:.1f} ms")
+
+    def render_page(self, src_path: str) -> bool:
+        title, html_node = self.pages[src_path]
+        try:
+            write_page(self.template, self.page_dest_path(src_path), title, html_node)
+        except Exception as e:
+            print(f"Failed to generate {src_path}: {type(e).__name__}: {e}")
+            return False
+        return True
+
+    def sync_static(
+        self, src_path: str, size: int | None = None, mtime_ns: int | None = None
+    ) -> None:
+        dest_path = self.dest_path(src_path, self.static_dir)
+        os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+        self.static_files.add(src_path)
+        if sync_file(src_path, dest_path, size, mtime_ns) is not None:
+            print("Synced", dest_path)
+
+    def remove(self, path: str) -> None:
+        # path may be a file or a whole directory that was deleted or moved away
+        outputs = []
+        for src in [src for src in self.static_files if is_within(src, path)]:
+            self.static_files.remove(src)
+            outputs.append(self.dest_path(src, self.static_dir))
+        for src in [src for src in self.pages if is_within(src, path)]:
+            del self.pages[src]
+            outputs.append(self.page_dest_path(src))
+
+        for output in sorted(outputs):
+            if os.path.isfile(output):
+                os.remove(output)
+                print("Removed", output)
+                remove_empty_dirs(os.path.dirname(output), self.public_dir)
+
+    def dest_path(self, src_path: str, src_dir: str) -> str:
+        return os.path.join(self.public_dir, os.path.relpath(src_path, src_dir))
+
+    def page_dest_path(self, src_path: str) -> str:
+        return self.dest_path(src_path, self.content_dir)[: -len(".md")] + ".html"
+
+
+def watch(
+    content_dir: str,
+    static_dir: str,
+    template_path: str,
+    public_dir: str,
+    polling: bool = False,
+) -> None:
+    session = WatchSession(content_dir, static_dir, template_path, public_dir)
+    session.build_all()
+
+    watcher = create_watcher([content_dir, static_dir, template_path], polling)
+    print(f"Watching for changes with {type(watcher).__name__}, Ctrl+C to stop")
+    try:
+        while True:
+            changed, removed = watcher.wait()
+            if changed or removed:
+                session.apply(changed, removed)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        watcher.close()